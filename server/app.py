@@ -1,108 +1,73 @@
+import os
+import weakref
 from sqlalchemy import event
+from sqlalchemy.orm import configure_mappers
+from sqlalchemy.exc import IntegrityError
 from datetime import timedelta
-from config import app, db, api
-from flask import request, abort
+from config import db, configure, init_extensions
+from flask import Flask, current_app, request, abort
 from flask_restful import Resource
-from marshmallow import fields, validate
-from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from models import User, Favorite, Category, ItemListing
+from passwords import PasswordHashBusy
+from storage import apply_sqlite_pragmas
+from instrumentation import init_instrumentation
+from metrics import init_metrics, metrics_response
+from compression import init_compression
+from pagination import paginate_listings, filter_listings
+from loaders import load_user_categories, load_user_category_summary, load_user_favorites
+from search import search_listings, search_cli
+from cache import cached_response, init_response_cache
+from fastdump import fast_dump
+from bulk_import import import_listings, iter_ndjson, iter_json_array
+from favorites import parse_listing_ids, favorited_listing_ids, batch_update_favorites
+from export import stream_export, listings_export_query, favorites_export_query
+from purge import delete_listing, schedule_purge, init_purge, listings_cli
+from routing import read_only, init_read_routing
+from related import refresh_related, related_listings, related_cli
+from counters import (
+    adjust_favorite_count,
+    adjust_listing_count,
+    add_to_user_category_stats,
+    refresh_user_category_stats,
+    popular_listings,
+    counters_cli,
+)
 from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
-
-# --- Schema Definitions ---
-
-class UserSchema(SQLAlchemyAutoSchema):
-    class Meta:
-        model = User
-        load_instance = True
-        include_relationships = True
-        sqla_session = db.session
-        dump_only = ("id", "created_at", "password_hash")
-
-    id = fields.Integer(dump_only=True)
-    # password = fields.String(load_only=True, required=True, validate=validate.Length(min=6))
-    listings = fields.Nested("ItemListingSchema", many=True, exclude=("owner",))
-    categories = fields.Nested("CategorySchema", many=True, exclude=("listings",))
-    favorites = fields.Nested("FavoriteSchema", many=True, exclude=("listing",))
-
-class CategorySchema(SQLAlchemyAutoSchema):
-    """
-    Schema for serializing and deserializing Category model instances.
-    Includes nested listings for 'My Categories' functionality.
-    """
-
-    class Meta:
-        model = Category
-        load_instance = True
-        include_relationships = False
-        sqla_session = db.session
-
-    id = fields.Integer(dump_only=True)
-    name = fields.String(required=True)
-    listings = fields.Nested("ItemListingSchema", many=True, dump_only=True)
-
-class ItemListingSchema(SQLAlchemyAutoSchema):
-    """
-    Schema for serializing and deserializing ItemListing model instances.
-    Includes nested category info for frontend display.
-    """
-
-    class Meta:
-        model = ItemListing
-        load_instance = True
-        include_fk = True
-        sqla_session = db.session
-        dump_only = ("id", "created_at")
-
-    id = fields.Integer(dump_only=True)
-    title = fields.String(required=True)
-    description = fields.String(required=True)
-    price = fields.Float(allow_none=True)
-    image_url = fields.String(allow_none=True)
-    category_id = fields.Integer(required=True)
-    user_id = fields.Integer(required=True)
-    category = fields.Nested(
-        "CategorySchema", only=("id", "name"), dump_only=True
-    )  # Added for category info
-    owner = fields.Nested("UserSchema", only=("id", "username"))
-    # Added for category info
-    
-
-
-class FavoriteSchema(SQLAlchemyAutoSchema):
-    """
-    Schema for serializing and deserializing Favorite model instances.
-    Includes nested listing with category info.
-    """
-
-    class Meta:
-        model = Favorite
-        load_instance = True
-        include_fk = True
-        sqla_session = db.session
-        dump_only = ("id", "created_at")
-
-    id = fields.Integer(dump_only=True)
-    user_id = fields.Integer(required=True)
-    item_listing_id = fields.Integer(required=True)
-    note = fields.String(allow_none=True)
-    created_at = fields.DateTime(dump_only=True)
-    listing = fields.Nested(
-        ItemListingSchema, dump_only=True
-    )  # Includes category via ItemListing
-    
-
-# --- Schema Instances ---
-
-user_schema = UserSchema()
-cat_schema = CategorySchema()
-cats_schema = CategorySchema(many=True)
-fav_schema = FavoriteSchema()
-favs_schema = FavoriteSchema(many=True)
-listing_schema = ItemListingSchema()
-listings_schema = ItemListingSchema(many=True)
+import schemas
+
+# --- Schemas ---
+#
+# The marshmallow schemas and fieldsets live in schemas.py and are built on
+# first use, so resources refer to them as schemas.<name>.
+
+def dump_categories_with_listings(groups):
+    """Serialize (Category, listings) pairs from loaders.load_user_categories."""
+    return [
+        {
+            **fast_dump(schemas.cat_summary_schema, category),
+            "listings": fast_dump(schemas.listings_schema, listings),
+        }
+        for category, listings in groups
+    ]
+
+
+def dump_category_summary(stats):
+    """Serialize UserCategoryStat rows from loaders.load_user_category_summary."""
+    return [
+        {
+            "id": stat.category_id,
+            "name": stat.category.name,
+            "listing_count": stat.listing_count,
+            "last_listed_at": stat.last_listed_at.isoformat() if stat.last_listed_at else None,
+        }
+        for stat in stats
+    ]
 
 # --- Resource Classes ---
 
+# Returned when the password hashing pool is saturated
+HASH_BUSY_RESPONSE = {"msg": "Server busy, please retry"}, 503, {"Retry-After": "1"}
+
 
 class SignupResource(Resource):
     """Handles user signup requests."""
@@ -113,10 +78,13 @@ class SignupResource(Resource):
         if User.query.filter_by(username=data.get("username")).first():
             return {"msg": "Username exists"}, 400
         user = User(username=data["username"], email=data["email"])
-        user.set_password(data["password"])
+        try:
+            user.set_password(data["password"])
+        except PasswordHashBusy:
+            return HASH_BUSY_RESPONSE
         db.session.add(user)
         db.session.commit()
-        return user_schema.dump(user), 201
+        return schemas.user_schema.dump(user), 201
 
 
 class LoginResource(Resource):
@@ -126,7 +94,15 @@ class LoginResource(Resource):
         """Authenticate a user and issue a JWT token."""
         data = request.get_json() or {}
         user = User.query.filter_by(username=data.get("username")).first()
-        if user and user.check_password(data.get("password")):
+        try:
+            authenticated = user is not None and user.check_password(data.get("password"))
+            if authenticated and user.password_needs_rehash():
+                # Upgrade hashes made with outdated parameters while we know the password
+                user.set_password(data.get("password"))
+                db.session.commit()
+        except PasswordHashBusy:
+            return HASH_BUSY_RESPONSE
+        if authenticated:
             token = create_access_token(
                 identity=str(user.id),
                 expires_delta=timedelta(hours=1),
@@ -148,6 +124,7 @@ class LoginResource(Resource):
 #         return user_schema.dump(user), 200
 
 class MeResource(Resource):
+    @read_only
     @jwt_required()
     def get(self):
         """Retrieve authenticated user's profile with categories and nested listings."""
@@ -159,20 +136,12 @@ class MeResource(Resource):
 
         user = User.query.get_or_404(uid)
 
-        # Fetch user's categories and their listings
-        categories = Category.query.join(ItemListing).filter(ItemListing.user_id == uid).distinct().all()
+        # Fetch user's listings once and group them by category
+        categories_with_listings = dump_categories_with_listings(load_user_categories(uid))
 
-        # Structure the response
-        categories_with_listings = []
-        for category in categories:
-            user_listings = ItemListing.query.filter_by(user_id=uid, category_id=category.id).all()
-            category_data = cat_schema.dump(category)
-            category_data["listings"] = listings_schema.dump(user_listings)
-            categories_with_listings.append(category_data)
-
-        # Fetch user's favorites
-        favorites = Favorite.query.filter_by(user_id=uid).all()
-        favorites_data = favs_schema.dump(favorites)  # Serialize favorites
+        # Fetch user's favorites with listing, category and owner eagerly loaded
+        favorites = load_user_favorites(uid)
+        favorites_data = fast_dump(schemas.favs_schema, favorites)  # Serialize favorites
 
         # Build the final response
         response = {
@@ -190,52 +159,47 @@ class MeResource(Resource):
 class MyCategoriesResource(Resource):
     """Handles requests for authenticated user's categories."""
 
+    @read_only
     @jwt_required()
     def get(self):
         """
         Retrieve only the current user's categories with their listings.
         Excludes categories with no listings after deletion.
+        With ?summary=1, returns just each category's listing count and
+        latest listing time from the user's category stats.
         """
         uid_str = get_jwt_identity()
         try:
             uid = int(uid_str)
         except (TypeError, ValueError):
             abort(400, description="Invalid user ID format")
-        user_categories = (
-            Category.query.join(ItemListing)
-            .filter(ItemListing.user_id == uid)
-            .distinct()
-            .all()
-        )
-        categories_with_listings = []
-        for category in user_categories:
-            user_listings = ItemListing.query.filter_by(
-                user_id=uid, category_id=category.id
-            ).all()
-            if user_listings:  # Only include categories with listings
-                category.listings = user_listings
-                categories_with_listings.append(category)
-        return cats_schema.dump(categories_with_listings), 200
+        if request.args.get("summary") in ("1", "true"):
+            return dump_category_summary(load_user_category_summary(uid)), 200
+        # Grouping the user's listings means empty categories never appear
+        return dump_categories_with_listings(load_user_categories(uid)), 200
 
 
 class CategoryListResource(Resource):
     """Handles category listing and creation."""
 
+    # Categories are dumped with their nested listings and owners
+    @read_only
+    @cached_response("categories", "item_listings", "users")
     def get(self):
         """Retrieve all categories."""
-        return cats_schema.dump(Category.query.all()), 200
+        return fast_dump(schemas.cats_schema, Category.query.all()), 200
 
     @jwt_required()
     def post(self):
         """Create a new category."""
         data = request.get_json() or {}
         try:
-            cat = cat_schema.load(data, session=db.session)
+            cat = schemas.cat_schema.load(data, session=db.session)
         except Exception as e:
             return {"msg": str(e)}, 400
         db.session.add(cat)
         db.session.commit()
-        return cat_schema.dump(cat), 201
+        return schemas.cat_schema.dump(cat), 201
 
 
 class CategoryResource(Resource):
@@ -260,22 +224,27 @@ class CategoryResource(Resource):
         ).all()
         
         category.listings = user_listings
-        return cat_schema.dump(category), 200
+        return schemas.cat_schema.dump(category), 200
 
 
 class FavoriteListResource(Resource):
     """Handles favorite listing and creation."""
 
+    @read_only
     @jwt_required()
     def get(self):
-        """Retrieve authenticated user's favorites."""
+        """
+        Retrieve authenticated user's favorites.
+        Supports ?fields= and ?expand=listing,listing.category,listing.owner.
+        """
         uid_str = get_jwt_identity()
         try:
             uid = int(uid_str)
         except (TypeError, ValueError):
             abort(400, description="Invalid user ID format")
-        favs = Favorite.query.filter_by(user_id=uid).all()
-        return favs_schema.dump(favs), 200
+        schema, options = schemas.favorite_fields.select(request.args)
+        favs = load_user_favorites(uid, options)
+        return fast_dump(schema, favs), 200
 
     @jwt_required()
     def post(self):
@@ -288,12 +257,69 @@ class FavoriteListResource(Resource):
         data = request.get_json() or {}
         data["user_id"] = uid
         try:
-            fav = fav_schema.load(data, session=db.session)
+            fav = schemas.fav_schema.load(data, session=db.session)
         except Exception as e:
             abort(400, str(e))
+        # Soft-deleted listings are hidden (see purge.py), like missing ones
+        if db.session.get(ItemListing, fav.item_listing_id) is None:
+            abort(404)
         db.session.add(fav)
-        db.session.commit()
-        return fav_schema.dump(fav), 201
+        try:
+            db.session.flush()
+            adjust_favorite_count(fav.item_listing_id, 1)
+            refresh_related(uid, [fav.item_listing_id])
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if "UNIQUE" in str(e.orig):
+                return {"msg": "Listing already favorited"}, 409
+            abort(400, str(e.orig))
+        return schemas.fav_schema.dump(fav), 201
+
+
+class FavoriteBatchResource(Resource):
+    """Handles favoriting and unfavoriting many listings at once."""
+
+    @jwt_required()
+    def post(self):
+        """
+        Favorite the listing ids in "add" and unfavorite those in "remove"
+        in one transaction, with an optional "note" for new favorites.
+        Repeating a request changes nothing.
+        """
+        uid_str = get_jwt_identity()
+        try:
+            uid = int(uid_str)
+        except (TypeError, ValueError):
+            abort(400, description="Invalid user ID format")
+        data = request.get_json() or {}
+        add = parse_listing_ids(data.get("add", []), "add")
+        remove = parse_listing_ids(data.get("remove", []), "remove")
+        if set(add) & set(remove):
+            abort(400, description="A listing id cannot be in both add and remove")
+        try:
+            result = batch_update_favorites(uid, add, remove, data.get("note"))
+        except IntegrityError as e:
+            # A listing was deleted between the existence check and the insert
+            db.session.rollback()
+            return {"msg": str(e.orig)}, 409
+        return result, 200
+
+
+class FavoriteLookupResource(Resource):
+    """Handles "is favorited" checks for many listings."""
+
+    @read_only
+    @jwt_required()
+    def get(self):
+        """Return which of the listing ids in ?ids=1,2,3 the user has favorited."""
+        uid_str = get_jwt_identity()
+        try:
+            uid = int(uid_str)
+        except (TypeError, ValueError):
+            abort(400, description="Invalid user ID format")
+        ids = parse_listing_ids(request.args.get("ids", ""), "ids")
+        return {"favorited": favorited_listing_ids(uid, ids)}, 200
 
 
 class FavoriteResource(Resource):
@@ -312,11 +338,11 @@ class FavoriteResource(Resource):
             abort(403)
         data = request.get_json() or {}
         try:
-            fav = fav_schema.load(data, instance=fav, partial=True, session=db.session)
+            fav = schemas.fav_schema.load(data, instance=fav, partial=True, session=db.session)
         except Exception as e:
             abort(400, str(e))
         db.session.commit()
-        return fav_schema.dump(fav), 200
+        return schemas.fav_schema.dump(fav), 200
 
     @jwt_required()
     def delete(self, id):
@@ -330,6 +356,8 @@ class FavoriteResource(Resource):
         if fav.user_id != uid:
             abort(403)
         db.session.delete(fav)
+        adjust_favorite_count(fav.item_listing_id, -1)
+        refresh_related(uid, [fav.item_listing_id])
         db.session.commit()
         return "", 204
 
@@ -337,13 +365,20 @@ class FavoriteResource(Resource):
 class ListingListResource(Resource):
     """Handles item listing and creation."""
 
+    @read_only
+    @cached_response("item_listings", "categories", "users")
     def get(self):
-        """Retrieve item listings, filterable by category."""
+        """
+        Retrieve item listings, filterable by category and ?min_price=/?max_price=,
+        ordered by ?sort=price|-price|created_at|-created_at (newest first by default).
+        Paginated with ?limit= and an opaque ?cursor= from the previous page.
+        Supports ?fields= and ?expand=category,owner.
+        """
         args = request.args
-        qs = ItemListing.query
-        if args.get("category_id"):
-            qs = qs.filter_by(category_id=args["category_id"])
-        return listings_schema.dump(qs.all()), 200
+        schema, options = schemas.listing_fields.select(args)
+        qs = filter_listings(ItemListing.query, args).options(*options)
+        listings, next_cursor = paginate_listings(qs, args)
+        return {"items": fast_dump(schema, listings), "next_cursor": next_cursor}, 200
 
     @jwt_required()
     def post(self):
@@ -356,20 +391,109 @@ class ListingListResource(Resource):
         data = request.get_json() or {}
         data["user_id"] = uid
         try:
-            listing = listing_schema.load(data, session=db.session)
+            listing = schemas.listing_schema.load(data, session=db.session)
         except Exception as e:
             abort(400, str(e))
         db.session.add(listing)
+        adjust_listing_count(listing.category_id, 1)
+        add_to_user_category_stats(listing)
         db.session.commit()
-        return listing_schema.dump(listing), 201
+        return schemas.listing_schema.dump(listing), 201
+
+
+class ListingBulkResource(Resource):
+    """Handles bulk import of item listings."""
+
+    @jwt_required()
+    def post(self):
+        """
+        Import many listings from an NDJSON (application/x-ndjson) or JSON
+        array body. Rows are validated and inserted in batches of
+        ?batch_size=; invalid rows are reported by position without
+        aborting the rest of the import.
+        """
+        uid_str = get_jwt_identity()
+        try:
+            uid = int(uid_str)
+        except (TypeError, ValueError):
+            abort(400, description="Invalid user ID format")
+        try:
+            batch_size = int(request.args.get("batch_size", current_app.config["BULK_IMPORT_BATCH_SIZE"]))
+        except ValueError:
+            abort(400, description="Invalid batch_size")
+        batch_size = max(1, min(batch_size, current_app.config["BULK_IMPORT_MAX_BATCH_SIZE"]))
+
+        if request.mimetype == "application/x-ndjson":
+            rows = iter_ndjson(request.stream)
+        else:
+            rows = iter_json_array(request.stream)
+        result = import_listings(rows, uid, schemas.listing_import_schema, batch_size)
+        return result, 200
+
+
+class ListingExportResource(Resource):
+    """Handles streaming export of item listings."""
+
+    @read_only
+    def get(self):
+        """
+        Stream all listings, filterable by category, as NDJSON or CSV
+        (?format=ndjson|csv), compressed if the client accepts it.
+        """
+        return stream_export(listings_export_query(request.args.get("category_id")), "listings")
+
+
+class ListingPopularResource(Resource):
+    """Handles the most favorited item listings."""
+
+    @read_only
+    @cached_response("item_listings", "categories", "users")
+    def get(self):
+        """
+        Retrieve listings by favorite count, highest first, filterable by
+        category. Paginated with ?limit= and ?cursor=.
+        """
+        listings, next_cursor = popular_listings(request.args)
+        return {"items": fast_dump(schemas.listings_schema, listings), "next_cursor": next_cursor}, 200
+
+
+class ListingSearchResource(Resource):
+    """Handles full-text search over item listings."""
+
+    @read_only
+    def get(self):
+        """
+        Search listing titles and descriptions with ?q=, best matches first.
+        Each word is matched as a prefix; filterable by category and paginated
+        with ?limit= and ?cursor=.
+        """
+        listings, next_cursor = search_listings(request.args)
+        return {"items": fast_dump(schemas.listings_schema, listings), "next_cursor": next_cursor}, 200
+
+
+class ListingRelatedResource(Resource):
+    """Handles "users who favorited this also favorited" recommendations."""
+
+    @read_only
+    @cached_response("listing_neighbors", "item_listings", "categories", "users")
+    def get(self, id):
+        """
+        Retrieve the listings most often favorited by users who favorited
+        this one, best first, each with its score. Limited by ?limit=.
+        """
+        rows = related_listings(id, request.args)
+        items = fast_dump(schemas.listings_schema, [listing for listing, _ in rows])
+        return {"items": [{**item, "score": score} for item, (_, score) in zip(items, rows)]}, 200
 
 
 class ListingResource(Resource):
     """Handles specific item listing requests."""
 
+    @read_only
+    @cached_response("item_listings", "categories", "users")
     def get(self, id):
         """Retrieve an item listing by ID."""
-        return listing_schema.dump(ItemListing.query.get_or_404(id)), 200
+        return schemas.listing_schema.dump(ItemListing.query.get_or_404(id)), 200
 
     @jwt_required()
     def put(self, id):
@@ -382,14 +506,20 @@ class ListingResource(Resource):
         listing = ItemListing.query.get_or_404(id)
         if listing.user_id != uid:
             abort(403)
+        old_category_id = listing.category_id
         try:
-            listing = listing_schema.load(
+            listing = schemas.listing_schema.load(
                 request.json, instance=listing, session=db.session
             )
         except Exception as e:
             abort(400, str(e))
+        if listing.category_id != old_category_id:
+            adjust_listing_count(old_category_id, -1)
+            adjust_listing_count(listing.category_id, 1)
+            refresh_user_category_stats(uid, [old_category_id])
+            add_to_user_category_stats(listing)
         db.session.commit()
-        return listing_schema.dump(listing), 200
+        return schemas.listing_schema.dump(listing), 200
 
     # @jwt_required()
     # def delete(self, id):
@@ -407,7 +537,11 @@ class ListingResource(Resource):
     #     return "", 204
     @jwt_required()
     def delete(self, id):
-        """Delete an item listing, impacts 'My Categories' if last in category."""
+        """
+        Delete an item listing and its favorites, impacts 'My Categories' if
+        last in category. Heavily favorited listings are hidden at once and
+        purged in the background.
+        """
         uid_str = get_jwt_identity()
         try:
             uid = int(uid_str)
@@ -418,62 +552,156 @@ class ListingResource(Resource):
         if listing.user_id != uid:
             abort(403)
 
-        # NEW: Delete all Favorites associated with this listing
-        favorites = Favorite.query.filter_by(item_listing_id=listing.id).all()
-        print(f"Deleting {len(favorites)} favorites associated with listing ID {listing.id}")
-        
-        for fav in favorites:
-            db.session.delete(fav)
-
-        # Now delete the listing
-        db.session.delete(listing)
+        deferred = delete_listing(listing)
         db.session.commit()
-
+        if deferred:
+            schedule_purge()
         return "", 204
 
 
 
+class MyFavoritesExportResource(Resource):
+    """Handles streaming export of the authenticated user's favorites."""
+
+    @read_only
+    @jwt_required()
+    def get(self):
+        """Stream the user's favorites as NDJSON or CSV (?format=ndjson|csv)."""
+        uid_str = get_jwt_identity()
+        try:
+            uid = int(uid_str)
+        except (TypeError, ValueError):
+            abort(400, description="Invalid user ID format")
+        return stream_export(favorites_export_query(uid), "favorites")
+
+
 class MyListingsResource(Resource):
     """Handles authenticated user's listings."""
 
+    @read_only
     @jwt_required()
     def get(self):
-        """Retrieve authenticated user's listings, filterable by category."""
+        """
+        Retrieve authenticated user's listings, filterable by category and price,
+        in the same ?sort= orders as /api/listings.
+        Paginated with ?limit= and an opaque ?cursor= from the previous page.
+        Supports ?fields= and ?expand=category,owner.
+        """
         uid_str = get_jwt_identity()
         try:
             uid = int(uid_str)
         except (TypeError, ValueError):
             abort(400, description="Invalid user ID format")
         args = request.args
-        qs = ItemListing.query.filter_by(user_id=uid)
-        if args.get("category_id"):
-            qs = qs.filter_by(category_id=args["category_id"])
-        return listings_schema.dump(qs.all()), 200
+        schema, options = schemas.listing_fields.select(args)
+        qs = filter_listings(ItemListing.query.filter_by(user_id=uid), args).options(*options)
+        listings, next_cursor = paginate_listings(qs, args)
+        return {"items": fast_dump(schema, listings), "next_cursor": next_cursor}, 200
     
 
-# --- Register API Resources ---
+class MetricsResource(Resource):
+    """Exposes request and DB pool metrics for Prometheus."""
+
+    def get(self):
+        """Retrieve all metrics in the Prometheus text format."""
+        return metrics_response(current_app, db.engines.values())
+
+
+# --- Application factory ---
+#
+# Nothing above touches an app: create_app() builds a configured instance
+# on demand, so importing this module is cheap and several apps with
+# different settings can share a process. `flask` commands find
+# create_app() through FLASK_APP=app; WSGI servers load "app:create_app()",
+# as gunicorn.conf.py does for production.
+
+
+def register_resources(api):
+    """Register the API resources on a Flask-RESTful Api."""
+    api.add_resource(SignupResource, "/api/signup")
+    api.add_resource(LoginResource, "/api/login")
+    api.add_resource(MeResource, "/api/me")
+    api.add_resource(MyCategoriesResource, "/api/me/categories")
+    api.add_resource(CategoryListResource, "/api/categories")
+    api.add_resource(CategoryResource, "/api/categories/<int:id>")
+    api.add_resource(FavoriteListResource, "/api/favorites")
+    api.add_resource(FavoriteBatchResource, "/api/favorites/batch")
+    api.add_resource(FavoriteLookupResource, "/api/favorites/lookup")
+    api.add_resource(FavoriteResource, "/api/favorites/<int:id>")
+    api.add_resource(ListingListResource, "/api/listings")
+    api.add_resource(ListingSearchResource, "/api/listings/search")
+    api.add_resource(ListingPopularResource, "/api/listings/popular")
+    api.add_resource(ListingBulkResource, "/api/listings/bulk")
+    api.add_resource(ListingExportResource, "/api/listings/export")
+    api.add_resource(ListingResource, "/api/listings/<int:id>")
+    api.add_resource(ListingRelatedResource, "/api/listings/<int:id>/related")
+    api.add_resource(MyListingsResource, "/api/me/listings")
+    api.add_resource(MyFavoritesExportResource, "/api/me/favorites/export")
+    api.add_resource(MetricsResource, "/metrics")
+
+
+def reset_after_fork(app_ref):
+    """
+    In a forked child (e.g. a gunicorn worker forked from a preloaded
+    master), replace the app's connection pools and password hashing pool,
+    so no SQLite handle or pool thread is shared with the parent.
+    """
+    app = app_ref()
+    if app is None:
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False: the parent's connections are left for the parent to close
+            engine.dispose(close=False)
+    app.extensions.pop("password_hash_pool", None)
+
+
+def create_app(config=None):
+    """
+    Build and configure an app.
+
+    Args:
+        config (dict): Settings overriding the defaults in config.configure.
+    """
+    app = Flask(__name__)
+    configure(app, config)
+    api = init_extensions(app)
+    register_resources(api)
+
+    app.cli.add_command(search_cli)
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(listings_cli)
+    app.cli.add_command(related_cli)
+
+    init_response_cache(app)
+    # Creates the backrefs (ItemListing.category, ...) that queries name directly
+    configure_mappers()
+
+    # Engines are created by db.init_app but connect on first use; the
+    # listeners below apply to every connection they open
+    with app.app_context():
+        engines = list(db.engines.values())
+        if db.engine.dialect.name == "sqlite":
+            pragmas = app.config["SQLITE_PRAGMAS"]
+
+            @event.listens_for(db.engine, "connect")
+            def set_sqlite_pragma(dbapi_connection, connection_record):
+                apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+        init_read_routing(app, db)
 
-api.add_resource(SignupResource, "/api/signup")
-api.add_resource(LoginResource, "/api/login")
-api.add_resource(MeResource, "/api/me")
-api.add_resource(MyCategoriesResource, "/api/me/categories")
-api.add_resource(CategoryListResource, "/api/categories")
-api.add_resource(CategoryResource, "/api/categories/<int:id>")
-api.add_resource(FavoriteListResource, "/api/favorites")
-api.add_resource(FavoriteResource, "/api/favorites/<int:id>")
-api.add_resource(ListingListResource, "/api/listings")
-api.add_resource(ListingResource, "/api/listings/<int:id>")
-api.add_resource(MyListingsResource, "/api/me/listings")
+    # Looks for listings left to purge, so after the PRAGMA listeners
+    init_purge(app)
 
-# Set up the event listener within an application context
-with app.app_context():
+    init_instrumentation(app, api, engines)
+    init_metrics(app, engines)
+    # Registered last so it runs first, inside the timing hooks above
+    init_compression(app)
 
-    @event.listens_for(db.engine, "connect")
-    def set_sqlite_pragma(dbapi_connection, connection_record):
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.close()
+    if hasattr(os, "register_at_fork"):  # Not on Windows
+        os.register_at_fork(after_in_child=lambda ref=weakref.ref(app): reset_after_fork(ref))
+    return app
 
 
 if __name__ == "__main__":
-    app.run(port=5000, debug=True)
\ No newline at end of file
+    create_app().run(port=5000, debug=True)
@@ -0,0 +1,747 @@
+import io
+import re
+import sys
+import asyncio
+from datetime import timedelta
+from functools import wraps
+from urllib.parse import parse_qsl
+from flask import abort
+from flask_jwt_extended import create_access_token, decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import ExpiredSignatureError, PyJWTError
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import joinedload
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException, InternalServerError, MethodNotAllowed, NotFound
+from werkzeug.http import parse_accept_header
+from config import db
+from models import User, Favorite, Category, ItemListing
+from passwords import PasswordHashBusy, hash_password_async, verify_password_async, needs_rehash
+from storage import apply_sqlite_pragmas
+from compression import choose_encoding, compress, weak_etag
+from pagination import filter_listings, keyset_listings, listings_page
+from loaders import (
+    user_listings_query,
+    user_favorites_query,
+    user_category_summary_query,
+    group_listings_by_category,
+)
+from cache import cache_key, etag_matches, make_etag
+from routing import READ_BIND, read_sqlite_pragmas
+from fastdump import fast_dump
+import purge
+from counters import (
+    adjust_favorite_count,
+    adjust_listing_count,
+    add_to_user_category_stats,
+    refresh_user_category_stats,
+)
+from related import refresh_related
+from app import create_app, dump_categories_with_listings, dump_category_summary, HASH_BUSY_RESPONSE
+import schemas
+
+# --- Optional ASGI entry point ---
+#
+# Serves signup, login, /api/me (with /api/me/listings and
+# /api/me/categories), categories, listings and favorites with async
+# handlers on an aiosqlite engine, for deployments that want many
+# concurrent connections per process without a thread each:
+#
+#     pip install -r requirements-asgi.txt
+#     uvicorn asgi:application --port 5555
+#
+# Models, schemas, fieldsets, pagination and the counter helpers are the
+# ones app.py uses, so both entry points return the same JSON, encoded by
+# app.json and compressed under the same COMPRESSION_* settings. Reads run as
+# select() statements on an AsyncSession with every relationship the schema
+# dumps eagerly loaded (async sessions cannot lazy-load). Writes run the
+# same steps as the resources, counter helpers included, through
+# AsyncSession.run_sync, which executes sync ORM code on the async
+# connection and lets it lazy-load.
+#
+# GET handlers that app.py marks @read_only read from an aiosqlite engine on
+# its read bind, under the same rules (see routing.py), and the ones it
+# caches use the app's ResponseCache, which commits made here invalidate
+# through the same session events as in app.py.
+#
+# Every other endpoint (search, related listings, bulk import, exports,
+# batch favorites, metrics, ...) is served by app.py's resources: the
+# request is passed to the Flask app as WSGI and run on the event loop's
+# thread pool, so both entry points answer the same routes. Its request body
+# is read whole first, so a bulk import is buffered in memory here.
+
+# Listings are dumped with their category and owner
+LISTING_LOADS = (joinedload(ItemListing.category), joinedload(ItemListing.owner))
+
+# Settings, JWT and the helpers shared with app.py come from an app instance
+# of our own; handlers run inside its app context. This process never runs
+# migrations, so Flask-Migrate is not loaded.
+app = create_app({"MIGRATIONS_ENABLED": False})
+
+
+def _aiosqlite_engine(url, options, pragmas):
+    if url.get_backend_name() != "sqlite":
+        raise RuntimeError("The ASGI entry point supports SQLite (aiosqlite) only")
+    engine = create_async_engine(url.set(drivername="sqlite+aiosqlite"), **options)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+    return engine
+
+
+def create_engine():
+    """An aiosqlite engine on the same database and PRAGMAs as db.engine."""
+    with app.app_context():
+        url = db.engine.url
+    return _aiosqlite_engine(url, app.config["SQLALCHEMY_ENGINE_OPTIONS"], app.config["SQLITE_PRAGMAS"])
+
+
+def create_read_engine():
+    """
+    An aiosqlite engine on app.py's read bind with its query-only PRAGMAs,
+    or None when reads use the primary.
+    """
+    with app.app_context():
+        read = db.engines.get(READ_BIND)
+    if read is None:
+        return None
+    options = {name: value for name, value in app.config["SQLALCHEMY_BINDS"][READ_BIND].items() if name != "url"}
+    return _aiosqlite_engine(read.url, options, read_sqlite_pragmas(app.config["SQLITE_PRAGMAS"]))
+
+
+engine = create_engine()
+read_engine = create_read_engine()
+Session = async_sessionmaker(engine)
+ReadSession = async_sessionmaker(read_engine) if read_engine is not None else Session
+
+
+# --- Requests, responses and routing ---
+
+
+class ErrorResponse(Exception):
+    """Raised to return body with status immediately, e.g. for auth failures."""
+
+    def __init__(self, body, status):
+        super().__init__(body)
+        self.body = body
+        self.status = status
+
+
+class Request:
+    """The parts of an HTTP request the handlers read."""
+
+    __slots__ = ("method", "path", "args", "headers", "body", "identity")
+
+    def __init__(self, scope, body):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.args = MultiDict(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True))
+        self.headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        self.body = body
+        self.identity = None  # The JWT identity, once current_user_id has verified it
+
+    def get_json(self):
+        """The decoded JSON body like Flask's request.get_json(), aborting with 415 or 400."""
+        if self.headers.get("content-type", "").split(";")[0].strip() != "application/json":
+            abort(415, description="Request Content-Type must be 'application/json'.")
+        try:
+            return app.json.loads(self.body) if self.body else None
+        except ValueError:
+            abort(400, description="Failed to decode JSON object")
+
+
+class Router:
+    """Maps paths with Flask-style <int:name> parts and methods to handlers."""
+
+    def __init__(self):
+        self.routes = []
+
+    def route(self, path, *methods):
+        pattern = re.compile("^" + re.sub(r"<int:(\w+)>", r"(?P<\1>\\d+)", path) + "$")
+
+        def register(handler):
+            self.routes.append((pattern, methods, handler))
+            return handler
+
+        return register
+
+    def methods(self, path):
+        """Methods allowed on path, empty if no route matches it."""
+        return [method for pattern, methods, _ in self.routes if pattern.match(path) for method in methods]
+
+    def match(self, method, path):
+        """
+        Returns:
+            tuple: (handler, path parameters). Raises NotFound or MethodNotAllowed.
+        """
+        allowed = []
+        for pattern, methods, handler in self.routes:
+            found = pattern.match(path)
+            if found is None:
+                continue
+            if method in methods:
+                return handler, {name: int(value) for name, value in found.groupdict().items()}
+            allowed += methods
+        if allowed:
+            raise MethodNotAllowed(valid_methods=allowed)
+        raise NotFound()
+
+
+routes = Router()
+
+
+def current_user_id(request):
+    """
+    The user id from the request's Bearer token, with flask_jwt_extended's
+    default error responses for missing, expired or invalid tokens.
+    """
+    header = request.headers.get("authorization")
+    if not header:
+        raise ErrorResponse({"msg": "Missing Authorization Header"}, 401)
+    scheme, _, token = header.partition(" ")
+    if scheme != "Bearer" or not token:
+        raise ErrorResponse({"msg": "Bad Authorization header. Expected 'Authorization: Bearer <JWT>'"}, 422)
+    try:
+        identity = request.identity = decode_token(token)["sub"]
+    except ExpiredSignatureError:
+        raise ErrorResponse({"msg": "Token has expired"}, 401)
+    except (PyJWTError, JWTExtendedException) as e:
+        raise ErrorResponse({"msg": str(e)}, 422)
+    try:
+        return int(identity)
+    except (TypeError, ValueError):
+        abort(400, description="Invalid user ID format")
+
+
+def read_session(request):
+    """
+    A session for a @read_only handler's reads: on the read engine, unless
+    the user committed a write in the last READ_YOUR_WRITES_SECONDS.
+    """
+    recent_writers = app.extensions.get("recent_writers")
+    if recent_writers is not None and request.identity in recent_writers:
+        return Session()
+    return ReadSession()
+
+
+def cached(*tables):
+    """cache.cached_response for the handlers here, on the app's ResponseCache."""
+
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(request, **params):
+            key = cache_key(request.path, request.args)
+            enabled = app.config["RESPONSE_CACHE_ENABLED"]
+            response_cache = app.extensions["response_cache"]
+            cached = response_cache.get(key) if enabled else None
+            if cached is None:
+                generation = response_cache.generation(tables) if enabled else None
+                data, status = await handler(request, **params)
+                if status != 200:
+                    return data, status
+                etag = make_etag(data)
+                if enabled:
+                    response_cache.set(key, data, etag, tables, generation)
+            else:
+                data, etag = cached
+
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if etag_matches(etag, request.headers.get("if-none-match", "")):
+                return "", 304, headers
+            return data, 200, headers
+
+        return wrapper
+
+    return decorator
+
+
+# --- Handlers ---
+
+
+@routes.route("/api/signup", "POST")
+async def signup(request):
+    """Create a new user account."""
+    data = request.get_json() or {}
+    async with Session() as session:
+        if await session.scalar(select(User.id).filter_by(username=data.get("username"))) is not None:
+            return {"msg": "Username exists"}, 400
+        user = User(username=data["username"], email=data["email"])
+        try:
+            user.password_hash = await hash_password_async(data["password"])
+        except PasswordHashBusy:
+            return HASH_BUSY_RESPONSE
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+        return {**schemas.new_user_schema.dump(user), "listings": [], "categories": [], "favorite_items": []}, 201
+
+
+@routes.route("/api/login", "POST")
+async def login(request):
+    """Authenticate a user and issue a JWT token."""
+    data = request.get_json() or {}
+    async with Session() as session:
+        user = await session.scalar(select(User).filter_by(username=data.get("username")))
+        uid = user.id if user is not None else None
+        try:
+            authenticated = user is not None and await verify_password_async(
+                user.password_hash, data.get("password")
+            )
+            if authenticated and needs_rehash(user.password_hash):
+                # Upgrade hashes made with outdated parameters while we know the password
+                user.password_hash = await hash_password_async(data.get("password"))
+                await session.commit()
+        except PasswordHashBusy:
+            return HASH_BUSY_RESPONSE
+    if authenticated:
+        token = create_access_token(identity=str(uid), expires_delta=timedelta(hours=1))
+        return {"access_token": token}, 200
+    return {"msg": "Bad credentials"}, 401
+
+
+@routes.route("/api/me", "GET")
+async def me(request):
+    """Retrieve authenticated user's profile with categories and nested listings."""
+    uid = current_user_id(request)
+    async with read_session(request) as session:
+        user = await session.get(User, uid)
+        if user is None:
+            abort(404)
+        listings = (await session.scalars(user_listings_query(uid))).all()
+        favorites = (await session.scalars(user_favorites_query(uid))).all()
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "created_at": user.created_at.isoformat(),
+        "categories": dump_categories_with_listings(group_listings_by_category(listings)),
+        "favorites": fast_dump(schemas.favs_schema, favorites),
+    }, 200
+
+
+@routes.route("/api/me/categories", "GET")
+async def my_categories(request):
+    """
+    Retrieve only the current user's categories with their listings, or
+    with ?summary=1 each category's listing count and latest listing time.
+    """
+    uid = current_user_id(request)
+    async with read_session(request) as session:
+        if request.args.get("summary") in ("1", "true"):
+            return dump_category_summary((await session.scalars(user_category_summary_query(uid))).all()), 200
+        listings = (await session.scalars(user_listings_query(uid))).all()
+    return dump_categories_with_listings(group_listings_by_category(listings)), 200
+
+
+@routes.route("/api/me/listings", "GET")
+async def my_listings(request):
+    """Retrieve the authenticated user's listings like list_listings, filtered and paginated."""
+    uid = current_user_id(request)
+    return await _listings_page(request, select(ItemListing).filter_by(user_id=uid))
+
+
+@routes.route("/api/categories", "GET")
+@cached("categories", "item_listings", "users")
+async def list_categories(request):
+    """Retrieve all categories with their listings, in two queries."""
+    async with read_session(request) as session:
+        categories = (await session.scalars(select(Category).order_by(Category.id))).all()
+        listings = (await session.scalars(
+            select(ItemListing)
+            .where(ItemListing.category_id.is_not(None))
+            .options(*LISTING_LOADS)
+            .order_by(ItemListing.category_id, ItemListing.id)
+        )).all()
+    by_category = {category.id: (category, []) for category in categories}
+    for listing in listings:
+        by_category[listing.category_id][1].append(listing)
+    return dump_categories_with_listings(by_category.values()), 200
+
+
+@routes.route("/api/categories", "POST")
+async def create_category(request):
+    """Create a new category."""
+    current_user_id(request)
+    data = request.get_json() or {}
+    async with Session() as session:
+        try:
+            cat = schemas.cat_schema.load(data, session=session.sync_session)
+        except Exception as e:
+            return {"msg": str(e)}, 400
+        session.add(cat)
+        await session.commit()
+        await session.refresh(cat)
+    return {**schemas.cat_summary_schema.dump(cat), "listings": []}, 201
+
+
+@routes.route("/api/categories/<int:id>", "GET")
+async def get_category(request, id):
+    """Retrieve the authenticated user's listings for a specific category by ID."""
+    uid = current_user_id(request)
+    async with Session() as session:
+        category = await session.get(Category, id)
+        if category is None:
+            abort(404)
+        listings = (await session.scalars(
+            select(ItemListing).filter_by(user_id=uid, category_id=id).options(*LISTING_LOADS)
+        )).all()
+    return dump_categories_with_listings([(category, listings)])[0], 200
+
+
+async def _listings_page(request, qs):
+    args = request.args
+    schema, options = schemas.listing_fields.select(args)
+    qs = filter_listings(qs, args).options(*options)
+    qs, limit, column = keyset_listings(qs, args)
+    async with read_session(request) as session:
+        rows = (await session.scalars(qs.limit(limit + 1))).all()
+    listings, next_cursor = listings_page(rows, limit, column)
+    return {"items": fast_dump(schema, listings), "next_cursor": next_cursor}, 200
+
+
+@routes.route("/api/listings", "GET")
+@cached("item_listings", "categories", "users")
+async def list_listings(request):
+    """
+    Retrieve item listings with the same filters, ?sort=, cursor pagination,
+    ?fields= and ?expand= as ListingListResource.
+    """
+    return await _listings_page(request, select(ItemListing))
+
+
+def _create_listing(session, uid, data):
+    data["user_id"] = uid
+    try:
+        listing = schemas.listing_schema.load(data, session=session)
+    except Exception as e:
+        abort(400, str(e))
+    session.add(listing)
+    adjust_listing_count(listing.category_id, 1, session)
+    add_to_user_category_stats(listing, session)
+    session.commit()
+    return schemas.listing_schema.dump(listing), 201
+
+
+@routes.route("/api/listings", "POST")
+async def create_listing(request):
+    """Create a new item listing."""
+    uid = current_user_id(request)
+    data = request.get_json() or {}
+    async with Session() as session:
+        return await session.run_sync(_create_listing, uid, data)
+
+
+@routes.route("/api/listings/<int:id>", "GET")
+@cached("item_listings", "categories", "users")
+async def get_listing(request, id):
+    """Retrieve an item listing by ID."""
+    async with read_session(request) as session:
+        listing = await session.get(ItemListing, id, options=LISTING_LOADS)
+    if listing is None:
+        abort(404)
+    return schemas.listing_schema.dump(listing), 200
+
+
+def _owned_listing(session, uid, id):
+    listing = session.get(ItemListing, id)
+    if listing is None:
+        abort(404)
+    if listing.user_id != uid:
+        abort(403)
+    return listing
+
+
+def _update_listing(session, uid, id, data):
+    listing = _owned_listing(session, uid, id)
+    old_category_id = listing.category_id
+    try:
+        listing = schemas.listing_schema.load(data, instance=listing, session=session)
+    except Exception as e:
+        abort(400, str(e))
+    if listing.category_id != old_category_id:
+        adjust_listing_count(old_category_id, -1, session)
+        adjust_listing_count(listing.category_id, 1, session)
+        refresh_user_category_stats(uid, [old_category_id], session)
+        add_to_user_category_stats(listing, session)
+    session.commit()
+    return schemas.listing_schema.dump(listing), 200
+
+
+@routes.route("/api/listings/<int:id>", "PUT")
+async def update_listing(request, id):
+    """Update an item listing."""
+    uid = current_user_id(request)
+    data = request.get_json()
+    async with Session() as session:
+        return await session.run_sync(_update_listing, uid, id, data)
+
+
+def _delete_listing(session, uid, id):
+    listing = _owned_listing(session, uid, id)
+    # Qualified, as delete_listing here is the route handler below
+    deferred = purge.delete_listing(listing, session)
+    session.commit()
+    if deferred:
+        purge.schedule_purge()
+    return "", 204
+
+
+@routes.route("/api/listings/<int:id>", "DELETE")
+async def delete_listing(request, id):
+    """Delete an item listing and its favorites, or soft-delete it (see purge.py)."""
+    uid = current_user_id(request)
+    async with Session() as session:
+        return await session.run_sync(_delete_listing, uid, id)
+
+
+@routes.route("/api/favorites", "GET")
+async def list_favorites(request):
+    """
+    Retrieve authenticated user's favorites.
+    Supports ?fields= and ?expand=listing,listing.category,listing.owner.
+    """
+    uid = current_user_id(request)
+    schema, options = schemas.favorite_fields.select(request.args)
+    async with read_session(request) as session:
+        favs = (await session.scalars(user_favorites_query(uid, options))).all()
+    return fast_dump(schema, favs), 200
+
+
+def _create_favorite(session, uid, data):
+    data["user_id"] = uid
+    try:
+        fav = schemas.fav_schema.load(data, session=session)
+    except Exception as e:
+        abort(400, str(e))
+    if session.get(ItemListing, fav.item_listing_id) is None:
+        abort(404)
+    session.add(fav)
+    try:
+        session.flush()
+        adjust_favorite_count(fav.item_listing_id, 1, session)
+        refresh_related(uid, [fav.item_listing_id], session)
+        session.commit()
+    except IntegrityError as e:
+        session.rollback()
+        if "UNIQUE" in str(e.orig):
+            return {"msg": "Listing already favorited"}, 409
+        abort(400, str(e.orig))
+    return schemas.fav_schema.dump(fav), 201
+
+
+@routes.route("/api/favorites", "POST")
+async def create_favorite(request):
+    """Create a new favorite with optional note."""
+    uid = current_user_id(request)
+    data = request.get_json() or {}
+    async with Session() as session:
+        return await session.run_sync(_create_favorite, uid, data)
+
+
+def _owned_favorite(session, uid, id):
+    fav = session.get(Favorite, id)
+    if fav is None:
+        abort(404)
+    if fav.user_id != uid:
+        abort(403)
+    return fav
+
+
+def _update_favorite(session, uid, id, data):
+    fav = _owned_favorite(session, uid, id)
+    try:
+        fav = schemas.fav_schema.load(data, instance=fav, partial=True, session=session)
+    except Exception as e:
+        abort(400, str(e))
+    session.commit()
+    return schemas.fav_schema.dump(fav), 200
+
+
+@routes.route("/api/favorites/<int:id>", "PUT")
+async def update_favorite(request, id):
+    """Update a favorite's note."""
+    uid = current_user_id(request)
+    data = request.get_json() or {}
+    async with Session() as session:
+        return await session.run_sync(_update_favorite, uid, id, data)
+
+
+def _delete_favorite(session, uid, id):
+    fav = _owned_favorite(session, uid, id)
+    session.delete(fav)
+    adjust_favorite_count(fav.item_listing_id, -1, session)
+    refresh_related(uid, [fav.item_listing_id], session)
+    session.commit()
+    return "", 204
+
+
+@routes.route("/api/favorites/<int:id>", "DELETE")
+async def delete_favorite(request, id):
+    """Delete a favorite."""
+    uid = current_user_id(request)
+    async with Session() as session:
+        return await session.run_sync(_delete_favorite, uid, id)
+
+
+# --- ASGI application ---
+
+
+async def _read_body(receive):
+    body = b""
+    more = True
+    while more:
+        message = await receive()
+        body += message.get("body", b"")
+        more = message.get("more_body", False)
+    return body
+
+
+async def _respond(send, request, body, status, headers=None):
+    headers = dict(headers or {})
+    payload = b""
+    if status not in (204, 304):
+        payload = app.json.dumps_bytes(body) + b"\n"
+        headers["Content-Type"] = "application/json"
+        if app.config["COMPRESSION_ENABLED"]:
+            headers["Vary"] = "Accept-Encoding"
+            encoding = choose_encoding(parse_accept_header(request.headers.get("accept-encoding")))
+            if encoding is not None and len(payload) >= app.config["COMPRESSION_MIN_SIZE"]:
+                payload = compress(payload, encoding, app.config)
+                headers["Content-Encoding"] = encoding
+                if "ETag" in headers:
+                    headers["ETag"] = weak_etag(headers["ETag"])
+        headers["Content-Length"] = len(payload)
+    # Like Flask-CORS's defaults, any origin may call the API
+    raw = [(b"access-control-allow-origin", b"*")]
+    raw += [(name.lower().encode("latin-1"), str(value).encode("latin-1")) for name, value in headers.items()]
+    await send({"type": "http.response.start", "status": status, "headers": raw})
+    await send({"type": "http.response.body", "body": payload})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await engine.dispose()
+            if read_engine is not None:
+                await read_engine.dispose()
+            with app.app_context():
+                for sync_engine in db.engines.values():
+                    sync_engine.dispose()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+# --- Everything else: app.py's resources, through WSGI ---
+
+
+def _wsgi_environ(scope, body):
+    """The PEP 3333 environ for an ASGI HTTP request."""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": "HTTP/" + scope.get("http_version", "1.1"),
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        name, value = name.decode("latin-1"), value.decode("latin-1")
+        key = {"content-type": "CONTENT_TYPE", "content-length": "CONTENT_LENGTH"}.get(name)
+        key = key or "HTTP_" + name.upper().replace("-", "_")
+        environ[key] = environ[key] + "," + value if key in environ else value
+    return environ
+
+
+def _run_wsgi(environ, loop, send):
+    """
+    Runs on a worker thread: call the Flask app and pass its response,
+    streamed chunk by chunk, to send on the event loop.
+    """
+
+    def send_from_thread(message):
+        asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+    started = []
+
+    def start_response(status, headers, exc_info=None):
+        started[:] = [int(status.split(" ", 1)[0]), headers]
+
+    result = app(environ, start_response)
+    try:
+        status, headers = started
+        send_from_thread({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+        })
+        for chunk in result:
+            if chunk:
+                send_from_thread({"type": "http.response.body", "body": chunk, "more_body": True})
+        send_from_thread({"type": "http.response.body", "body": b""})
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+
+
+async def application(scope, receive, send):
+    """The ASGI callable."""
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+    request = Request(scope, await _read_body(receive))
+
+    if not routes.methods(request.path):
+        # Not one of the handlers here: app.py serves it, 404s included
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, _run_wsgi, _wsgi_environ(scope, request.body), loop, send)
+
+    if request.method == "OPTIONS":
+        # CORS preflight
+        allowed = routes.methods(request.path)
+        headers = {
+            "Access-Control-Allow-Methods": ", ".join(allowed),
+            "Access-Control-Allow-Headers": request.headers.get("access-control-request-headers", ""),
+        }
+        return await _respond(send, request, "", 204, headers)
+
+    try:
+        handler, params = routes.match(request.method, request.path)
+        with app.app_context():
+            result = await handler(request, **params)
+    except ErrorResponse as e:
+        result = e.body, e.status
+    except HTTPException as e:
+        result = {"message": e.description}, e.code, dict(e.get_headers())
+        result[2].pop("Content-Type", None)
+    except Exception:
+        app.logger.exception("Unhandled error on %s %s", request.method, request.path)
+        result = {"message": InternalServerError.description}, 500
+    recent_writers = app.extensions.get("recent_writers")
+    if recent_writers is not None and request.method != "GET" and result[1] < 400 and request.identity is not None:
+        # Keep the user's reads on the primary for a while, as routing.py does
+        recent_writers.add(request.identity)
+    await _respond(send, request, *result)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(application, port=5555)
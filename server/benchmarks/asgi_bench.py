@@ -0,0 +1,251 @@
+"""
+Sustained throughput and tail latency, WSGI (app.py) vs ASGI (asgi.py).
+
+Usage (from server/, with requirements-asgi.txt installed):
+    python benchmarks/asgi_bench.py --connections 1000 --seconds 20
+
+Seeds a temporary database, then for each entry point starts a server in
+a subprocess (the threaded Werkzeug server for app.py, uvicorn for
+asgi.py) and holds --connections keep-alive connections open against it
+from one asyncio client, each sending requests back to back. Requests
+cycle through a mix of public and authenticated reads. Reports
+requests/sec, p50/p95/p99/max latency, errors and requests still
+unanswered at the end, counting requests started after --warmup.
+The response cache is off in both servers unless --cache is given, so
+every request reaches the database.
+"""
+import os
+import sys
+import logging
+import time
+import socket
+import asyncio
+import argparse
+import resource
+import tempfile
+import subprocess
+import statistics
+
+# Allow "python benchmarks/<name>.py" from the server/ directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = "benchmark-password"
+SERVERS = ("wsgi", "asgi")
+
+
+def raise_fd_limit():
+    """Each connection needs a descriptor on both sides; lift the soft limit to the hard one."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+# --- Servers (run in subprocesses) ---
+
+
+def serve(kind, port, cache):
+    """Serve app.py or asgi.py on port until killed."""
+    raise_fd_limit()
+    from app import create_app
+
+    app = create_app({"RESPONSE_CACHE_ENABLED": cache, "MIGRATIONS_ENABLED": False})
+    if kind == "wsgi":
+        from werkzeug.serving import ThreadedWSGIServer, make_server
+
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)  # No per-request access log
+        # The default listen backlog of 128 refuses connection bursts
+        ThreadedWSGIServer.request_queue_size = 4096
+        make_server("127.0.0.1", port, app, threaded=True).serve_forever()
+    else:
+        import uvicorn
+        from asgi import application
+
+        uvicorn.run(application, host="127.0.0.1", port=port, backlog=4096, log_level="warning")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind, database_url, cache):
+    port = free_port()
+    args = [sys.executable, os.path.abspath(__file__), "--serve", kind, "--port", str(port)]
+    if cache:
+        args.append("--cache")
+    env = {**os.environ, "DATABASE_URL": database_url}
+    process = subprocess.Popen(args, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, port
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{kind} server did not start")
+
+
+# --- Client ---
+
+
+def build_requests(token, listing_ids, category_ids):
+    """Raw HTTP/1.1 requests cycled through by every connection."""
+    auth = f"Authorization: Bearer {token}\r\n"
+    paths = [("/api/listings?limit=20", "")]
+    paths += [(f"/api/listings/{id}", "") for id in listing_ids]
+    paths += [(f"/api/categories/{id}", auth) for id in category_ids]
+    paths += [("/api/favorites?expand=listing", auth)]
+    return [f"GET {path} HTTP/1.1\r\nHost: bench\r\n{headers}\r\n".encode() for path, headers in paths]
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+    length = 0
+    close = False
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        name = name.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "connection" and value.strip().lower() == "close":
+            close = True
+    await reader.readexactly(length)
+    return status, close
+
+
+async def _connection(port, requests, offset, record_from, stats):
+    latencies, errors = stats["latencies"], stats["errors"]
+    i = offset
+    reader = writer = None
+    start = None
+    try:
+        while True:
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                start = time.monotonic()
+                writer.write(requests[i % len(requests)])
+                status, close = await _read_response(reader)
+                if start >= record_from:
+                    if status >= 400:
+                        errors[f"HTTP {status}"] = errors.get(f"HTTP {status}", 0) + 1
+                    else:
+                        latencies.append(time.monotonic() - start)
+                start = None
+                if close:
+                    writer.close()
+                    writer = None
+            except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                start = None
+                if writer is not None:
+                    writer.close()
+                writer = None
+                await asyncio.sleep(0.05)
+            i += 1
+    except asyncio.CancelledError:
+        # Still waiting when the run ended: its latency is at least this long
+        if start is not None and start >= record_from:
+            stats["unfinished"] += 1
+        if writer is not None:
+            writer.close()
+
+
+async def drive(port, requests, connections, seconds, warmup):
+    """
+    Hold connections open for warmup + seconds, then cancel them. Only
+    requests started after the warm-up and answered before the end count.
+    """
+    stats = {"latencies": [], "errors": {}, "unfinished": 0}
+    record_from = time.monotonic() + warmup
+    tasks = [
+        asyncio.create_task(_connection(port, requests, n, record_from, stats))
+        for n in range(connections)
+    ]
+    await asyncio.sleep(warmup + seconds)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return stats
+
+
+def summarize(stats, seconds):
+    ms = sorted(value * 1000 for value in stats["latencies"])
+
+    def pct(p):
+        return ms[min(len(ms) - 1, int(len(ms) * p))] if ms else float("nan")
+
+    return {
+        "requests/sec": len(ms) / seconds,
+        "p50 ms": statistics.median(ms) if ms else float("nan"),
+        "p95 ms": pct(0.95),
+        "p99 ms": pct(0.99),
+        "max ms": ms[-1] if ms else float("nan"),
+        "errors": sum(stats["errors"].values()),
+        "unfinished": stats["unfinished"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--listings", type=int, default=10_000)
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on")
+    parser.add_argument("--only", choices=SERVERS, help="benchmark one entry point")
+    parser.add_argument("--serve", choices=SERVERS, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    opts = parser.parse_args()
+
+    if opts.serve:
+        return serve(opts.serve, opts.port, opts.cache)
+
+    limit = raise_fd_limit()
+    if limit < opts.connections * 2 + 100:
+        print(f"warning: open file limit {limit} may be too low for {opts.connections} connections")
+
+    tmp = tempfile.TemporaryDirectory()
+    path = os.path.join(tmp.name, "bench.db")
+    database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = database_url
+
+    from seed import make_engine, seed, set_passwords
+    from app import create_app
+    from flask_jwt_extended import create_access_token
+
+    app = create_app()
+    engine = make_engine(path)
+    seed(engine, listings=opts.listings, favorites=opts.listings * 2)
+    with app.app_context():
+        set_passwords(engine, PASSWORD)
+        token = create_access_token(identity="1")
+    requests = build_requests(token, listing_ids=range(1, 51), category_ids=range(1, 6))
+
+    print(f"{opts.connections} connections for {opts.seconds}s after {opts.warmup}s warm-up\n")
+    results = {}
+    for kind in [opts.only] if opts.only else SERVERS:
+        process, port = start_server(kind, database_url, opts.cache)
+        try:
+            stats = asyncio.run(drive(port, requests, opts.connections, opts.seconds, opts.warmup))
+        finally:
+            process.terminate()
+            process.wait()
+        results[kind] = summarize(stats, opts.seconds)
+        if stats["errors"]:
+            print(f"{kind} errors: {stats['errors']}")
+
+    names = list(next(iter(results.values())))
+    print(f"{'':<14}" + "".join(f"{kind:>12}" for kind in results))
+    for name in names:
+        print(f"{name:<14}" + "".join(f"{results[kind][name]:>12.1f}" for kind in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Throughput of POST /api/listings/bulk vs one POST /api/listings per item.
+
+Usage (from server/):
+    python benchmarks/bulk_import_bench.py --rows 20000
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}"
+
+from seed import make_engine, seed  # noqa: E402
+from app import create_app  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+app = create_app()
+
+
+def make_rows(n):
+    return [
+        {"title": f"Imported item {i}", "description": "Bulk imported listing", "price": i % 500,
+         "category_id": i % 20 + 1}
+        for i in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--single-rows", type=int, default=500,
+                        help="rows sent through the per-item path (it is slow)")
+    parser.add_argument("--batch-size", type=int, default=app.config["BULK_IMPORT_BATCH_SIZE"])
+    opts = parser.parse_args()
+
+    seed(make_engine(os.path.join(_tmp.name, "bench.db")), listings=0, favorites=0)
+    with app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+    client = app.test_client()
+
+    start = time.perf_counter()
+    for row in make_rows(opts.single_rows):
+        assert client.post("/api/listings", json=row, headers=headers).status_code == 201
+    single = opts.single_rows / (time.perf_counter() - start)
+
+    body = "\n".join(json.dumps(row) for row in make_rows(opts.rows))
+    start = time.perf_counter()
+    result = client.post(
+        f"/api/listings/bulk?batch_size={opts.batch_size}",
+        data=body,
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    ).json
+    bulk = result["inserted"] / (time.perf_counter() - start)
+
+    print(f"per-item POST: {single:>10,.0f} rows/sec ({opts.single_rows} rows)")
+    print(f"bulk NDJSON:   {bulk:>10,.0f} rows/sec ({result['inserted']} rows, "
+          f"batch size {opts.batch_size})")
+    print(f"speedup:       {bulk / single:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Deleting a heavily favorited listing: request time and write-lock impact.
+
+Usage (from server/):
+    python benchmarks/delete_bench.py --favorites 100000
+
+Gives a fresh listing --favorites favorites for each strategy and deletes it:
+
+    orm        loading and deleting every Favorite object (the old resource)
+    set-based  DELETE /api/listings/<id> with one DELETE ... WHERE item_listing_id = ?
+    deferred   DELETE /api/listings/<id> as a soft delete, then the batched purge
+
+Meanwhile a probe thread keeps updating another listing through
+PUT /api/listings/<id>, so its worst latency shows how long other writers
+wait for the SQLite write lock.
+"""
+import os
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}"
+
+from sqlalchemy import text  # noqa: E402
+from seed import seed  # noqa: E402
+from app import create_app  # noqa: E402
+from config import db  # noqa: E402
+from models import Favorite, ItemListing  # noqa: E402
+from counters import rebuild_counters  # noqa: E402
+from purge import purge_deleted_listings  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+app = create_app()
+
+LISTING = {"title": "Delete bench", "description": "Favorited by everyone", "price": 1, "category_id": 1}
+
+
+def add_users(engine, count):
+    with engine.begin() as conn:
+        start = conn.execute(text("SELECT coalesce(max(id), 0) FROM users")).scalar() + 1
+        conn.execute(
+            text("INSERT INTO users (username, email, password_hash) VALUES (:name, :name, 'x')"),
+            [{"name": f"fan{i}"} for i in range(start, count + 1)],
+        )
+
+
+def favorited_listing(engine, favorites):
+    """A new listing of user 1 favorited by favorites other users, with counters rebuilt."""
+    with engine.begin() as conn:
+        listing_id = conn.execute(text(
+            "INSERT INTO item_listings (title, description, price, category_id, user_id, created_at) "
+            "VALUES (:title, :description, :price, :category_id, 1, CURRENT_TIMESTAMP) RETURNING id"
+        ), LISTING).scalar()
+        conn.execute(text(
+            "INSERT INTO favorites (user_id, item_listing_id, created_at) "
+            "SELECT id, :listing_id, CURRENT_TIMESTAMP FROM users WHERE id > 1 ORDER BY id LIMIT :n"
+        ), {"listing_id": listing_id, "n": favorites})
+    with app.app_context():
+        rebuild_counters()
+    return listing_id
+
+
+def orm_delete(listing_id):
+    """The resource's previous delete: one ORM object and DELETE per favorite."""
+    with app.app_context():
+        listing = db.session.get(ItemListing, listing_id)
+        for fav in Favorite.query.filter_by(item_listing_id=listing_id).all():
+            db.session.delete(fav)
+        db.session.delete(listing)
+        db.session.commit()
+
+
+class Probe:
+    """Times PUT /api/listings/<id> in a loop on another thread."""
+
+    def __init__(self, listing_id, headers):
+        self.listing_id = listing_id
+        self.headers = headers
+        self.latencies = []
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+
+    def _run(self):
+        client = app.test_client()
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            status = client.put(
+                f"/api/listings/{self.listing_id}", json={**LISTING, "user_id": 1}, headers=self.headers
+            ).status_code
+            self.latencies.append((time.perf_counter() - start) * 1000)
+            self.errors += status >= 400
+            time.sleep(0.005)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run(strategy, engine, favorites, client, headers, probe_listing_id):
+    listing_id = favorited_listing(engine, favorites)
+    result = {}
+    with Probe(probe_listing_id, headers) as probe:
+        time.sleep(0.05)
+        start = time.perf_counter()
+        if strategy == "orm":
+            orm_delete(listing_id)
+        else:
+            app.config["LISTING_DEFERRED_DELETE_FAVORITES"] = 0 if strategy == "deferred" else favorites
+            assert client.delete(f"/api/listings/{listing_id}", headers=headers).status_code == 204
+        result["request ms"] = (time.perf_counter() - start) * 1000
+        if strategy == "deferred":
+            start = time.perf_counter()
+            with app.app_context():
+                purge_deleted_listings()
+            result["purge ms"] = (time.perf_counter() - start) * 1000
+        time.sleep(0.05)
+    with engine.connect() as conn:
+        left = conn.execute(text("SELECT count(*) FROM favorites WHERE item_listing_id = :id"), {"id": listing_id}).scalar()
+    assert left == 0, f"{strategy} left {left} favorites"
+    result["probe p50 ms"] = statistics.median(probe.latencies)
+    result["probe max ms"] = max(probe.latencies)
+    result["probe errors"] = probe.errors
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--favorites", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=app.config["LISTING_PURGE_BATCH_SIZE"])
+    opts = parser.parse_args()
+
+    app.config["RESPONSE_CACHE_ENABLED"] = False
+    app.config["LISTING_PURGE_IN_BACKGROUND"] = False  # Timed directly instead
+    app.config["LISTING_PURGE_BATCH_SIZE"] = opts.batch_size
+    with app.app_context():
+        engine = db.engine
+        headers = {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+    seed(engine, users=10, categories=5, listings=100, favorites=0)
+    add_users(engine, opts.favorites + 1)
+    client = app.test_client()
+    probe_listing_id = client.post("/api/listings", json=LISTING, headers=headers).json["id"]
+
+    print(f"Deleting a listing with {opts.favorites} favorites (purge batches of {opts.batch_size})\n")
+    results = {s: run(s, engine, opts.favorites, client, headers, probe_listing_id)
+               for s in ("orm", "set-based", "deferred")}
+    names = ["request ms", "purge ms", "probe p50 ms", "probe max ms", "probe errors"]
+    print(f"{'':<14}" + "".join(f"{s:>12}" for s in results))
+    for name in names:
+        print(f"{name:<14}" + "".join(
+            f"{results[s][name]:>12.1f}" if name in results[s] else f"{'-':>12}" for s in results
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Latency, throughput and SQL query count for every API endpoint.
+
+Usage (from server/):
+    python benchmarks/endpoint_bench.py                    # compare with baseline.json
+    python benchmarks/endpoint_bench.py --update-baseline  # record a new baseline
+
+Seeds a deterministic dataset into a temporary database, then drives each
+endpoint with --clients concurrent Flask test clients and reports p50/p95/
+p99 latency, requests/sec and SQL statements per request (plus, for
+reads, the statements issued by an uncached warm-up request). Exits non-zero
+if an endpoint's p95 regresses by more than --threshold against the
+committed baseline, or if it now issues more queries per request.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import tempfile
+import threading
+import itertools
+from sqlalchemy import event, text
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}"
+
+from seed import seed, build_search_index, set_passwords, brand  # noqa: E402
+from app import create_app  # noqa: E402
+from config import db  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+app = create_app()
+api = app.extensions["api"]
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+PASSWORD = "benchmark-password"
+
+
+class Context:
+    """Ids shared between scenarios, e.g. listings created by one and deleted by another."""
+
+    def __init__(self):
+        self.counter = itertools.count()
+        self.listings = queue.Queue()
+        self.favorites = queue.Queue()
+
+    def unique(self):
+        return next(self.counter)
+
+
+def _listing(ctx):
+    return {"title": f"Bench listing {ctx.unique()}", "description": "Created by the benchmark",
+            "price": 10, "category_id": 1}
+
+
+def _rotate(ids):
+    """Take the next id and put it back at the end for the following scenario."""
+    item = ids.get()
+    ids.put(item)
+    return item
+
+
+def scenarios(ctx, owned_listing_id):
+    """
+    (name, method, request builder, request count or None for the default).
+
+    Builders return (path, kwargs) for one request. Scenarios run in order,
+    so write scenarios can consume ids produced by earlier ones.
+    """
+    bulk_body = "\n".join(
+        json.dumps({"title": f"bulk {i}", "description": "d", "category_id": 1}) for i in range(10)
+    )
+    return [
+        ("GET /api/me", "GET", lambda: ("/api/me", {}), None),
+        ("GET /api/me/categories", "GET", lambda: ("/api/me/categories", {}), None),
+        ("GET /api/me/categories?summary", "GET", lambda: ("/api/me/categories?summary=1", {}), None),
+        ("GET /api/me/listings", "GET", lambda: ("/api/me/listings", {}), None),
+        ("GET /api/me/favorites/export", "GET", lambda: ("/api/me/favorites/export", {}), None),
+        ("GET /api/categories", "GET", lambda: ("/api/categories", {}), None),
+        ("GET /api/categories/<id>", "GET", lambda: ("/api/categories/1", {}), None),
+        ("GET /api/favorites", "GET", lambda: ("/api/favorites", {}), None),
+        ("GET /api/listings", "GET", lambda: ("/api/listings", {}), None),
+        ("GET /api/listings?category_id", "GET", lambda: ("/api/listings?category_id=2", {}), None),
+        ("GET /api/listings/<id>", "GET", lambda: (f"/api/listings/{owned_listing_id}", {}), None),
+        ("GET /api/listings/popular", "GET", lambda: ("/api/listings/popular?category_id=3", {}), None),
+        ("GET /api/listings/search", "GET",
+         lambda: (f"/api/listings/search?q={brand(ctx.unique() % 500)}", {}), None),
+        ("GET /api/listings/export", "GET", lambda: ("/api/listings/export", {}), 20),
+        ("GET /metrics", "GET", lambda: ("/metrics", {}), None),
+        ("POST /api/signup", "POST", lambda: ("/api/signup", {"json": {
+            "username": f"bench{ctx.unique()}", "email": f"bench{ctx.unique()}@x", "password": PASSWORD,
+        }}), 20),
+        ("POST /api/login", "POST", lambda: ("/api/login", {"json": {
+            "username": "user1", "password": PASSWORD,
+        }}), 20),
+        ("POST /api/categories", "POST",
+         lambda: ("/api/categories", {"json": {"name": f"Bench category {ctx.unique()}"}}), None),
+        ("POST /api/listings", "POST", lambda: ("/api/listings", {"json": _listing(ctx)}), None),
+        ("POST /api/listings/bulk", "POST", lambda: ("/api/listings/bulk", {
+            "data": bulk_body, "content_type": "application/x-ndjson",
+        }), None),
+        ("PUT /api/listings/<id>", "PUT", lambda: (
+            f"/api/listings/{_rotate(ctx.listings)}", {"json": {**_listing(ctx), "user_id": 1}},
+        ), None),
+        ("POST /api/favorites", "POST", lambda: ("/api/favorites", {"json": {
+            "item_listing_id": _rotate(ctx.listings),
+        }}), None),
+        ("GET /api/favorites/lookup", "GET", lambda: (
+            "/api/favorites/lookup?ids=" + ",".join(str(ctx.unique() % 10_000 + 1) for _ in range(50)), {},
+        ), None),
+        ("POST /api/favorites/batch", "POST", lambda: ("/api/favorites/batch", {"json": {
+            "add": [ctx.unique() % 10_000 + 1 for _ in range(10)],
+            "remove": [ctx.unique() % 10_000 + 1 for _ in range(10)],
+        }}), None),
+        ("PUT /api/favorites/<id>", "PUT", lambda: (
+            f"/api/favorites/{_rotate(ctx.favorites)}", {"json": {"note": "bench"}},
+        ), None),
+        ("DELETE /api/favorites/<id>", "DELETE",
+         lambda: (f"/api/favorites/{ctx.favorites.get()}", {}), None),
+        ("DELETE /api/listings/<id>", "DELETE",
+         lambda: (f"/api/listings/{ctx.listings.get()}", {}), None),
+    ]
+
+
+def percentile(sorted_values, p):
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_scenario(ctx, method, build, requests, clients, headers, query_counter):
+    """Send `requests` requests from `clients` threads; return per-request stats."""
+    jobs = queue.Queue()
+    for _ in range(requests):
+        jobs.put(None)
+    latencies = []
+    queries = []
+    errors = []
+    lock = threading.Lock()
+
+    # Reads get one warm-up request first, so concurrent clients measure the
+    # steady state instead of racing to fill the response cache; its query
+    # count is reported separately as the cold-path cost.
+    cold_queries = None
+    if method == "GET":
+        path, kwargs = build()
+        query_counter.count = 0
+        app.test_client().open(path, method=method, headers=headers, **kwargs).get_data()
+        cold_queries = query_counter.count
+
+    def worker():
+        client = app.test_client()
+        while True:
+            try:
+                jobs.get_nowait()
+            except queue.Empty:
+                return
+            path, kwargs = build()
+            query_counter.count = 0
+            start = time.perf_counter()
+            response = client.open(path, method=method, headers=headers, **kwargs)
+            response.get_data()
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                queries.append(query_counter.count)
+                if response.status_code >= 400:
+                    errors.append(f"{method} {path}: HTTP {response.status_code}")
+            if method == "POST" and path == "/api/listings":
+                ctx.listings.put(response.json["id"])
+            elif method == "POST" and path == "/api/favorites":
+                ctx.favorites.put(response.json["id"])
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "rps": round(requests / wall, 1),
+        "queries": round(sum(queries) / len(queries), 2),
+        "cold_queries": cold_queries,
+    }, errors
+
+
+def compare(results, baseline, threshold):
+    """Return regression messages for results against a baseline."""
+    problems = []
+    for name, result in results.items():
+        base = baseline["endpoints"].get(name)
+        if base is None:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            problems.append(
+                f"{name}: p95 {result['p95_ms']:.2f}ms vs baseline {base['p95_ms']:.2f}ms"
+            )
+        if result["queries"] > base["queries"]:
+            problems.append(
+                f"{name}: {result['queries']} queries/request vs baseline {base['queries']}"
+            )
+        if (result.get("cold_queries") or 0) > (base.get("cold_queries") or 0):
+            problems.append(
+                f"{name}: {result['cold_queries']} cold queries vs baseline {base['cold_queries']}"
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--listings", type=int, default=10_000)
+    parser.add_argument("--favorites", type=int, default=20_000)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed p95 regression as a fraction of the baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    opts = parser.parse_args()
+
+    dataset = {
+        "users": opts.users, "categories": opts.categories,
+        "listings": opts.listings, "favorites": opts.favorites,
+    }
+    with app.app_context():
+        engine = db.engine
+        headers = {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+    seed(engine, **dataset)
+    build_search_index(engine)
+    with app.app_context():
+        set_passwords(engine, PASSWORD)
+    with engine.connect() as conn:
+        owned_listing_id = conn.execute(
+            text("SELECT id FROM item_listings WHERE user_id = 1 LIMIT 1")
+        ).scalar()
+
+    query_counter = threading.local()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        query_counter.count = getattr(query_counter, "count", 0) + 1
+
+    ctx = Context()
+    results = {}
+    errors = []
+    covered = set()
+    print(f"{'endpoint':<34}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}")
+    for name, method, build, requests in scenarios(ctx, owned_listing_id):
+        result, scenario_errors = run_scenario(
+            ctx, method, build, requests or opts.requests, opts.clients, headers, query_counter
+        )
+        results[name] = result
+        errors += scenario_errors
+        path = name.split(" ", 1)[1].split("?")[0].replace("<id>", "1")
+        covered.add((method, app.url_map.bind("").match(path, method=method)[0]))
+        print(f"{name:<34}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+              f"{result['p99_ms']:>9.2f}{result['rps']:>9.0f}{result['queries']:>9.1f}")
+
+    failed = False
+    for endpoint, view in app.view_functions.items():
+        resource = getattr(view, "view_class", None)
+        if resource is not None and endpoint in api.endpoints:
+            for method in resource.methods:
+                if (method, endpoint) not in covered:
+                    print(f"\nWARNING: {method} {endpoint} has no benchmark scenario")
+    if errors:
+        failed = True
+        print(f"\n{len(errors)} requests failed, e.g. {errors[0]}")
+
+    report = {"dataset": dataset, "clients": opts.clients, "endpoints": results}
+    if opts.update_baseline:
+        with open(opts.baseline, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nbaseline written to {opts.baseline}")
+    elif os.path.exists(opts.baseline):
+        with open(opts.baseline) as f:
+            baseline = json.load(f)
+        if baseline["dataset"] != dataset or baseline["clients"] != opts.clients:
+            print("\nbaseline was recorded with a different dataset or client count; not comparing")
+        else:
+            problems = compare(results, baseline, opts.threshold)
+            for problem in problems:
+                print(f"REGRESSION {problem}")
+            failed = failed or bool(problems)
+            if not problems:
+                print(f"\nno regressions beyond {opts.threshold:.0%} against the baseline")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
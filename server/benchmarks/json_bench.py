@@ -0,0 +1,120 @@
+"""
+Bytes on the wire and encode time for the whole /api/listings feed.
+
+Usage (from server/):
+    python benchmarks/json_bench.py --listings 10000
+
+Seeds --listings listings and pages through GET /api/listings at the
+largest page size, once per configuration:
+
+    before        Flask-RESTful's own output_json (stdlib json, ", " separators)
+    stdlib        the compact stdlib provider (JSON_PROVIDER=stdlib)
+    orjson        the orjson provider (the default)
+    orjson+gzip   orjson, Accept-Encoding: gzip
+    orjson+br     orjson, Accept-Encoding: br (needs the brotli package)
+
+For each it reports response body bytes summed over every page, the time
+spent encoding the same page dicts to JSON and compressing them, and the
+wall time of the whole walk through the test client (best of --repeat).
+"""
+import os
+import time
+import argparse
+import tempfile
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}"
+
+from flask_restful.representations.json import output_json as restful_output_json  # noqa: E402
+from seed import seed  # noqa: E402
+from app import create_app  # noqa: E402
+from config import db  # noqa: E402
+from jsonprovider import OrjsonProvider, StdlibJSONProvider, output_json  # noqa: E402
+from compression import compress, offered_encodings  # noqa: E402
+from pagination import MAX_PAGE_SIZE  # noqa: E402
+
+app = create_app()
+api = app.extensions["api"]
+
+# name -> (JSON provider, representation, Accept-Encoding)
+CONFIGS = {
+    "before": (StdlibJSONProvider, restful_output_json, None),
+    "stdlib": (StdlibJSONProvider, output_json, None),
+    "orjson": (OrjsonProvider, output_json, None),
+    "orjson+gzip": (OrjsonProvider, output_json, "gzip"),
+    "orjson+br": (OrjsonProvider, output_json, "br"),
+}
+
+
+def configure(name):
+    provider, representation, encoding = CONFIGS[name]
+    app.json = provider(app)
+    api.representations["application/json"] = representation
+    return representation, encoding
+
+
+def feed_pages(client):
+    """Page through the feed uncompressed; return the page paths and dicts."""
+    paths, pages = [], []
+    path = f"/api/listings?limit={MAX_PAGE_SIZE}"
+    while path:
+        page = client.get(path).json
+        paths.append(path)
+        pages.append(page)
+        path = page["next_cursor"] and f"/api/listings?limit={MAX_PAGE_SIZE}&cursor={page['next_cursor']}"
+    return paths, pages
+
+
+def encode_seconds(pages, representation, encoding):
+    """Time to encode (and compress) every page as the response would."""
+    start = time.perf_counter()
+    with app.test_request_context():
+        for page in pages:
+            body = representation(page, 200).get_data()
+            if encoding is not None:
+                compress(body, encoding, app.config)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--listings", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    opts = parser.parse_args()
+
+    app.config["RESPONSE_CACHE_ENABLED"] = False
+    with app.app_context():
+        seed(db.engine, listings=opts.listings, favorites=0)
+    client = app.test_client()
+
+    configure("orjson")
+    paths, pages = feed_pages(client)
+
+    print(f"{sum(len(page['items']) for page in pages)} listings in {len(pages)} pages of {MAX_PAGE_SIZE}\n")
+    print(f"{'':<14}{'body KB':>10}{'encode ms':>12}{'walk ms':>10}")
+    baseline = None
+    for name, (_, _, encoding) in CONFIGS.items():
+        if encoding is not None and encoding not in offered_encodings():
+            print(f"{name:<14}  skipped, brotli is not installed")
+            continue
+        representation, encoding = configure(name)
+        headers = {"Accept-Encoding": encoding or "identity"}
+        responses = [client.get(path, headers=headers) for path in paths]
+        assert all(r.headers.get("Content-Encoding") == encoding for r in responses)
+        size = sum(len(r.data) for r in responses)
+        encode = min(encode_seconds(pages, representation, encoding) for _ in range(opts.repeat))
+        walk_time = float("inf")
+        for _ in range(opts.repeat):
+            start = time.perf_counter()
+            for path in paths:
+                client.get(path, headers=headers)
+            walk_time = min(walk_time, time.perf_counter() - start)
+        baseline = baseline or (size, encode)
+        print(
+            f"{name:<14}{size / 1024:>10.0f}{encode * 1000:>12.1f}{walk_time * 1000:>10.0f}"
+            f"   {size / baseline[0]:>4.0%} bytes, {encode / baseline[1]:>4.0%} encode time"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Query plans and latency for filtered and sorted listing pages.
+
+Usage (from server/):
+    python benchmarks/listing_filter_bench.py --listings 1000000
+
+Seeds a temporary database, then for each combination of category,
+price range and ?sort= on /api/listings prints the SQLite query plan and
+the latency of the first page and of a page --depth pages in (following
+cursors). Exits non-zero if any combination sorts in a temp B-tree or
+scans item_listings without an index.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from sqlalchemy import event
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'filters.db')}"
+
+from seed import seed  # noqa: E402
+from app import create_app  # noqa: E402
+from config import db  # noqa: E402
+
+app = create_app()
+
+COMBINATIONS = [
+    ("newest", {}),
+    ("oldest", {"sort": "created_at"}),
+    ("category, newest", {"category_id": 3}),
+    ("price range, newest", {"min_price": 100, "max_price": 200}),
+    ("cheapest", {"sort": "price"}),
+    ("most expensive", {"sort": "-price"}),
+    ("price range, cheapest", {"min_price": 100, "max_price": 200, "sort": "price"}),
+    ("category, cheapest", {"category_id": 3, "sort": "price"}),
+    ("category, most expensive", {"category_id": 3, "sort": "-price"}),
+    ("category + price range, cheapest", {"category_id": 3, "min_price": 100, "max_price": 200, "sort": "price"}),
+    ("category + price range, most expensive", {"category_id": 3, "min_price": 100, "max_price": 200, "sort": "-price"}),
+]
+
+
+def plan_problems(plan):
+    problems = []
+    for detail in plan:
+        if "TEMP B-TREE" in detail:
+            problems.append(detail)
+        elif detail.startswith("SCAN item_listings") and "INDEX" not in detail:
+            problems.append(detail)
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--listings", type=int, default=1_000_000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=20, help="page whose latency is reported second")
+    opts = parser.parse_args()
+
+    with app.app_context():
+        engine = db.engine
+    start = time.perf_counter()
+    seed(engine, users=opts.users, categories=opts.categories, listings=opts.listings, favorites=0)
+    print(f"seeded {opts.listings} listings in {time.perf_counter() - start:.1f}s\n")
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and "FROM item_listings" in statement:
+            statements.append((statement, parameters))
+
+    # Read-only resources query the read engine (see routing.py)
+    with app.app_context():
+        for bound in db.engines.values():
+            event.listen(bound, "before_cursor_execute", capture)
+
+    app.config["RESPONSE_CACHE_ENABLED"] = False
+    client = app.test_client()
+    failures = 0
+    print(f"{'combination':<42}{'page 1 ms':>11}{f'page {opts.depth} ms':>12}  plan")
+    for name, params in COMBINATIONS:
+        params = {**params, "limit": opts.limit}
+        query = "&".join(f"{k}={v}" for k, v in params.items())
+
+        statements.clear()
+        start = time.perf_counter()
+        page = client.get(f"/api/listings?{query}").json
+        first_ms = (time.perf_counter() - start) * 1000
+        statement, parameters = statements[0]
+
+        deep_ms = None
+        for _ in range(opts.depth - 1):
+            if not page["next_cursor"]:
+                break
+            start = time.perf_counter()
+            page = client.get(f"/api/listings?{query}&cursor={page['next_cursor']}").json
+            deep_ms = (time.perf_counter() - start) * 1000
+
+        with engine.connect() as conn:
+            # Plan the cursor query too; its seek is what keeps deep pages fast
+            plan = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+            cursor_statement, cursor_parameters = statements[-1]
+            plan += [row[-1] for row in conn.exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + cursor_statement, cursor_parameters
+            )]
+        problems = plan_problems(plan)
+        failures += len(problems)
+        deep = f"{deep_ms:>12.2f}" if deep_ms is not None else f"{'-':>12}"
+        print(f"{name:<42}{first_ms:>11.2f}{deep}  {plan[-1]}")
+        for problem in problems:
+            print(f"{'':<65}FAIL {problem}")
+
+    print(f"\n{failures} plan problems")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Login throughput under concurrent load, inline hashing vs the hashing pool.
+
+Usage (from server/):
+    python benchmarks/login_bench.py --clients 32 --seconds 5
+
+While clients hammer POST /api/login, a probe thread measures the latency
+of GET /api/me/listings to show how much hashing starves other endpoints.
+"""
+import os
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}"
+
+from seed import make_engine, seed, set_passwords  # noqa: E402
+from app import create_app  # noqa: E402
+from passwords import shutdown_pool  # noqa: E402
+
+app = create_app()
+
+PASSWORD = "benchmark-password"
+
+
+def run(clients, seconds, users):
+    stop = time.monotonic() + seconds
+    counts = {200: 0, 503: 0}
+    lock = threading.Lock()
+
+    def login_loop(n):
+        client = app.test_client()
+        i = n
+        while time.monotonic() < stop:
+            status = client.post(
+                "/api/login", json={"username": f"user{i % users + 1}", "password": PASSWORD}
+            ).status_code
+            with lock:
+                counts[status] = counts.get(status, 0) + 1
+            i += clients
+
+    probe_latencies = []
+
+    def probe_loop(token):
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            client.get("/api/me/listings?limit=20", headers=headers)
+            probe_latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.01)
+
+    token = app.test_client().post(
+        "/api/login", json={"username": "user1", "password": PASSWORD}
+    ).json["access_token"]
+    threads = [threading.Thread(target=login_loop, args=(n,)) for n in range(clients)]
+    threads.append(threading.Thread(target=probe_loop, args=(token,)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    probe_latencies.sort()
+    return {
+        "logins/sec": counts[200] / seconds,
+        "503s": counts[503],
+        "probe p50 ms": statistics.median(probe_latencies),
+        "probe p95 ms": probe_latencies[int(len(probe_latencies) * 0.95)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=app.config["PASSWORD_HASH_WORKERS"])
+    opts = parser.parse_args()
+
+    engine = make_engine(os.path.join(_tmp.name, "bench.db"))
+    seed(engine, users=opts.users, listings=1_000, favorites=0)
+    with app.app_context():
+        set_passwords(engine, PASSWORD)
+
+    print(f"{opts.clients} concurrent login clients for {opts.seconds}s\n")
+    for label, workers in [("inline", 0), (f"pool ({opts.workers} workers)", opts.workers)]:
+        app.config["PASSWORD_HASH_WORKERS"] = workers
+        with app.app_context():
+            shutdown_pool()
+        result = run(opts.clients, opts.seconds, opts.users)
+        print(label)
+        for name, value in result.items():
+            print(f"  {name:<14}{value:>10.1f}")
+    with app.app_context():
+        shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
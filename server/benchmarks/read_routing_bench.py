@@ -0,0 +1,121 @@
+"""
+Read throughput and latency under a sustained write load, with and without read routing.
+
+Usage (from server/):
+    python benchmarks/read_routing_bench.py --readers 64 --writers 8 --seconds 20
+
+Seeds a temporary WAL database, then for each setting of
+READ_ROUTING_ENABLED starts the threaded Werkzeug server (as
+asgi_bench.py does, response cache off) and runs --writers connections
+updating and creating listings back to back while --readers connections
+read the listing feed, popular listings, single listings and the user's
+own listings. Reports read and write requests/sec and read p50/p95/p99.
+"""
+import os
+import json
+import asyncio
+import argparse
+import tempfile
+
+from asgi_bench import drive, raise_fd_limit, start_server, summarize
+
+SETTINGS = {"primary only": "0", "read routing": "1"}
+
+
+def write_requests(token, listing_ids):
+    """Raw PUT /api/listings/<id> and POST /api/listings requests."""
+    requests = []
+    for n, listing_id in enumerate(listing_ids):
+        body = {"title": f"Edited {n}", "description": "Updated under load", "price": n, "category_id": 1}
+        for method, path, payload in [
+            ("PUT", f"/api/listings/{listing_id}", {**body, "user_id": 1}),
+            ("POST", "/api/listings", body),
+        ]:
+            data = json.dumps(payload).encode()
+            requests.append(
+                f"{method} {path} HTTP/1.1\r\nHost: bench\r\nAuthorization: Bearer {token}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data
+            )
+    return requests
+
+
+def read_requests(token, listing_ids):
+    auth = f"Authorization: Bearer {token}\r\n"
+    paths = [
+        ("/api/listings?limit=20", ""),
+        ("/api/listings/popular?limit=20", ""),
+        ("/api/me/listings?limit=20", auth),
+    ]
+    paths += [(f"/api/listings/{id}", "") for id in listing_ids]
+    return [f"GET {path} HTTP/1.1\r\nHost: bench\r\n{headers}\r\n".encode() for path, headers in paths]
+
+
+async def drive_both(port, reads, writes, opts):
+    return await asyncio.gather(
+        drive(port, reads, opts.readers, opts.seconds, opts.warmup),
+        drive(port, writes, opts.writers, opts.seconds, opts.warmup),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=64)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--listings", type=int, default=10_000)
+    opts = parser.parse_args()
+    raise_fd_limit()
+
+    tmp = tempfile.TemporaryDirectory()
+    path = os.path.join(tmp.name, "bench.db")
+    database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = database_url
+
+    from sqlalchemy import text
+    from seed import make_engine, seed
+    from app import create_app
+    from flask_jwt_extended import create_access_token
+
+    app = create_app()
+    engine = make_engine(path)
+    seed(engine, listings=opts.listings, favorites=opts.listings * 2)
+    with engine.connect() as conn:
+        own = conn.execute(text("SELECT id FROM item_listings WHERE user_id = 1 LIMIT 50")).scalars().all()
+    with app.app_context():
+        token = create_access_token(identity="1")
+    reads = read_requests(token, range(1, 51))
+    writes = write_requests(token, own)
+
+    print(f"{opts.readers} readers and {opts.writers} writers for {opts.seconds}s after {opts.warmup}s warm-up\n")
+    results = {}
+    for name, enabled in SETTINGS.items():
+        os.environ["READ_ROUTING_ENABLED"] = enabled
+        process, port = start_server("wsgi", database_url, cache=False)
+        try:
+            read_stats, write_stats = asyncio.run(drive_both(port, reads, writes, opts))
+        finally:
+            process.terminate()
+            process.wait()
+        read, write = summarize(read_stats, opts.seconds), summarize(write_stats, opts.seconds)
+        results[name] = {
+            "reads/sec": read["requests/sec"],
+            "read p50 ms": read["p50 ms"],
+            "read p95 ms": read["p95 ms"],
+            "read p99 ms": read["p99 ms"],
+            "writes/sec": write["requests/sec"],
+            "write p99 ms": write["p99 ms"],
+            "errors": read["errors"] + write["errors"],
+        }
+        for kind, stats in (("read", read_stats), ("write", write_stats)):
+            if stats["errors"]:
+                print(f"{name} {kind} errors: {stats['errors']}")
+
+    names = list(next(iter(results.values())))
+    print(f"{'':<14}" + "".join(f"{name:>14}" for name in results))
+    for metric in names:
+        print(f"{metric:<14}" + "".join(f"{results[name][metric]:>14.1f}" for name in results))
+
+
+if __name__ == "__main__":
+    main()
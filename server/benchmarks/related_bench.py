@@ -0,0 +1,193 @@
+"""
+Related listings: full rebuild time and memory, refresh and lookup latency.
+
+Usage (from server/):
+    python benchmarks/related_bench.py --favorites 1000000 --users 100000 --listings 50000
+
+Seeds a temporary database with --favorites random favorites, then runs
+`flask related rebuild` with each build method in a fresh interpreter and
+reports its wall time, the rows stored and the peak memory it added to the
+process (peak RSS minus the RSS before the build, NumPy and SciPy already
+imported):
+
+    numpy    sparse X.T @ X with SciPy, RELATED_BUILD_BLOCK listings at a time
+    sql      grouped self-join over favorites ranked with row_number()
+
+On the built index it then times, for --lookups random listings, the
+"also favorited" query computed at request time by a self-join over
+favorites against the indexed read of listing_neighbors that
+GET /api/listings/<id>/related issues, and the incremental refresh one
+favorite add runs (rolled back each time).
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The top K of one listing, computed per request as before the index
+SELF_JOIN = """
+SELECT other.item_listing_id, count(*) AS score
+FROM favorites AS mine JOIN favorites AS other
+  ON other.user_id = mine.user_id AND other.item_listing_id != mine.item_listing_id
+WHERE mine.item_listing_id = :id
+GROUP BY other.item_listing_id
+ORDER BY score DESC, other.item_listing_id DESC
+LIMIT :k
+"""
+INDEX_READ = """
+SELECT related_id, score FROM listing_neighbors
+WHERE listing_id = :id
+ORDER BY score DESC, related_id DESC
+LIMIT :k
+"""
+
+
+def rss_kb():
+    """This process's resident set size in KB (Linux)."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def worker(options):
+    """Runs in the child: time one rebuild and print the result as JSON."""
+    import resource
+    from sqlalchemy import text
+    from app import create_app
+    from config import db
+    from related import rebuild_related
+
+    app = create_app({
+        "MIGRATIONS_ENABLED": False,
+        "RELATED_TOP_K": options["top_k"],
+        "RELATED_BUILD_BLOCK": options["block"],
+    })
+    with app.app_context():
+        # Connect and load NumPy/SciPy first so only the build's data counts
+        db.session.execute(text("SELECT 1"))
+        if options["method"] == "numpy":
+            import numpy  # noqa: F401
+            import scipy.sparse  # noqa: F401
+        before = rss_kb()
+        start = time.perf_counter()
+        rows, method = rebuild_related(options["method"])
+        elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "method": method,
+        "seconds": elapsed,
+        "rows": rows,
+        "peak extra MB": (peak - before) / 1024,
+    }))
+
+
+def spawn(database_url, options):
+    env = {**os.environ, "DATABASE_URL": database_url, "PYTHONPATH": SERVER_DIR}
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", json.dumps(options)],
+        cwd=SERVER_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return (
+        statistics.median(samples) * 1000,
+        samples[int(len(samples) * 0.95)] * 1000,
+    )
+
+
+def time_queries(engine, statement, ids, top_k):
+    from sqlalchemy import text
+
+    samples = []
+    with engine.connect() as conn:
+        for id in ids:
+            start = time.perf_counter()
+            conn.execute(text(statement), {"id": id, "k": top_k}).all()
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def time_refresh(app, pairs):
+    """Time refresh_related for one new favorite per (user, listing) pair, rolling each back."""
+    from sqlalchemy.exc import IntegrityError
+    from config import db
+    from models import Favorite
+    from related import refresh_related
+
+    samples = []
+    with app.app_context():
+        for user_id, listing_id in pairs:
+            db.session.add(Favorite(user_id=user_id, item_listing_id=listing_id))
+            try:
+                db.session.flush()
+            except IntegrityError:  # Already favorited
+                db.session.rollback()
+                continue
+            start = time.perf_counter()
+            refresh_related(user_id, [listing_id])
+            samples.append(time.perf_counter() - start)
+            db.session.rollback()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--favorites", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--listings", type=int, default=50_000)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--block", type=int, default=4096)
+    parser.add_argument("--methods", default="numpy,sql", help="comma-separated build methods")
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    opts = parser.parse_args()
+    if opts.worker is not None:
+        return worker(json.loads(opts.worker))
+
+    tmp = tempfile.TemporaryDirectory()
+    path = os.path.join(tmp.name, "bench.db")
+    database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = database_url
+
+    from seed import make_engine, seed
+    from app import create_app
+
+    engine = make_engine(path)
+    start = time.perf_counter()
+    seed(engine, users=opts.users, categories=20, listings=opts.listings, favorites=opts.favorites)
+    print(f"seeded {opts.favorites} favorites ({opts.users} users, {opts.listings} listings) "
+          f"in {time.perf_counter() - start:.0f}s, top {opts.top_k}\n")
+
+    print(f"{'build':<8}{'seconds':>10}{'rows':>12}{'peak extra MB':>16}")
+    for method in opts.methods.split(","):
+        result = spawn(database_url, {"method": method, "top_k": opts.top_k, "block": opts.block})
+        print(f"{result['method']:<8}{result['seconds']:>10.1f}{result['rows']:>12}{result['peak extra MB']:>16.1f}")
+
+    rng = random.Random(7)
+    ids = [rng.randint(1, opts.listings) for _ in range(opts.lookups)]
+    app = create_app({"MIGRATIONS_ENABLED": False, "RELATED_TOP_K": opts.top_k})
+    results = {
+        "self-join": time_queries(engine, SELF_JOIN, ids, opts.top_k),
+        "index read": time_queries(engine, INDEX_READ, ids, opts.top_k),
+        "refresh": time_refresh(app, [(rng.randint(1, opts.users), id) for id in ids[:200]]),
+    }
+    print(f"\n{'per listing':<12}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, samples in results.items():
+        p50, p95 = percentiles(samples)
+        print(f"{name:<12}{p50:>10.3f}{p95:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
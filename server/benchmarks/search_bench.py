@@ -0,0 +1,82 @@
+"""
+Compare FTS5 search against a LIKE '%q%' scan.
+
+Usage (from server/):
+    python benchmarks/search_bench.py --rows 1000000
+
+Both sides return one page of PAGE_SIZE rows. FTS5 ranks every match with
+bm25, while the LIKE baseline is unranked and can stop at the first page of
+hits, so for a very common word like "bike" LIKE wins; for selective terms
+it has to scan the whole table.
+"""
+import os
+import time
+import argparse
+import tempfile
+from sqlalchemy import text
+
+from seed import make_engine, seed, brand
+from search import FTS_DDL, FTS_TABLE, TITLE_WEIGHT, DESCRIPTION_WEIGHT, build_match_query
+
+# Selective brand terms, a brand prefix, a mixed query and a very common word
+QUERIES = [brand(7), brand(1234)[:4], f"{brand(42)} lamp", "bike"]
+PAGE_SIZE = 20
+
+FTS_SQL = text(
+    f"SELECT l.id FROM {FTS_TABLE} JOIN item_listings l ON l.id = {FTS_TABLE}.rowid "
+    f"WHERE {FTS_TABLE} MATCH :match "
+    f"ORDER BY bm25({FTS_TABLE}, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}) LIMIT {PAGE_SIZE}"
+)
+
+
+def like_sql(words):
+    clauses = " AND ".join(
+        f"(title LIKE :w{i} OR description LIKE :w{i})" for i in range(len(words))
+    )
+    return text(f"SELECT id FROM item_listings WHERE {clauses} LIMIT {PAGE_SIZE}")
+
+
+def timed(conn, statement, params, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(statement, params).fetchall()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    opts = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "bench.db"))
+        start = time.perf_counter()
+        seed(engine, listings=opts.rows, favorites=0)
+        print(f"seeded {opts.rows} listings in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            for statement in FTS_DDL:
+                conn.execute(text(statement))
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        print(f"built search index in {time.perf_counter() - start:.1f}s\n")
+
+        print(f"{'query':<24}{'matches':>10}{'fts5 ms':>10}{'like ms':>10}{'speedup':>10}")
+        with engine.connect() as conn:
+            for q in QUERIES:
+                words = q.split()
+                fts_ms = timed(conn, FTS_SQL, {"match": build_match_query(q)}, opts.repeat)
+                like_ms = timed(
+                    conn, like_sql(words),
+                    {f"w{i}": f"%{w}%" for i, w in enumerate(words)}, opts.repeat,
+                )
+                matches = conn.execute(
+                    text(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"),
+                    {"match": build_match_query(q)},
+                ).scalar()
+                print(f"{q:<24}{matches:>10}{fts_ms:>10.2f}{like_ms:>10.2f}{like_ms / fts_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
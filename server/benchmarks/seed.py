@@ -0,0 +1,143 @@
+import os
+import sys
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, text
+from werkzeug.security import generate_password_hash
+
+# Allow "python benchmarks/<name>.py" from the server/ directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import current_app  # noqa: E402
+from config import db  # noqa: E402
+from models import User, Category, ItemListing, Favorite  # noqa: E402
+from storage import apply_sqlite_pragmas  # noqa: E402
+from search import FTS_DDL, FTS_TABLE  # noqa: E402
+from counters import REBUILD_STATEMENTS, REBUILD_USER_CATEGORY_STATS  # noqa: E402
+
+# --- Deterministic synthetic dataset for benchmarks ---
+
+WORDS = (
+    "red blue green black white vintage modern wooden metal leather small large "
+    "bike bicycle chair table lamp sofa desk phone laptop camera guitar piano "
+    "jacket shoes watch ring book record poster plant mirror rug shelf stroller "
+    "kayak tent drill saw mower grill oven fridge kettle mug vase clock speaker"
+).split()
+
+SYLLABLES = "ka lo mi nu pe ra si to vu ze ba co di fo gu ha je ki lu mo".split()
+
+# Pseudo brand names give the corpus rare, selective terms alongside WORDS
+BRAND_COUNT = len(SYLLABLES) ** 3
+
+BASE_TIME = datetime(2025, 1, 1)
+
+
+def brand(i):
+    """Return the i-th deterministic pseudo brand name, e.g. 'kalomi'."""
+    n = len(SYLLABLES)
+    return SYLLABLES[i // (n * n) % n] + SYLLABLES[i // n % n] + SYLLABLES[i % n]
+
+
+def make_engine(path, pragmas=None, **options):
+    """
+    Create an engine for a benchmark database file with foreign keys
+    enabled and the given storage PRAGMAs (see storage.STORAGE_PROFILES).
+    """
+    engine = create_engine(f"sqlite:///{path}", **options)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, pragmas or {})
+
+    return engine
+
+
+def _text(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def seed(engine, users=100, categories=20, listings=10_000, favorites=20_000,
+         random_seed=42, batch_size=10_000):
+    """
+    Create the schema and bulk insert a deterministic dataset.
+
+    Rows are inserted with executemany in batches, one transaction per batch.
+    The same arguments always produce the same rows.
+    """
+    rng = random.Random(random_seed)
+    db.metadata.create_all(engine)
+
+    # The hash is never checked by benchmarks, so skip PBKDF2 for seeding
+    user_rows = [
+        {"id": i, "username": f"user{i}", "email": f"user{i}@example.com",
+         "password_hash": "x", "created_at": BASE_TIME}
+        for i in range(1, users + 1)
+    ]
+    category_rows = [{"id": i, "name": f"category{i}"} for i in range(1, categories + 1)]
+
+    def listing_rows():
+        for i in range(1, listings + 1):
+            yield {
+                "id": i,
+                "title": f"{brand(rng.randrange(BRAND_COUNT))} {_text(rng, 2)}",
+                "description": _text(rng, 20),
+                "price": round(rng.uniform(1, 1000), 2),
+                "image_url": None,
+                "created_at": BASE_TIME + timedelta(seconds=i),
+                "user_id": rng.randint(1, users),
+                "category_id": rng.randint(1, categories),
+            }
+
+    def favorite_rows():
+        seen = set()
+        target = min(favorites, users * listings)
+        while len(seen) < target:
+            pair = (rng.randint(1, users), rng.randint(1, listings))
+            if pair in seen:
+                continue
+            seen.add(pair)
+            yield {
+                "id": len(seen),
+                "user_id": pair[0],
+                "item_listing_id": pair[1],
+                "note": None,
+                "created_at": BASE_TIME,
+            }
+
+    _insert(engine, User.__table__, user_rows, batch_size)
+    _insert(engine, Category.__table__, category_rows, batch_size)
+    _insert(engine, ItemListing.__table__, listing_rows(), batch_size)
+    _insert(engine, Favorite.__table__, favorite_rows(), batch_size)
+    with engine.begin() as conn:
+        for statement in REBUILD_STATEMENTS + REBUILD_USER_CATEGORY_STATS:
+            conn.execute(statement)
+
+
+def _insert(engine, table, rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            with engine.begin() as conn:
+                conn.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        with engine.begin() as conn:
+            conn.execute(table.insert(), batch)
+
+
+def build_search_index(engine):
+    """Create the listing FTS table and triggers and index the seeded rows."""
+    with engine.begin() as conn:
+        for statement in FTS_DDL:
+            conn.execute(text(statement))
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def set_passwords(engine, password):
+    """Give every seeded user the same real password hash (hashed once), in an app context."""
+    password_hash = generate_password_hash(
+        password, current_app.config["PASSWORD_HASH_METHOD"], current_app.config["PASSWORD_SALT_LENGTH"]
+    )
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE users SET password_hash = :hash"), {"hash": password_hash})
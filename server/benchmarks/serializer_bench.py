@@ -0,0 +1,62 @@
+"""
+Rows/sec of marshmallow vs the compiled serializer for listing dumps.
+
+Usage (from server/):
+    python benchmarks/serializer_bench.py --rows 10000
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+from sqlalchemy.orm import Session, joinedload
+
+from seed import make_engine, seed
+from app import create_app
+from models import ItemListing
+from fastdump import fast_dump
+import schemas
+
+app = create_app()
+
+
+def rows_per_sec(func, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return rows / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    opts = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "bench.db"))
+        seed(engine, listings=opts.rows, favorites=0)
+        with Session(engine) as session:
+            listings = (
+                session.query(ItemListing)
+                .options(joinedload(ItemListing.category), joinedload(ItemListing.owner))
+                .all()
+            )
+
+            with app.app_context():
+                expected = json.dumps(schemas.listings_schema.dump(listings), sort_keys=True)
+                actual = json.dumps(fast_dump(schemas.listings_schema, listings), sort_keys=True)
+                assert actual == expected, "compiled output differs from marshmallow"
+
+                slow = rows_per_sec(lambda: schemas.listings_schema.dump(listings), len(listings), opts.repeat)
+                fast = rows_per_sec(lambda: fast_dump(schemas.listings_schema, listings), len(listings), opts.repeat)
+
+    print(f"{len(listings)} listings with nested category and owner")
+    print(f"marshmallow: {slow:>12,.0f} rows/sec")
+    print(f"compiled:    {fast:>12,.0f} rows/sec ({fast / slow:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Throughput and tail latency of gunicorn (gunicorn.conf.py) by worker count.
+
+Usage (from server/, with requirements-server.txt installed):
+    python benchmarks/server_bench.py --workers 1,2,4,8 --threads 4 --connections 256
+
+Seeds a temporary database like asgi_bench.py, then serves it with the
+threaded Werkzeug server (one process, as `python app.py` runs) and with
+gunicorn at each --workers count, preloaded, --threads threads per
+worker. Each run holds --connections keep-alive connections cycling
+through the same public and authenticated reads as asgi_bench.py, with
+the response cache off so every request reaches the database. Reports
+requests/sec, p50/p95/p99 latency and errors per server, and the CPU
+count, since workers beyond it cannot add throughput.
+"""
+import os
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+from asgi_bench import (
+    PASSWORD,
+    build_requests,
+    drive,
+    free_port,
+    raise_fd_limit,
+    start_server,
+    summarize,
+)
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_URI = 'app:create_app({"MIGRATIONS_ENABLED": False, "RESPONSE_CACHE_ENABLED": False})'
+
+
+def start_gunicorn(database_url, workers, threads):
+    port = free_port()
+    args = [
+        "gunicorn", "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--threads", str(threads),
+        "--backlog", "4096", "--log-level", "warning", APP_URI,
+    ]
+    env = {**os.environ, "DATABASE_URL": database_url}
+    process = subprocess.Popen(args, cwd=SERVER_DIR, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, port
+        except OSError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("gunicorn did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated worker counts")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--connections", type=int, default=256)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--listings", type=int, default=10_000)
+    opts = parser.parse_args()
+    raise_fd_limit()
+
+    tmp = tempfile.TemporaryDirectory()
+    path = os.path.join(tmp.name, "bench.db")
+    database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = database_url
+
+    from seed import make_engine, seed, set_passwords
+    from app import create_app
+    from flask_jwt_extended import create_access_token
+
+    app = create_app({"MIGRATIONS_ENABLED": False})
+    engine = make_engine(path)
+    seed(engine, listings=opts.listings, favorites=opts.listings * 2)
+    with app.app_context():
+        set_passwords(engine, PASSWORD)
+        token = create_access_token(identity="1")
+    requests = build_requests(token, listing_ids=range(1, 51), category_ids=range(1, 6))
+
+    servers = {"werkzeug": lambda: start_server("wsgi", database_url, cache=False)}
+    for count in map(int, opts.workers.split(",")):
+        servers[f"gunicorn -w {count}"] = lambda count=count: start_gunicorn(database_url, count, opts.threads)
+
+    print(f"{opts.connections} connections for {opts.seconds}s after {opts.warmup}s warm-up, "
+          f"{opts.threads} threads per gunicorn worker, {os.cpu_count()} CPUs\n")
+    results = {}
+    for name, start in servers.items():
+        process, port = start()
+        try:
+            stats = asyncio.run(drive(port, requests, opts.connections, opts.seconds, opts.warmup))
+        finally:
+            process.terminate()
+            process.wait()
+        results[name] = summarize(stats, opts.seconds)
+        if stats["errors"]:
+            print(f"{name} errors: {stats['errors']}")
+
+    metrics = ("requests/sec", "p50 ms", "p95 ms", "p99 ms", "errors")
+    print(f"{'':<14}" + "".join(f"{metric:>14}" for metric in metrics))
+    for name, result in results.items():
+        print(f"{name:<14}" + "".join(f"{result[metric]:>14.1f}" for metric in metrics))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Worker startup cost: import-to-first-request time and resident memory.
+
+Usage (from server/):
+    python benchmarks/startup_bench.py --runs 10
+
+Seeds a small temporary database, then for each configuration spawns
+--runs fresh interpreters that each import app.py, build the app with
+create_app(), and serve GET /api/listings and GET /api/listings/<id>
+through the test client, as a newly forked worker would. Reports the
+median time from the first import to the end of the first response
+(split into import, create_app and first request) and the RSS after it.
+
+    default    create_app() with the default settings (migrations loaded)
+    serving    create_app({"MIGRATIONS_ENABLED": False}), for workers
+
+--server-dir measures another checkout instead, e.g. a git worktree of an
+earlier commit; an app.py without create_app() is measured through its
+module-level app.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGS = {
+    "default": {},
+    "serving": {"MIGRATIONS_ENABLED": False},
+}
+
+
+def rss_kb():
+    """This process's resident set size in KB (Linux), else its peak."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def worker(config):
+    """Runs in the child: time a cold start and print the result as JSON."""
+    import time
+
+    start = time.perf_counter()
+    import app as app_module
+
+    imported = time.perf_counter()
+    if hasattr(app_module, "create_app"):
+        app = app_module.create_app(config)
+    else:
+        app = app_module.app
+        app.config.update(config)
+    created = time.perf_counter()
+    client = app.test_client()
+    statuses = [client.get(path).status_code for path in ("/api/listings", "/api/listings/1")]
+    done = time.perf_counter()
+    print(json.dumps({
+        "import ms": (imported - start) * 1000,
+        "create_app ms": (created - imported) * 1000,
+        "first request ms": (done - created) * 1000,
+        "total ms": (done - start) * 1000,
+        "rss MB": rss_kb() / 1024,
+        "migrate loaded": "flask_migrate" in sys.modules,
+        "statuses": statuses,
+    }))
+
+
+def spawn(server_dir, database_url, config):
+    env = {**os.environ, "DATABASE_URL": database_url, "PYTHONPATH": server_dir}
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", json.dumps(config)],
+        cwd=server_dir, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--server-dir", default=SERVER_DIR)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    opts = parser.parse_args()
+    if opts.worker is not None:
+        return worker(json.loads(opts.worker))
+
+    sys.path.insert(0, SERVER_DIR)
+    from seed import make_engine, seed
+
+    tmp = tempfile.TemporaryDirectory()
+    path = os.path.join(tmp.name, "bench.db")
+    seed(make_engine(path), users=20, categories=5, listings=1_000, favorites=1_000)
+
+    metrics = ("import ms", "create_app ms", "first request ms", "total ms", "rss MB")
+    print(f"median of {opts.runs} cold starts, {opts.server_dir}\n")
+    print(f"{'':<10}" + "".join(f"{name:>18}" for name in metrics) + f"{'migrate loaded':>16}")
+    for name, config in CONFIGS.items():
+        runs = [spawn(opts.server_dir, f"sqlite:///{path}", config) for _ in range(opts.runs)]
+        assert all(run["statuses"] == [200, 200] for run in runs), runs[0]["statuses"]
+        row = "".join(f"{statistics.median(run[metric] for run in runs):>18.1f}" for metric in metrics)
+        print(f"{name:<10}{row}{str(runs[0]['migrate loaded']):>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Mixed read/write throughput for the legacy and production SQLite profiles.
+
+Usage (from server/):
+    python benchmarks/storage_bench.py --readers 8 --writers 4 --seconds 5
+
+Readers page through listings; writers mimic ListingResource.put (read a
+listing, then update it) and FavoriteListResource.post in one transaction
+each. "database is locked" errors are counted instead of retried.
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import threading
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from seed import make_engine, seed
+from storage import STORAGE_PROFILES
+
+READ_SQL = text(
+    "SELECT id, title, price FROM item_listings WHERE category_id = :category "
+    "ORDER BY created_at DESC, id DESC LIMIT 50"
+)
+WRITE_SQL = [
+    text("SELECT id, title FROM item_listings WHERE id = :listing"),
+    text("UPDATE item_listings SET price = :price WHERE id = :listing"),
+    text("INSERT INTO favorites (user_id, item_listing_id, note) VALUES (:user, :listing, NULL)"),
+]
+
+
+def run(engine, readers, writers, seconds, listings):
+    stop = time.monotonic() + seconds
+    stats = {"reads": 0, "writes": 0, "lock errors": 0}
+    lock = threading.Lock()
+
+    def count(key):
+        with lock:
+            stats[key] += 1
+
+    def reader(n):
+        rng = random.Random(n)
+        while time.monotonic() < stop:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(READ_SQL, {"category": rng.randint(1, 20)}).fetchall()
+                count("reads")
+            except OperationalError:
+                count("lock errors")
+
+    def writer(n):
+        rng = random.Random(1000 + n)
+        while time.monotonic() < stop:
+            params = {"listing": rng.randint(1, listings), "price": rng.uniform(1, 100),
+                      "user": rng.randint(1, 100)}
+            try:
+                with engine.begin() as conn:
+                    for statement in WRITE_SQL:
+                        conn.execute(statement, params)
+                count("writes")
+            except OperationalError:
+                count("lock errors")
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--listings", type=int, default=50_000)
+    opts = parser.parse_args()
+
+    print(f"{opts.readers} readers, {opts.writers} writers, {opts.seconds}s\n")
+    print(f"{'profile':<12}{'reads/s':>10}{'writes/s':>10}{'lock errors':>13}")
+    for profile, pragmas in STORAGE_PROFILES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            seed(make_engine(path), listings=opts.listings, favorites=0)
+            engine = make_engine(path, pragmas, pool_size=opts.readers + opts.writers)
+            stats = run(engine, opts.readers, opts.writers, opts.seconds, opts.listings)
+            engine.dispose()
+        print(f"{profile:<12}{stats['reads'] / opts.seconds:>10.0f}"
+              f"{stats['writes'] / opts.seconds:>10.0f}{stats['lock errors']:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import io
+import json
+import codecs
+from flask import current_app
+from marshmallow import ValidationError
+from sqlalchemy import insert
+from config import db
+from models import Category, ItemListing
+from counters import adjust_listing_counts, refresh_user_category_stats
+
+# --- Bulk listing import ---
+#
+# Rows are read from the request body one at a time (NDJSON, or a JSON
+# array parsed incrementally), validated with ItemListingSchema, and
+# inserted with one executemany INSERT and one commit per batch. Invalid
+# rows are reported back by position and never abort the import.
+
+CHUNK_SIZE = 64 * 1024
+
+
+class MalformedBody(Exception):
+    """Raised when the body cannot be parsed any further."""
+
+
+def iter_ndjson(stream):
+    """Yield one decoded value (or a ValueError) per non-blank NDJSON line."""
+    # Request streams are unbuffered; readline on them reads a byte at a time
+    for line in io.BufferedReader(stream, CHUNK_SIZE):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield e
+
+
+def iter_json_array(stream):
+    """
+    Yield the elements of a top-level JSON array without loading the whole
+    body, decoding elements as soon as enough bytes have arrived.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = stream.read(CHUNK_SIZE)
+        eof = not chunk
+        try:
+            buffer = buffer[pos:] + text.decode(chunk, final=eof)
+        except UnicodeDecodeError:
+            raise MalformedBody("Body is not valid UTF-8")
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if pos >= len(buffer) or buffer[pos] != "[":
+        raise MalformedBody("Expected a JSON array")
+    pos += 1
+    skip_whitespace()
+    if buffer[pos:pos + 1] == "]":
+        return
+    while True:
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise MalformedBody("Invalid JSON in array element")
+                fill()
+                continue
+            # A number cut off at the end of the buffer decodes "successfully"
+            if end == len(buffer) and not eof:
+                fill()
+                continue
+            break
+        pos = end
+        yield value
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise MalformedBody("Unterminated JSON array")
+        if buffer[pos] == "]":
+            return
+        if buffer[pos] != ",":
+            raise MalformedBody("Expected ',' between array elements")
+        pos += 1
+        skip_whitespace()
+
+
+def import_listings(rows, uid, schema, batch_size):
+    """
+    Validate and insert listings for user uid in batches.
+
+    Args:
+        rows: Iterable of decoded JSON values (ValueErrors mark unparseable rows).
+        uid: Owner of every imported listing; any user_id in a row is ignored.
+        schema: ItemListingSchema instance with load_instance=False.
+        batch_size: Rows per INSERT and commit.
+
+    Returns:
+        dict: {"inserted": int, "failed": int, "errors": [{"row": int, "errors": ...}]},
+        plus "msg" if the body became unparseable part way through.
+    """
+    max_errors = current_app.config["BULK_IMPORT_MAX_ERRORS"]
+    inserted = 0
+    failed = 0
+    errors = []
+
+    def reject(index, messages):
+        nonlocal failed
+        failed += 1
+        if len(errors) < max_errors:
+            errors.append({"row": index, "errors": messages})
+
+    def flush(batch):
+        nonlocal inserted
+        # Check category ids per batch so one bad id cannot fail the whole INSERT
+        category_ids = {values["category_id"] for _, values in batch}
+        known = {
+            id for (id,) in db.session.query(Category.id).filter(Category.id.in_(category_ids))
+        }
+        valid = []
+        for index, values in batch:
+            if values["category_id"] in known:
+                valid.append(values)
+            else:
+                reject(index, {"category_id": ["Category does not exist."]})
+        if valid:
+            db.session.execute(insert(ItemListing), valid)
+            adjust_listing_counts(values["category_id"] for values in valid)
+            refresh_user_category_stats(uid, {values["category_id"] for values in valid})
+            db.session.commit()
+            inserted += len(valid)
+
+    batch = []
+    try:
+        for index, row in enumerate(rows):
+            if isinstance(row, ValueError):
+                reject(index, {"_schema": ["Invalid JSON."]})
+                continue
+            if not isinstance(row, dict):
+                reject(index, {"_schema": ["Invalid input type."]})
+                continue
+            row["user_id"] = uid
+            try:
+                values = schema.load(row)
+            except ValidationError as e:
+                reject(index, e.messages)
+                continue
+            batch.append((index, values))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+    except MalformedBody as e:
+        if batch:
+            flush(batch)
+        errors.sort(key=lambda error: error["row"])
+        return {"inserted": inserted, "failed": failed, "errors": errors, "msg": str(e)}
+    if batch:
+        flush(batch)
+    # Category checks happen at flush time, so restore row order
+    errors.sort(key=lambda error: error["row"])
+    return {"inserted": inserted, "failed": failed, "errors": errors}
@@ -0,0 +1,248 @@
+import os
+import mmap
+import time
+import zlib
+import struct
+import hashlib
+import threading
+from functools import wraps
+from collections import OrderedDict
+from flask import current_app, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from metrics import registry
+
+# --- In-process HTTP response cache ---
+#
+# GET resources decorated with @cached_response are cached per route + query
+# string in a size-bounded LRU with a TTL, and answered with a strong ETag so
+# clients can revalidate with If-None-Match and get a 304.
+#
+# Each cached route names the tables its output depends on. Session events
+# record which tables a transaction wrote and, once it commits, drop every
+# entry depending on them, so a write is never followed by a stale read.
+#
+# Invalidating also changes a generation value per table. An entry keeps
+# its tables' generations from before its body was built, and is a miss
+# once any of them changed: a body read before a concurrent commit is never
+# served after that commit's invalidation. With several worker processes,
+# point RESPONSE_CACHE_DIR at a directory they share: the generations then
+# live in a file every worker maps, so a commit in one worker also
+# invalidates the entries of the others.
+#
+# Each app instance has its own cache, created by init_response_cache().
+# Hits, misses, evictions and invalidations are counted in the metrics
+# registry and served at /metrics with the other metrics.
+
+_GENERATION = struct.Struct("<Q")
+
+
+class TableGenerations:
+    """
+    A value per table name that changes whenever the table is invalidated,
+    held in memory or, given a path, in a file shared by every process that
+    maps it. Names hash to one of SLOTS values; a collision only costs a miss.
+    """
+
+    SLOTS = 1024
+
+    def __init__(self, path=None):
+        size = self.SLOTS * _GENERATION.size
+        if path is None:
+            self._values = bytearray(size)
+            return
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._values = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def _offset(self, table):
+        # crc32, unlike hash(), is the same in every process
+        return zlib.crc32(table.encode()) % self.SLOTS * _GENERATION.size
+
+    def get(self, tables):
+        return tuple(_GENERATION.unpack_from(self._values, self._offset(table))[0] for table in tables)
+
+    def bump(self, tables):
+        # A new random value rather than an increment, so writers in
+        # different processes need no lock: it differs from any snapshot
+        for table in tables:
+            _GENERATION.pack_into(self._values, self._offset(table), int.from_bytes(os.urandom(8), "little"))
+
+
+class ResponseCache:
+    """Thread-safe LRU + TTL cache of (data, etag, tables) entries."""
+
+    def __init__(self, max_entries=1024, ttl=60, generations=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generations = generations or TableGenerations()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached (data, etag) for key, or None if missing, expired or invalidated."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                entry[4] < time.monotonic() or self._generations.get(entry[2]) != entry[3]
+            ):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        registry.inc("response_cache_requests_total", (("result", "miss" if entry is None else "hit"),))
+        return None if entry is None else entry[:2]
+
+    def generation(self, tables):
+        """A snapshot of the tables' generations, to pass to set()."""
+        return self._generations.get(tuple(tables))
+
+    def set(self, key, data, etag, tables, generation=None):
+        """
+        Store an entry, evicting the least recently used one when full.
+        With a generation() snapshot taken before data was built, the entry
+        is dropped instead if any of its tables was invalidated since.
+        """
+        tables = tuple(tables)
+        current = self._generations.get(tables)
+        if generation is not None and generation != current:
+            return
+        with self._lock:
+            self._entries[key] = (data, etag, tables, current, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            registry.inc("response_cache_evictions_total", value=evicted)
+
+    def invalidate(self, tables):
+        """Drop every entry that depends on any of the given table names."""
+        tables = set(tables)
+        with self._lock:
+            self._generations.bump(tables)
+            stale = [key for key, entry in self._entries.items() if not tables.isdisjoint(entry[2])]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            registry.inc("response_cache_invalidations_total", value=len(stale))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def init_response_cache(app):
+    """Give the app its ResponseCache, as app.extensions["response_cache"]."""
+    directory = app.config["RESPONSE_CACHE_DIR"]
+    generations = None
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        generations = TableGenerations(os.path.join(directory, "generations"))
+    app.extensions["response_cache"] = ResponseCache(
+        max_entries=app.config["RESPONSE_CACHE_MAX_ENTRIES"],
+        ttl=app.config["RESPONSE_CACHE_TTL"],
+        generations=generations,
+    )
+
+
+def make_etag(data):
+    """Compute a strong ETag from the canonical JSON form of a response body."""
+    body = current_app.json.dumps_bytes(data, sort_keys=True)
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def cache_key(path, args):
+    """The cache key of a GET of path with the query args MultiDict."""
+    return (path, tuple(sorted(args.items(multi=True))))
+
+
+def etag_matches(etag, header):
+    """Whether an If-None-Match header value matches etag."""
+    # Weak comparison: compressed responses carry the weak form (see compression.py)
+    tags = [tag.strip() for tag in header.split(",")]
+    return header.strip() == "*" or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+def cached_response(*tables):
+    """
+    Cache a Resource GET handler's 200 responses, keyed by path + query args.
+
+    Args:
+        *tables: Names of the tables the response is built from; a commit
+            writing to any of them invalidates the cached entry.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = cache_key(request.path, request.args)
+            enabled = current_app.config["RESPONSE_CACHE_ENABLED"]
+            response_cache = current_app.extensions["response_cache"]
+            cached = response_cache.get(key) if enabled else None
+            if cached is None:
+                # Taken before reading, so a commit landing mid-read keeps data out of the cache
+                generation = response_cache.generation(tables) if enabled else None
+                data, status = func(*args, **kwargs)
+                if status != 200:
+                    return data, status
+                etag = make_etag(data)
+                if enabled:
+                    response_cache.set(key, data, etag, tables, generation)
+            else:
+                data, etag = cached
+
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if etag_matches(etag, request.headers.get("If-None-Match", "")):
+                return "", 304, headers
+            return data, 200, headers
+
+        return wrapper
+
+    return decorator
+
+
+# --- Write-driven invalidation ---
+
+
+def _record_tables(session, tables):
+    session.info.setdefault("cache_tables", set()).update(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_tables(session, flush_context):
+    """Remember which tables this transaction has written to."""
+    _record_tables(
+        session,
+        {obj.__table__.name for obj in (*session.new, *session.dirty, *session.deleted)},
+    )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_tables(orm_execute_state):
+    """Bulk ORM insert/update/delete statements bypass flush; record them too."""
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            _record_tables(orm_execute_state.session, {mapper.local_table.name})
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    tables = session.info.pop("cache_tables", None)
+    # Commits outside an app context (scripts, seeding) have no cache to update
+    if tables and has_app_context() and "response_cache" in current_app.extensions:
+        current_app.extensions["response_cache"].invalidate(tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("cache_tables", None)
@@ -0,0 +1,112 @@
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Only gzip is offered
+    brotli = None
+
+# --- Response compression ---
+#
+# Text responses (JSON, NDJSON, CSV, metrics) are compressed with the best
+# encoding the client's Accept-Encoding allows: brotli when the brotli
+# package is installed, else gzip. Bodies under COMPRESSION_MIN_SIZE bytes
+# are sent as they are, since headers and framing would eat the saving.
+# Streamed responses (exports) are compressed chunk by chunk as they are
+# generated, so they still start at once and use flat memory.
+#
+# A compressed body is a different representation of the resource, so its
+# ETag is sent weak (W/"...") and Vary: Accept-Encoding is set; If-None-Match
+# uses weak comparison, so revalidation works for either form.
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/plain",
+}
+
+
+def offered_encodings():
+    """Encodings this server can produce, in order of preference."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept):
+    """
+    The preferred encoding the client accepts, or None.
+
+    Args:
+        accept: The parsed Accept-Encoding header (a werkzeug Accept).
+    """
+    return accept.best_match(offered_encodings())
+
+
+class Compressor:
+    """Incremental brotli or gzip compressor with one interface."""
+
+    def __init__(self, encoding, config):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=config["COMPRESSION_BROTLI_QUALITY"])
+            self.compress, self.finish = compressor.process, compressor.finish
+        else:
+            compressor = zlib.compressobj(config["COMPRESSION_GZIP_LEVEL"], zlib.DEFLATED, 31)
+            self.compress, self.finish = compressor.compress, compressor.flush
+
+
+def compress(data, encoding, config):
+    """Compress a whole body."""
+    compressor = Compressor(encoding, config)
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_chunks(chunks, encoding, config):
+    """Compress a stream of str or bytes chunks on the fly."""
+    compressor = Compressor(encoding, config)
+    try:
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        # Closing the stream (e.g. on disconnect) must close the generator it wraps
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def weak_etag(etag):
+    return etag if etag.startswith("W/") else "W/" + etag
+
+
+def init_compression(app):
+    """Register the after-request hook if COMPRESSION_ENABLED is on."""
+    if not app.config["COMPRESSION_ENABLED"]:
+        return
+    min_size = app.config["COMPRESSION_MIN_SIZE"]
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+        if response.is_streamed:
+            response.response = compress_chunks(response.response, encoding, app.config)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compress(data, encoding, app.config))
+        response.headers["Content-Encoding"] = encoding
+        if "ETag" in response.headers:
+            response.headers["ETag"] = weak_etag(response.headers["ETag"])
+        return response
@@ -1,23 +1,114 @@
-from flask import Flask
+import os
 from flask_cors import CORS
 from flask_restful import Api
 from sqlalchemy import MetaData
-from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
 from flask_jwt_extended import JWTManager
+from storage import sqlite_pragmas_from_env, engine_options_from_env
+from jsonprovider import json_provider, output_json
+from routing import RoutingSession, read_binds
 
-# Initialize Flask application
-app = Flask(__name__)
+# --- Settings ---
+#
+# configure() fills in an app's settings when create_app() builds it, so
+# environment variables are read then rather than at import, and each app
+# instance can be given its own overrides.
 
-# Configure Flask application settings
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///app.db"  
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = (
-    False  
-)
 
-app.config["JWT_SECRET_KEY"] = "super-secret"  # Secret key for JWT authentication
-app.json.compact = False  
+def configure(app, overrides=None):
+    """Apply the default settings to app.config, then overrides."""
+    config = app.config
+    # Configure Flask application settings
+    config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///app.db")
+    config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Storage profile applied on every SQLite connection and pool options (see storage.py)
+    config["SQLITE_PRAGMAS"] = sqlite_pragmas_from_env()
+    config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options_from_env()
+    # Separate read engine for @read_only resources (see routing.py): a replica
+    # at READ_DATABASE_URL, else query_only connections to the WAL SQLite file
+    config["READ_ROUTING_ENABLED"] = os.environ.get("READ_ROUTING_ENABLED", "1").lower() in ("1", "true", "yes")
+    config["READ_DATABASE_URL"] = os.environ.get("READ_DATABASE_URL")
+    config["READ_YOUR_WRITES_SECONDS"] = 5  # With a replica, a writer's reads stay on the primary this long
+
+    # Off for serving processes that never run `flask db`: importing
+    # Flask-Migrate pulls in Alembic, a third of an idle worker's startup
+    config["MIGRATIONS_ENABLED"] = True
+
+    config["JWT_SECRET_KEY"] = "super-secret"  # Secret key for JWT authentication
+
+    # In-process response cache for public GET endpoints (see cache.py)
+    config["RESPONSE_CACHE_ENABLED"] = True
+    config["RESPONSE_CACHE_MAX_ENTRIES"] = 1024  # LRU size bound
+    config["RESPONSE_CACHE_TTL"] = 60  # Seconds before an entry expires
+    # With several worker processes, a directory they share, so a write in
+    # one invalidates the others' entries
+    config["RESPONSE_CACHE_DIR"] = os.environ.get("RESPONSE_CACHE_DIR")
+
+    # Password hashing (see passwords.py). Hashes made with other parameters
+    # are upgraded on the user's next successful login.
+    config["PASSWORD_HASH_METHOD"] = "scrypt:32768:8:1"
+    config["PASSWORD_SALT_LENGTH"] = 16
+    config["PASSWORD_HASH_WORKERS"] = 4  # 0 hashes inline on the request thread
+    config["PASSWORD_HASH_QUEUE_DEPTH"] = 8  # Waiting jobs allowed before 503
+    config["PASSWORD_HASH_TIMEOUT"] = 10  # Seconds to wait for a result
+
+    # POST /api/listings/bulk (see bulk_import.py)
+    config["BULK_IMPORT_BATCH_SIZE"] = 1000  # Rows per INSERT/commit, overridable per request
+    config["BULK_IMPORT_MAX_BATCH_SIZE"] = 10000
+    config["BULK_IMPORT_MAX_ERRORS"] = 1000  # Row errors reported before truncating
+
+    # Listing ids accepted per POST /api/favorites/batch list or lookup
+    config["FAVORITES_BATCH_MAX"] = 500
+
+    # Listings with more favorites than this are soft-deleted and purged in the
+    # background rather than deleted in the request (see purge.py)
+    config["LISTING_DEFERRED_DELETE_FAVORITES"] = 1000
+    config["LISTING_PURGE_BATCH_SIZE"] = 1000  # Favorites deleted per transaction
+    config["LISTING_PURGE_INTERVAL"] = 60  # Seconds between sweeps for leftovers
+    # Off to leave purging to `flask listings purge`, e.g. from cron
+    config["LISTING_PURGE_IN_BACKGROUND"] = True
+
+    # "Users who favorited this also favorited" index (see related.py)
+    config["RELATED_TOP_K"] = 20  # Neighbours kept and served per listing
+    config["RELATED_BUILD_METHOD"] = "numpy"  # Or "sql"; numpy falls back to sql when NumPy/SciPy are missing
+    config["RELATED_BUILD_BLOCK"] = 4096  # Listings per sparse product in the numpy build
+
+    # Rows fetched from the cursor and encoded per chunk by streaming exports (see export.py)
+    config["EXPORT_BATCH_SIZE"] = 1000
+
+    # Use generated dump functions instead of marshmallow on list endpoints (see fastdump.py)
+    config["FAST_SERIALIZER"] = True
+    # Server-Timing header and slow query/request log (see instrumentation.py)
+    config["INSTRUMENTATION_ENABLED"] = os.environ.get("INSTRUMENTATION_ENABLED", "").lower() in ("1", "true", "yes")
+    config["SLOW_QUERY_MS"] = 100
+    config["SLOW_REQUEST_MS"] = 500
+    # Prometheus metrics at /metrics (see metrics.py). With several worker
+    # processes, point METRICS_DIR at a directory they share.
+    config["METRICS_ENABLED"] = True
+    config["METRICS_DIR"] = os.environ.get("METRICS_DIR")
+    config["METRICS_FLUSH_INTERVAL"] = 1  # Seconds between snapshot writes per worker
+
+    # Response JSON encoder, "orjson" or "stdlib" (see jsonprovider.py)
+    config["JSON_PROVIDER"] = os.environ.get("JSON_PROVIDER", "orjson")
+    config["JSON_PRETTY"] = False  # Indent responses instead of compact output
+    # Accept-Encoding negotiated br/gzip compression of text responses (see compression.py)
+    config["COMPRESSION_ENABLED"] = True
+    config["COMPRESSION_MIN_SIZE"] = 1024  # Smaller bodies are sent uncompressed
+    config["COMPRESSION_GZIP_LEVEL"] = 6
+    config["COMPRESSION_BROTLI_QUALITY"] = 5  # 0-11; 11 is far too slow per request
+
+    config.update(overrides or {})
+    # Derived from the settings above unless given explicitly
+    if "SQLALCHEMY_BINDS" not in config:
+        config["SQLALCHEMY_BINDS"] = read_binds(config)
+    app.json = json_provider(app)
+
+
+# --- Extensions ---
+#
+# Created unbound here so models and helpers can import them, and bound to
+# each app by init_extensions().
 
 # Define SQLAlchemy metadata with naming conventions for database constraints
 metadata = MetaData(
@@ -31,22 +122,43 @@ metadata = MetaData(
 )
 
 # Initialize SQLAlchemy with custom metadata
-db = SQLAlchemy(metadata=metadata)
-db.init_app(app)  
-
-# Initialize Flask-Migrate for database migrations
-migrate = Migrate()
-migrate.init_app(app, db)  
+db = SQLAlchemy(metadata=metadata, session_options={"class_": RoutingSession})
 
 ma = Marshmallow()
-ma.init_app(app)  
-
 
 jwt = JWTManager()
-jwt.init_app(app)  
 
-# Initialize REST API
-api = Api(app)  
 
-# Initialize CORS to allow cross-origin requests
-CORS(app)  # Enable CORS for all routes
+def include_object(object, name, type_, reflected, compare_to):
+    """
+    Keep autogenerate from dropping tables that exist only in migrations,
+    such as the FTS5 search table and its shadow tables.
+    """
+    return not (type_ == "table" and reflected and name.startswith("item_listings_fts"))
+
+
+def init_extensions(app):
+    """
+    Bind the extensions to a configured app and create its REST API.
+
+    Returns:
+        Api: The app's Flask-RESTful API, also kept as app.extensions["api"].
+    """
+    db.init_app(app)
+    ma.init_app(app)
+    jwt.init_app(app)
+
+    if app.config["MIGRATIONS_ENABLED"]:
+        # Initialize Flask-Migrate for database migrations (`flask db ...`)
+        from flask_migrate import Migrate
+
+        Migrate(app, db, include_object=include_object)
+
+    # Initialize REST API
+    api = Api(app)
+    api.representation("application/json")(output_json)
+    app.extensions["api"] = api
+
+    # Initialize CORS to allow cross-origin requests
+    CORS(app)  # Enable CORS for all routes
+    return api
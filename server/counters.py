@@ -0,0 +1,213 @@
+import click
+from collections import Counter
+from flask import abort
+from flask.cli import AppGroup
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload
+from config import db
+from models import Category, Favorite, ItemListing, UserCategoryStat
+from pagination import parse_limit, encode_key, decode_key
+
+# --- Denormalized counters ---
+#
+# item_listings.favorite_count and categories.listing_count are kept in
+# step by the resources that add or remove favorites and listings, with an
+# atomic "SET n = n + delta" in the same transaction as the write, so a
+# rollback undoes both. `flask counters rebuild` recomputes them from the
+# underlying rows if they ever drift (e.g. after writes made outside the API).
+#
+# user_category_stats holds one row per (user, category) the user has
+# listings in. New listings bump it with an upsert; deletes and category
+# moves recompute the affected rows, since last_listed_at may go backwards.
+#
+# The write helpers use the Flask-SQLAlchemy session unless given another,
+# e.g. the sync session behind an AsyncSession in asgi.py.
+
+# Correlated true counts, used by the rebuild command and seeding
+TRUE_FAVORITE_COUNT = (
+    select(func.count(Favorite.id))
+    .where(Favorite.item_listing_id == ItemListing.id)
+    .scalar_subquery()
+)
+TRUE_LISTING_COUNT = (
+    select(func.count(ItemListing.id))
+    .where(ItemListing.category_id == Category.id, ItemListing.deleted_at.is_(None))
+    .scalar_subquery()
+)
+
+USER_CATEGORY_STATS = (
+    select(
+        ItemListing.user_id,
+        ItemListing.category_id,
+        func.count(ItemListing.id),
+        func.max(ItemListing.created_at),
+    )
+    .where(ItemListing.category_id.is_not(None), ItemListing.deleted_at.is_(None))
+    .group_by(ItemListing.user_id, ItemListing.category_id)
+)
+
+REBUILD_STATEMENTS = [
+    update(ItemListing)
+    .where(ItemListing.favorite_count != TRUE_FAVORITE_COUNT)
+    .values(favorite_count=TRUE_FAVORITE_COUNT),
+    update(Category)
+    .where(Category.listing_count != TRUE_LISTING_COUNT)
+    .values(listing_count=TRUE_LISTING_COUNT),
+]
+
+REBUILD_USER_CATEGORY_STATS = [
+    delete(UserCategoryStat),
+    insert(UserCategoryStat).from_select(
+        ["user_id", "category_id", "listing_count", "last_listed_at"], USER_CATEGORY_STATS
+    ),
+]
+
+
+def adjust_favorite_count(listing_id, delta, session=db.session):
+    """Add delta to a listing's favorite_count in the current transaction."""
+    session.execute(
+        update(ItemListing)
+        .where(ItemListing.id == listing_id)
+        .values(favorite_count=ItemListing.favorite_count + delta)
+    )
+
+
+def adjust_favorite_counts(listing_ids, delta, session=db.session):
+    """Add delta to favorite_count of each listing in listing_ids with one UPDATE."""
+    if not listing_ids:
+        return
+    session.execute(
+        update(ItemListing)
+        .where(ItemListing.id.in_(listing_ids))
+        .values(favorite_count=ItemListing.favorite_count + delta)
+    )
+
+
+def adjust_listing_count(category_id, delta, session=db.session):
+    """Add delta to a category's listing_count in the current transaction."""
+    if category_id is None:
+        return
+    session.execute(
+        update(Category)
+        .where(Category.id == category_id)
+        .values(listing_count=Category.listing_count + delta)
+    )
+
+
+def adjust_listing_counts(category_ids, session=db.session):
+    """Count one new listing per entry in category_ids, one UPDATE per category."""
+    for category_id, count in Counter(category_ids).items():
+        adjust_listing_count(category_id, count, session)
+
+
+def add_to_user_category_stats(listing, session=db.session):
+    """Count a listing created in, or moved into, its category for its owner."""
+    if listing.category_id is None:
+        return
+    session.flush()  # Apply the created_at default
+    stmt = sqlite_insert(UserCategoryStat).values(
+        user_id=listing.user_id,
+        category_id=listing.category_id,
+        listing_count=1,
+        last_listed_at=listing.created_at,
+    )
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "category_id"],
+            set_={
+                "listing_count": UserCategoryStat.listing_count + 1,
+                "last_listed_at": func.max(UserCategoryStat.last_listed_at, stmt.excluded.last_listed_at),
+            },
+        )
+    )
+
+
+def refresh_user_category_stats(user_id, category_ids, session=db.session):
+    """
+    Recompute a user's stats rows for the given categories from their
+    listings, dropping rows for categories they no longer have listings in.
+    """
+    category_ids = {id for id in category_ids if id is not None}
+    if not category_ids:
+        return
+    counts = session.execute(
+        USER_CATEGORY_STATS.where(
+            ItemListing.user_id == user_id, ItemListing.category_id.in_(category_ids)
+        )
+    ).all()
+    session.execute(
+        delete(UserCategoryStat).where(
+            UserCategoryStat.user_id == user_id, UserCategoryStat.category_id.in_(category_ids)
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    if counts:
+        session.execute(insert(UserCategoryStat), [
+            {"user_id": uid, "category_id": cid, "listing_count": count, "last_listed_at": listed_at}
+            for uid, cid, count, listed_at in counts
+        ])
+
+
+def rebuild_counters():
+    """
+    Recompute every counter and the user category stats from the
+    underlying rows and commit.
+
+    Returns:
+        tuple: (listings fixed, categories fixed, user category stats rows)
+    """
+    fixed = [
+        db.session.execute(stmt, execution_options={"synchronize_session": False}).rowcount
+        for stmt in REBUILD_STATEMENTS
+    ]
+    for stmt in REBUILD_USER_CATEGORY_STATS:
+        rows = db.session.execute(stmt, execution_options={"synchronize_session": False}).rowcount
+    db.session.commit()
+    return (*fixed, rows)
+
+
+def popular_listings(args):
+    """
+    Listings with the most favorites first, optionally filtered by ?category_id=.
+
+    Ordered by (favorite_count, id) descending and paginated with a keyset
+    cursor over the same pair, served from the (category_id, favorite_count, id)
+    and (favorite_count, id) indexes.
+
+    Returns:
+        tuple: (list of ItemListing rows, next_cursor or None)
+    """
+    limit = parse_limit(args)
+    qs = ItemListing.query.options(
+        joinedload(ItemListing.category), joinedload(ItemListing.owner)
+    )
+    if args.get("category_id"):
+        qs = qs.filter(ItemListing.category_id == args["category_id"])
+    if args.get("cursor"):
+        try:
+            count, last_id = decode_key(args["cursor"])
+            count, last_id = int(count), int(last_id)
+        except (ValueError, TypeError):
+            abort(400, description="Invalid cursor")
+        qs = qs.filter(tuple_(ItemListing.favorite_count, ItemListing.id) < tuple_(count, last_id))
+    rows = qs.order_by(ItemListing.favorite_count.desc(), ItemListing.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_key([rows[-1].favorite_count, rows[-1].id])
+    return rows, next_cursor
+
+
+# --- CLI: flask counters ... ---
+
+counters_cli = AppGroup("counters", help="Manage denormalized counters and user category stats.")
+
+
+@counters_cli.command("rebuild")
+def rebuild_command():
+    """Recompute favorite/listing counters and user category stats from existing data."""
+    listings, categories, stats = rebuild_counters()
+    click.echo(f"Fixed {listings} listing and {categories} category counters.")
+    click.echo(f"Rebuilt {stats} user category stats rows.")
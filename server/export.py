@@ -0,0 +1,114 @@
+import io
+import csv
+from flask import Response, abort, current_app, request, stream_with_context
+from sqlalchemy import select
+from config import db
+from models import Category, Favorite, ItemListing, User
+
+# --- Streaming exports ---
+#
+# Exports select plain columns (no ORM objects, so nothing accumulates in
+# the identity map) with yield_per, which fetches from the cursor in
+# batches instead of materializing the result. Rows are encoded and sent
+# as they are read, so worker memory stays flat whatever the row count.
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+LISTING_COLUMNS = [
+    ItemListing.id,
+    ItemListing.title,
+    ItemListing.description,
+    ItemListing.price,
+    ItemListing.image_url,
+    ItemListing.category_id,
+    Category.name.label("category_name"),
+    ItemListing.user_id,
+    User.username.label("owner_username"),
+    ItemListing.created_at,
+]
+
+FAVORITE_COLUMNS = [
+    Favorite.id,
+    Favorite.item_listing_id,
+    Favorite.note,
+    Favorite.created_at,
+    ItemListing.title.label("listing_title"),
+    ItemListing.price.label("listing_price"),
+    ItemListing.category_id.label("listing_category_id"),
+]
+
+
+def listings_export_query(category_id=None):
+    """All listings with category name and owner username, in id order."""
+    stmt = (
+        select(*LISTING_COLUMNS)
+        .join(User, User.id == ItemListing.user_id)
+        .outerjoin(Category, Category.id == ItemListing.category_id)
+        .order_by(ItemListing.id)
+    )
+    if category_id:
+        stmt = stmt.where(ItemListing.category_id == category_id)
+    return stmt
+
+
+def favorites_export_query(uid):
+    """A user's favorites with a summary of each listing, in id order."""
+    return (
+        select(*FAVORITE_COLUMNS)
+        .join(ItemListing, ItemListing.id == Favorite.item_listing_id)
+        .where(Favorite.user_id == uid)
+        .order_by(Favorite.id)
+    )
+
+
+def _jsonable(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def encode_ndjson(rows, keys):
+    dumps = current_app.json.dumps_bytes
+    buffer = []
+    for row in rows:
+        buffer.append(dumps(dict(zip(keys, map(_jsonable, row)))))
+        if len(buffer) >= current_app.config["EXPORT_BATCH_SIZE"]:
+            yield b"\n".join(buffer) + b"\n"
+            buffer = []
+    if buffer:
+        yield b"\n".join(buffer) + b"\n"
+
+
+def encode_csv(rows, keys):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(keys)
+    for count, row in enumerate(rows, 1):
+        writer.writerow([_jsonable(value) for value in row])
+        if count % current_app.config["EXPORT_BATCH_SIZE"] == 0:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+    yield out.getvalue()
+
+
+def stream_export(stmt, filename):
+    """
+    Stream the rows of stmt as an attachment in the format chosen by
+    ?format=ndjson|csv. Compression is negotiated by compression.py.
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in FORMATS:
+        abort(400, description="format must be one of: " + ", ".join(FORMATS))
+
+    def generate():
+        result = db.session.execute(
+            stmt.execution_options(yield_per=current_app.config["EXPORT_BATCH_SIZE"])
+        )
+        keys = list(result.keys())
+        encode = encode_ndjson if fmt == "ndjson" else encode_csv
+        yield from encode(result, keys)
+
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    return Response(stream_with_context(generate()), mimetype=FORMATS[fmt], headers=headers)
@@ -0,0 +1,109 @@
+from flask import current_app
+from marshmallow import fields, missing
+from marshmallow.utils import ensure_text_type
+from instrumentation import timed_serialization
+
+# --- Compiled serializers for hot marshmallow schemas ---
+#
+# marshmallow's Schema.dump walks field objects, resolves accessors and
+# builds nested schema instances for every row. compile_schema() reads a
+# schema's dump fields once and generates a plain Python function that
+# reads attributes and converts values directly, producing the same dict
+# as schema.dump(). Fields it does not know how to inline fall back to
+# the field's own serialize(), so the output is always identical.
+
+_compiled = {}
+
+
+def _inline_conversion(field):
+    """
+    Return a Python expression template converting `v` the way the field's
+    _serialize would, or None if the field must use the generic path.
+    """
+    kind = type(field)
+    if kind is fields.Integer and not field.as_string:
+        return "int(v)"
+    if kind is fields.Float and not field.as_string:
+        return "float(v)"
+    if kind is fields.String:
+        return "(v if v.__class__ is str else _ensure_text(v))"
+    if kind is fields.DateTime and (field.format or field.DEFAULT_FORMAT) == "iso":
+        return "v.isoformat()"
+    return None
+
+
+def _has_dump_hooks(schema):
+    return bool(schema._hooks.get("pre_dump") or schema._hooks.get("post_dump"))
+
+
+def compile_schema(schema, _depth=0):
+    """
+    Generate a function dumping a single object exactly like schema.dump(obj).
+
+    The schema's own `many` flag is ignored; see fast_dump for lists.
+    """
+    env = {"_ensure_text": ensure_text_type, "_missing": missing}
+    lines = ["def dump(obj):", "    d = {}"]
+
+    for index, (name, field) in enumerate(schema.dump_fields.items()):
+        attr = field.attribute or name
+        key = field.data_key if field.data_key is not None else name
+        conversion = _inline_conversion(field)
+        nested = None
+        if type(field) is fields.Nested and _depth < 4 and not _has_dump_hooks(field.schema):
+            nested = compile_schema(field.schema, _depth + 1)
+
+        if nested is not None:
+            env[f"_nested{index}"] = nested
+            if field.schema.many or field.many:
+                conversion = f"[_nested{index}(x) for x in v]"
+            else:
+                conversion = f"_nested{index}(v)"
+
+        if conversion is not None and attr.isidentifier() and field.dump_default is missing:
+            # Attributes the object lacks are left out, as marshmallow does
+            lines += [
+                "    try:",
+                f"        v = obj.{attr}",
+                "    except AttributeError:",
+                "        pass",
+                "    else:",
+                f"        d[{key!r}] = None if v is None else {conversion}",
+            ]
+        else:
+            # Generic path: let the field do it, honouring missing values
+            env[f"_field{index}"] = field
+            lines += [
+                f"    v = _field{index}.serialize({name!r}, obj, accessor=_accessor)",
+                "    if v is not _missing:",
+                f"        d[{key!r}] = v",
+            ]
+            env["_accessor"] = schema.get_attribute
+    lines.append("    return d")
+
+    exec(compile("\n".join(lines), f"<fastdump {type(schema).__name__}>", "exec"), env)
+    return env["dump"]
+
+
+def get_dumper(schema):
+    """Return the compiled single-object dump function for a schema, building it once."""
+    entry = _compiled.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        entry = (schema, compile_schema(schema))
+        _compiled[id(schema)] = entry
+    return entry[1]
+
+
+def fast_dump(schema, obj, many=None):
+    """
+    Serialize obj with the compiled dumper for schema, or with schema.dump
+    when FAST_SERIALIZER is off or the schema has dump hooks.
+    """
+    many = schema.many if many is None else many
+    with timed_serialization():
+        if not current_app.config["FAST_SERIALIZER"] or _has_dump_hooks(schema):
+            return schema.dump(obj, many=many)
+        dump = get_dumper(schema)
+        if many:
+            return [dump(item) for item in obj]
+        return dump(obj)
@@ -0,0 +1,83 @@
+from flask import abort, current_app
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from config import db
+from models import Favorite, ItemListing
+from counters import adjust_favorite_counts
+from related import refresh_related
+
+# --- Batch favorites ---
+#
+# Favoriting is idempotent: (user_id, item_listing_id) is unique, adds are
+# INSERT ... ON CONFLICT DO NOTHING and removes are plain DELETEs, each
+# RETURNING the listing ids it actually changed so the favorite counters
+# move only for real changes. Lookups read the unique index alone.
+
+
+def parse_listing_ids(values, name):
+    """
+    Validate a list of listing ids (ints, or a comma-separated string),
+    capped at FAVORITES_BATCH_MAX. Aborts with 400 if invalid.
+
+    Returns:
+        list: Distinct ids in the order given.
+    """
+    if isinstance(values, str):
+        values = [value for value in values.split(",") if value.strip()]
+    if not isinstance(values, list):
+        abort(400, description=f"{name} must be a list of listing ids")
+    try:
+        ids = list(dict.fromkeys(int(value) for value in values))
+    except (TypeError, ValueError):
+        abort(400, description=f"{name} must be a list of listing ids")
+    if len(ids) > current_app.config["FAVORITES_BATCH_MAX"]:
+        abort(400, description=f"{name} accepts at most {current_app.config['FAVORITES_BATCH_MAX']} ids")
+    return ids
+
+
+def favorited_listing_ids(uid, listing_ids):
+    """Return which of listing_ids the user has favorited, in one indexed IN query."""
+    if not listing_ids:
+        return []
+    return db.session.scalars(
+        select(Favorite.item_listing_id)
+        .where(Favorite.user_id == uid, Favorite.item_listing_id.in_(listing_ids))
+        .order_by(Favorite.item_listing_id)
+    ).all()
+
+
+def batch_update_favorites(uid, add, remove, note=None):
+    """
+    Favorite the listings in add and unfavorite those in remove, in one
+    transaction. Already-favorited adds and not-favorited removes are no-ops.
+
+    Returns:
+        dict: {"added": [...], "removed": [...], "missing": [...]} where
+        missing lists ids in add that are not existing listings.
+    """
+    existing = set(db.session.scalars(select(ItemListing.id).where(ItemListing.id.in_(add)))) if add else set()
+    missing = [id for id in add if id not in existing]
+    rows = [{"user_id": uid, "item_listing_id": id, "note": note} for id in add if id in existing]
+
+    added = []
+    if rows:
+        added = db.session.scalars(
+            sqlite_insert(Favorite)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["user_id", "item_listing_id"])
+            .returning(Favorite.item_listing_id)
+        ).all()
+    removed = []
+    if remove:
+        removed = db.session.scalars(
+            delete(Favorite)
+            .where(Favorite.user_id == uid, Favorite.item_listing_id.in_(remove))
+            .returning(Favorite.item_listing_id),
+            execution_options={"synchronize_session": False},
+        ).all()
+
+    adjust_favorite_counts(added, 1)
+    adjust_favorite_counts(removed, -1)
+    refresh_related(uid, added + removed)
+    db.session.commit()
+    return {"added": sorted(added), "removed": sorted(removed), "missing": missing}
@@ -0,0 +1,138 @@
+from flask import abort
+from marshmallow import fields
+from sqlalchemy.orm import joinedload, load_only
+
+# --- Sparse fieldsets (?fields=) and expansions (?expand=) ---
+#
+# ?fields=id,title,price picks the plain columns to return and ?expand=
+# names the nested relationships to include. The choice is pushed down
+# into the query: unrequested columns are deferred with load_only and a
+# relationship is joined only when expanded. Without either parameter the
+# resource keeps its full default representation, with every nested
+# relationship it dumps joined so serializing never lazy-loads per row.
+#
+# One schema instance is built per distinct (fields, expand) combination
+# and reused, so its compiled fast_dump serializer is too.
+
+
+def _scalar_names(schema):
+    return [name for name, field in schema.dump_fields.items() if not isinstance(field, fields.Nested)]
+
+
+def _parse_list(args, name, allowed):
+    raw = args.get(name)
+    if raw is None:
+        return None
+    values = [value.strip() for value in raw.split(",") if value.strip()]
+    unknown = sorted(set(values) - set(allowed))
+    if unknown:
+        abort(400, description=f"Unknown {name}: {', '.join(unknown)}")
+    return frozenset(values)
+
+
+class Fieldset:
+    """
+    ?fields= / ?expand= handling for one schema over one model.
+
+    Args:
+        schema: The full many=True schema instance of the resource.
+        model: The model class the resource queries.
+        expansions: Expansion name -> relationship attributes from the model,
+            e.g. {"listing.owner": (Favorite.listing, ItemListing.owner)}.
+        required: Column names always loaded, e.g. pagination sort keys.
+    """
+
+    def __init__(self, schema, model, expansions, required=("id",)):
+        self.schema = schema
+        self.model = model
+        self.expansions = expansions
+        self.required = required
+        self.field_names = _scalar_names(schema)
+        self._schemas = {}
+        self.default_options = self._joins(expansions)
+
+    def _columns(self, model, schema, names):
+        return [getattr(model, schema.fields[name].attribute or name) for name in names]
+
+    def _nested_schema(self, name):
+        schema = self.schema
+        for part in name.split("."):
+            schema = schema.fields[part].schema
+        return schema
+
+    def select(self, args):
+        """
+        Resolve ?fields= and ?expand= from args.
+
+        Returns:
+            tuple: (schema to dump with, loader options). Without either
+            parameter, the full schema with every expansion joined. Aborts
+            with 400 on unknown names.
+        """
+        selected = _parse_list(args, "fields", self.field_names)
+        expand = _parse_list(args, "expand", self.expansions)
+        if selected is None and expand is None:
+            return self.schema, self.default_options
+        if selected is not None and not selected:
+            abort(400, description="fields must name at least one field")
+        selected = selected if selected is not None else frozenset(self.field_names)
+        expand = expand or frozenset()
+        # Expanding "listing.owner" implies expanding "listing"
+        expand = expand | {name.rsplit(".", 1)[0] for name in expand if "." in name}
+
+        key = (selected, expand)
+        schema = self._schemas.get(key)
+        if schema is None:
+            schema = self._schemas[key] = self._build_schema(selected, expand)
+        return schema, self._options(selected, expand)
+
+    def _build_schema(self, selected, expand):
+        return type(self.schema)(many=True, only=self._only(self.schema, "", selected, expand))
+
+    def _only(self, schema, prefix, selected, expand):
+        """Dotted `only` names in declaration order, recursing into expansions."""
+        only = []
+        for name, field in schema.dump_fields.items():
+            if not isinstance(field, fields.Nested):
+                if name in selected:
+                    only.append(prefix + name)
+            elif prefix + name in expand:
+                nested = field.schema
+                only += self._only(nested, f"{prefix}{name}.", _scalar_names(nested), expand)
+        return only
+
+    def _joins(self, names):
+        """A joinedload() chain per expansion, innermost ones covering their parents."""
+        options = []
+        for name in sorted(names):
+            if any(other.startswith(name + ".") for other in names):
+                continue
+            path = self.expansions[name]
+            option = joinedload(path[0])
+            for relationship in path[1:]:
+                option = option.joinedload(relationship)
+            options.append(option)
+        return options
+
+    def _options(self, selected, expand):
+        columns = set(self._columns(self.model, self.schema, selected))
+        columns.update(getattr(self.model, name) for name in self.required)
+        for name in expand:
+            if "." not in name:
+                # The join condition needs the foreign key column
+                columns.update(
+                    getattr(self.model, column.key)
+                    for column in self.expansions[name][0].property.local_columns
+                )
+        options = [load_only(*columns)]
+        for name in sorted(expand):
+            path = self.expansions[name]
+            target = path[-1].property.mapper.class_
+            nested = self._nested_schema(name)
+            names = _scalar_names(nested)
+            option = joinedload(path[0])
+            for relationship in path[1:]:
+                option = option.joinedload(relationship)
+            options.append(option.load_only(*self._columns(target, nested, names)))
+        return options
+
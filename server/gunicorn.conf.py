@@ -0,0 +1,57 @@
+import os
+import tempfile
+import multiprocessing
+
+# --- Production server (gunicorn) ---
+#
+#     pip install -r requirements-server.txt
+#     gunicorn            # from server/, which picks up this file
+#
+# The master imports app.py and builds the app once (preload_app), then
+# forks WEB_CONCURRENCY workers that share its memory copy-on-write, each
+# serving up to WEB_THREADS requests at once on threads. create_app()
+# gives every forked process fresh connection pools (reset_after_fork in
+# app.py), so workers never share the master's SQLite handles.
+#
+# Reloading:
+#
+#   kill -HUP <master>     re-reads this file and replaces the workers; old
+#                          ones finish their requests within graceful_timeout.
+#                          With preload_app the new workers are forked from
+#                          the master, so this does not load new code.
+#   kill -USR2 <master>    starts a new master on the new code next to the
+#                          old one; then `kill -QUIT <old master>`.
+#
+# With PRELOAD_APP=0 each worker imports the app itself, so HUP also loads
+# new code, at the cost of the shared memory.
+
+
+def _env_flag(name, default):
+    return os.environ.get(name, default).lower() in ("1", "true", "yes")
+
+
+# The factory, without Flask-Migrate, which no worker uses
+wsgi_app = 'app:create_app({"MIGRATIONS_ENABLED": False})'
+bind = os.environ.get("BIND", "127.0.0.1:5000")
+
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("WEB_THREADS", 4))
+worker_class = "gthread"
+preload_app = _env_flag("PRELOAD_APP", "1")
+
+timeout = 30  # Seconds a worker may stay silent before it is restarted
+graceful_timeout = 30  # Seconds workers get to finish requests on HUP/TERM
+keepalive = 5
+# Recycle workers after this many requests (0 never), jittered so they do not restart together
+max_requests = int(os.environ.get("MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+# /metrics sums every worker's registry through METRICS_DIR (see metrics.py).
+# Set in the environment, it survives HUP and USR2 along with the counters.
+if workers > 1 and not os.environ.get("METRICS_DIR"):
+    os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="marketplace-metrics-")
+
+# Each worker has its own response cache; a commit in one invalidates the
+# others' entries through a shared file in RESPONSE_CACHE_DIR (see cache.py)
+if workers > 1 and not os.environ.get("RESPONSE_CACHE_DIR"):
+    os.environ["RESPONSE_CACHE_DIR"] = tempfile.mkdtemp(prefix="marketplace-cache-")
@@ -0,0 +1,140 @@
+import json
+import time
+import hashlib
+import logging
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from jsonprovider import output_json
+
+# --- Per-request instrumentation ---
+#
+# Splits each request's wall time into SQL (every cursor execute), response
+# serialization (fast_dump plus JSON encoding) and the rest of the handler,
+# which includes JWT decoding and Python work in the resource. The totals
+# are sent back in a Server-Timing header, and statements or requests over
+# the configured thresholds are logged as one JSON object per line to the
+# "marketplace.slow" logger.
+#
+# Nothing is registered unless INSTRUMENTATION_ENABLED is set when the app
+# starts, so a disabled deployment pays no per-query cost at all.
+
+slow_log = logging.getLogger("marketplace.slow")
+
+
+class RequestTiming:
+    """Counters accumulated over one request."""
+
+    __slots__ = ("start", "queries", "sql", "serialize")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql = 0.0
+        self.serialize = 0.0
+
+    def server_timing(self, total):
+        """Format the counters (seconds) as a Server-Timing header value."""
+        handler = max(total - self.sql - self.serialize, 0.0)
+        return (
+            f'db;dur={self.sql * 1000:.2f};desc="{self.queries} queries", '
+            f"ser;dur={self.serialize * 1000:.2f}, "
+            f"app;dur={handler * 1000:.2f}, "
+            f"total;dur={total * 1000:.2f}"
+        )
+
+
+def current_timing():
+    """The RequestTiming of the active request, or None."""
+    if not has_request_context():
+        return None
+    return g.get("request_timing")
+
+
+class timed_serialization:
+    """Context manager adding the time spent inside it to the request's serialization time."""
+
+    __slots__ = ("timing", "start")
+
+    def __enter__(self):
+        self.timing = current_timing()
+        if self.timing is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.timing is not None:
+            self.timing.serialize += time.perf_counter() - self.start
+        return False
+
+
+def params_fingerprint(parameters):
+    """
+    A short stable hash of the bound parameters, so slow log entries for
+    the same values can be grouped without writing user data to the log.
+    """
+    return hashlib.sha1(repr(parameters).encode()).hexdigest()[:12]
+
+
+def log_slow(event_name, **fields):
+    slow_log.warning(json.dumps({"event": event_name, **fields}, default=str))
+
+
+def init_instrumentation(app, api, engines):
+    """Register the request, JSON and SQL hooks if INSTRUMENTATION_ENABLED is on."""
+    if not app.config["INSTRUMENTATION_ENABLED"]:
+        return
+    slow_query = app.config["SLOW_QUERY_MS"] / 1000
+    slow_request = app.config["SLOW_REQUEST_MS"] / 1000
+
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def end_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        timing = current_timing()
+        if timing is not None:
+            timing.queries += 1
+            timing.sql += elapsed
+        if elapsed >= slow_query:
+            log_slow(
+                "slow_query",
+                statement=" ".join(statement.split()),
+                params_fingerprint=params_fingerprint(parameters),
+                executemany=executemany,
+                duration_ms=round(elapsed * 1000, 2),
+                endpoint=request.endpoint if has_request_context() else None,
+            )
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", start_query)
+        event.listen(engine, "after_cursor_execute", end_query)
+
+    @api.representation("application/json")
+    def timed_output_json(data, code, headers=None):
+        with timed_serialization():
+            return output_json(data, code, headers)
+
+    @app.before_request
+    def start_request():
+        g.request_timing = RequestTiming()
+
+    @app.after_request
+    def finish_request(response):
+        timing = g.pop("request_timing", None)
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing.start
+        response.headers["Server-Timing"] = timing.server_timing(total)
+        if total >= slow_request:
+            log_slow(
+                "slow_request",
+                method=request.method,
+                path=request.path,
+                endpoint=request.endpoint,
+                status=response.status_code,
+                queries=timing.queries,
+                sql_ms=round(timing.sql * 1000, 2),
+                serialize_ms=round(timing.serialize * 1000, 2),
+                duration_ms=round(total * 1000, 2),
+            )
+        return response
@@ -0,0 +1,85 @@
+from flask import current_app, make_response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Falls back to the stdlib provider
+    orjson = None
+
+# --- JSON encoding ---
+#
+# app.json encodes every API response: Flask-RESTful's application/json
+# representation is output_json below rather than its own, which always
+# used the stdlib encoder whatever app.json was. JSON_PROVIDER picks the
+# provider:
+#
+#     orjson  orjson (C), encoding straight to bytes; datetimes, dates,
+#             UUIDs and dataclasses natively, datetimes as ISO 8601
+#     stdlib  Flask's provider on the standard library encoder
+#
+# Both are compact unless JSON_PRETTY is set and keep keys in insertion
+# order. Request bodies are parsed with the same provider.
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's default provider, compact and unsorted by default."""
+
+    compact = True
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        # DefaultJSONProvider applies compact in response() only
+        if self.compact is False:
+            kwargs.setdefault("indent", 2)
+        else:
+            kwargs.setdefault("separators", (",", ":"))
+        return super().dumps(obj, **kwargs)
+
+    def dumps_bytes(self, obj, sort_keys=None):
+        """Encode obj to UTF-8 JSON bytes."""
+        return self.dumps(obj, sort_keys=self.sort_keys if sort_keys is None else sort_keys).encode()
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """The same provider encoding and decoding with orjson."""
+
+    def dumps_bytes(self, obj, sort_keys=None):
+        option = orjson.OPT_NON_STR_KEYS  # int keys become strings, as with the stdlib
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, kwargs.get("sort_keys")).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
+
+
+PROVIDERS = {"orjson": OrjsonProvider, "stdlib": StdlibJSONProvider}
+
+
+def json_provider(app):
+    """The JSON provider named by JSON_PROVIDER, configured for app."""
+    name = app.config["JSON_PROVIDER"]
+    if name not in PROVIDERS:
+        raise ValueError(f"JSON_PROVIDER must be one of: {', '.join(PROVIDERS)}")
+    if name == "orjson" and orjson is None:
+        app.logger.warning("orjson is not installed; using the stdlib JSON provider")
+        name = "stdlib"
+    provider = PROVIDERS[name](app)
+    provider.compact = not app.config["JSON_PRETTY"]
+    return provider
+
+
+def output_json(data, code, headers=None):
+    """Flask-RESTful representation encoding with app.json."""
+    resp = make_response(current_app.json.dumps_bytes(data) + b"\n", code)
+    resp.headers.extend(headers or {})
+    return resp
@@ -0,0 +1,90 @@
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from config import db
+from models import Favorite, ItemListing, UserCategoryStat
+
+# --- Single-pass loaders ---
+#
+# These replace the "one query per category / per favorite" access patterns
+# in the /api/me endpoints. Each loader issues a fixed number of queries no
+# matter how many listings or favorites the user has. The *_query builders
+# return select() statements so the ASGI app can run them on its async
+# session too.
+
+
+def user_listings_query(uid):
+    """A user's listings with category and owner eagerly joined."""
+    return (
+        select(ItemListing)
+        .filter_by(user_id=uid)
+        .options(joinedload(ItemListing.category), joinedload(ItemListing.owner))
+        .order_by(ItemListing.category_id, ItemListing.id)
+    )
+
+
+def load_user_listings(uid):
+    """
+    Fetch all of a user's listings in one query, with category and owner
+    eagerly joined so serialization never lazy-loads.
+    """
+    return db.session.scalars(user_listings_query(uid)).all()
+
+
+def group_listings_by_category(listings):
+    """
+    Group listings by category in Python, preserving query order.
+
+    Returns:
+        list: (Category, [ItemListing, ...]) pairs, skipping uncategorized listings.
+    """
+    groups = {}
+    for listing in listings:
+        if listing.category is None:
+            continue
+        groups.setdefault(listing.category_id, (listing.category, []))[1].append(listing)
+    return list(groups.values())
+
+
+def load_user_categories(uid):
+    """Return the user's categories with their listings in a single query."""
+    return group_listings_by_category(load_user_listings(uid))
+
+
+def user_category_summary_query(uid):
+    """A user's category stats rows with the category joined."""
+    return (
+        select(UserCategoryStat)
+        .filter_by(user_id=uid)
+        .options(joinedload(UserCategoryStat.category))
+        .order_by(UserCategoryStat.category_id)
+    )
+
+
+def load_user_category_summary(uid):
+    """
+    A user's category stats rows with the category joined, read from the
+    user_category_stats primary key without touching item_listings.
+    """
+    return db.session.scalars(user_category_summary_query(uid)).all()
+
+
+def user_favorites_query(uid, options=None):
+    """
+    A user's favorites with listing -> category/owner eagerly joined, or
+    with the given loader options instead (see fieldsets.Fieldset).
+    """
+    if options is None:
+        listing = joinedload(Favorite.listing)
+        options = [
+            listing.joinedload(ItemListing.category),
+            listing.joinedload(ItemListing.owner),
+        ]
+    return select(Favorite).filter_by(user_id=uid).options(*options).order_by(Favorite.id)
+
+
+def load_user_favorites(uid, options=None):
+    """
+    Fetch a user's favorites with listing -> category/owner eagerly joined,
+    so FavoriteSchema dumps them without further queries.
+    """
+    return db.session.scalars(user_favorites_query(uid, options)).all()
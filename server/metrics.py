@@ -0,0 +1,287 @@
+import os
+import glob
+import json
+import time
+import atexit
+import bisect
+import tempfile
+import threading
+from flask import Response, g, request
+
+# --- Prometheus metrics ---
+#
+# RED metrics per Flask-RESTful resource (request count by status code and
+# a latency histogram), in-flight requests, DB pool checkout wait and the
+# response cache's hits, misses, evictions and invalidations, kept
+# in a small in-process registry and rendered at /metrics in the
+# Prometheus text format. Like a Prometheus client's default registry, it
+# is shared by every app instance in the process.
+#
+# Every update takes one short lock on plain dicts; bucket lookup and label
+# building happen outside it. Under several worker processes set
+# METRICS_DIR: each worker periodically writes its registry to
+# METRICS_DIR/metrics-<pid>.json and a scrape served by any worker sums the
+# files, dropping gauges of workers that have exited.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    "http_requests_total": ("counter", "Requests handled, by resource, method and status code."),
+    "http_request_duration_seconds": ("histogram", "Request latency by resource and method."),
+    "http_requests_in_flight": ("gauge", "Requests currently being handled."),
+    "db_pool_checkout_wait_seconds": ("histogram", "Time spent waiting for a pooled DB connection."),
+    "db_pool_checked_out": ("gauge", "DB connections currently checked out of the pool."),
+    "response_cache_requests_total": ("counter", "Response cache lookups, by result (hit or miss)."),
+    "response_cache_evictions_total": ("counter", "Response cache entries evicted by the size bound."),
+    "response_cache_invalidations_total": ("counter", "Response cache entries dropped by writes."),
+    "response_cache_entries": ("gauge", "Entries in this worker's response cache."),
+}
+
+
+class MetricsRegistry:
+    """Counters, gauges and fixed-bucket histograms keyed by (name, labels)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}  # key -> [count per bucket..., count above last bucket, sum]
+
+    def inc(self, name, labels=(), value=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def add(self, name, labels=(), value=1):
+        """Move a gauge up (or down, with a negative value)."""
+        key = (name, labels)
+        with self._lock:
+            self.gauges[key] = self.gauges.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def reset(self):
+        """Drop every series."""
+        # A new lock too: in a forked child, a parent thread may have held the old one
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def snapshot(self):
+        """A JSON-serializable copy of every series."""
+        with self._lock:
+            return {
+                "buckets": list(self.buckets),
+                "counters": [[name, labels, value] for (name, labels), value in self.counters.items()],
+                "gauges": [[name, labels, value] for (name, labels), value in self.gauges.items()],
+                "histograms": [[name, labels, list(series)] for (name, labels), series in self.histograms.items()],
+            }
+
+
+registry = MetricsRegistry()
+
+if hasattr(os, "register_at_fork"):  # Not on Windows
+    # A worker forked from a preloaded master starts from zero instead of
+    # reporting (and flushing) the master's series as its own
+    os.register_at_fork(after_in_child=registry.reset)
+
+
+# --- Multi-process aggregation ---
+
+
+def _snapshot_path(directory, pid):
+    return os.path.join(directory, f"metrics-{pid}.json")
+
+
+def write_snapshot(directory):
+    """Atomically replace this process's snapshot file."""
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+    with os.fdopen(fd, "w") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp, _snapshot_path(directory, os.getpid()))
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_snapshots(snapshots):
+    """
+    Sum (pid, snapshot) pairs into one snapshot. Counters and histograms of
+    exited workers are kept so totals never go backwards; their gauges are not.
+    """
+    merged = {"buckets": list(registry.buckets), "counters": {}, "gauges": {}, "histograms": {}}
+    for pid, snap in snapshots:
+        for name, labels, value in snap["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            merged["counters"][key] = merged["counters"].get(key, 0) + value
+        if _process_alive(pid):
+            for name, labels, value in snap["gauges"]:
+                key = (name, tuple(map(tuple, labels)))
+                merged["gauges"][key] = merged["gauges"].get(key, 0) + value
+        if snap["buckets"] != merged["buckets"]:
+            continue  # Written by a build with different buckets
+        for name, labels, series in snap["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            total = merged["histograms"].setdefault(key, [0] * len(series))
+            for i, value in enumerate(series):
+                total[i] += value
+    return {
+        "buckets": merged["buckets"],
+        **{kind: [[name, labels, value] for (name, labels), value in merged[kind].items()]
+           for kind in ("counters", "gauges", "histograms")},
+    }
+
+
+def collect(directory=None):
+    """This process's snapshot, or every worker's summed when directory is set."""
+    if not directory:
+        return registry.snapshot()
+    write_snapshot(directory)
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        pid = int(os.path.basename(path)[len("metrics-"):-len(".json")])
+        try:
+            with open(path) as f:
+                snapshots.append((pid, json.load(f)))
+        except (OSError, ValueError):
+            continue  # Removed or replaced while listing
+    return merge_snapshots(snapshots)
+
+
+# --- Text exposition format ---
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(snapshot):
+    """Format a snapshot in the Prometheus text exposition format (0.0.4)."""
+    series = {}
+    for kind in ("counters", "gauges", "histograms"):
+        for name, labels, value in snapshot[kind]:
+            series.setdefault(name, []).append((tuple(map(tuple, labels)), value))
+
+    bounds = [_number(b) for b in snapshot["buckets"]] + ["+Inf"]
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(series.get(name, [])):
+            if kind != "histogram":
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(bounds, value[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(value[-1])}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_response(app, engines):
+    """The /metrics response for this process (or all workers, with METRICS_DIR)."""
+    snapshot = collect(app.config["METRICS_DIR"])
+    pools = [engine.pool for engine in engines if hasattr(engine.pool, "checkedout")]
+    if pools:
+        # Read live from this worker's pools (primary and read) rather than aggregated
+        snapshot["gauges"].append(["db_pool_checked_out", [], sum(pool.checkedout() for pool in pools)])
+    if "response_cache" in app.extensions:
+        snapshot["gauges"].append(["response_cache_entries", [], len(app.extensions["response_cache"])])
+    return Response(render(snapshot), mimetype="text/plain; version=0.0.4")
+
+
+# --- Hooks ---
+
+
+def _resource_name(app):
+    view = app.view_functions.get(request.endpoint)
+    return getattr(getattr(view, "view_class", None), "__name__", request.endpoint or "unmatched")
+
+
+def init_metrics(app, engines):
+    """Register request hooks and time pool checkouts if METRICS_ENABLED is on."""
+    if not app.config["METRICS_ENABLED"]:
+        return
+    directory = app.config["METRICS_DIR"]
+    flush_interval = app.config["METRICS_FLUSH_INTERVAL"]
+    last_flush = [0.0]
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        atexit.register(write_snapshot, directory)
+
+    # The pool has no "checkout requested" event, so wrap the engine's
+    # raw_connection(), which checks out from engine.pool, to include the
+    # time spent blocked on an exhausted pool. Wrapping the pool itself
+    # would not survive dispose(), which replaces it (see reset_after_fork).
+    def timed_connect(raw_connection):
+        def connect():
+            start = time.perf_counter()
+            try:
+                return raw_connection()
+            finally:
+                registry.observe("db_pool_checkout_wait_seconds", (), time.perf_counter() - start)
+
+        return connect
+
+    for engine in engines:
+        engine.raw_connection = timed_connect(engine.raw_connection)
+
+    @app.before_request
+    def start_request():
+        g.metrics_start = time.perf_counter()
+        registry.add("http_requests_in_flight")
+
+    @app.after_request
+    def record_request(response):
+        start = g.get("metrics_start")
+        if start is None:
+            return response
+        resource = _resource_name(app)
+        registry.observe(
+            "http_request_duration_seconds",
+            (("resource", resource), ("method", request.method)),
+            time.perf_counter() - start,
+        )
+        registry.inc(
+            "http_requests_total",
+            (("resource", resource), ("method", request.method), ("status", str(response.status_code))),
+        )
+        if directory and start - last_flush[0] >= flush_interval:
+            last_flush[0] = start
+            write_snapshot(directory)
+        return response
+
+    @app.teardown_request
+    def end_request(exc):
+        if g.pop("metrics_start", None) is not None:
+            registry.add("http_requests_in_flight", value=-1)
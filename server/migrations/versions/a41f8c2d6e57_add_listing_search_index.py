@@ -0,0 +1,57 @@
+"""add listing full-text search index
+
+Revision ID: a41f8c2d6e57
+Revises: 7c1d4e9a2b3f
+Create Date: 2025-06-09 14:52:03.118460
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f8c2d6e57'
+down_revision = '7c1d4e9a2b3f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 external-content table over item_listings(title, description),
+    # kept in sync by triggers so every write path updates the index.
+    op.execute("""
+        CREATE VIRTUAL TABLE item_listings_fts USING fts5(
+            title, description,
+            content='item_listings', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER item_listings_fts_ai AFTER INSERT ON item_listings BEGIN
+            INSERT INTO item_listings_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER item_listings_fts_ad AFTER DELETE ON item_listings BEGIN
+            INSERT INTO item_listings_fts(item_listings_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER item_listings_fts_au AFTER UPDATE OF title, description ON item_listings BEGIN
+            INSERT INTO item_listings_fts(item_listings_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO item_listings_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """)
+    # Index listings that already exist
+    op.execute("INSERT INTO item_listings_fts(item_listings_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS item_listings_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS item_listings_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS item_listings_fts_ai")
+    op.execute("DROP TABLE IF EXISTS item_listings_fts")
@@ -0,0 +1,41 @@
+"""page unpriced listings last
+
+Revision ID: f1dcd954b932
+Revises: 8cad0cc157ba
+Create Date: 2026-10-17 20:37:47.478527
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1dcd954b932'
+down_revision = '8cad0cc157ba'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Virtual generated columns can be added in place; no table rebuild
+    op.add_column('item_listings', sa.Column('unpriced', sa.Boolean(), sa.Computed('price IS NULL', persisted=False), nullable=True))
+    op.add_column('item_listings', sa.Column('priced', sa.Boolean(), sa.Computed('price IS NOT NULL', persisted=False), nullable=True))
+    with op.batch_alter_table('item_listings', schema=None) as batch_op:
+        batch_op.drop_index('ix_item_listings_price_id')
+        batch_op.drop_index('ix_item_listings_category_id_price_id')
+        batch_op.create_index('ix_item_listings_category_id_unpriced_price_id', ['category_id', 'unpriced', 'price', 'id'], unique=False)
+        batch_op.create_index('ix_item_listings_unpriced_price_id', ['unpriced', 'price', 'id'], unique=False)
+        batch_op.create_index('ix_item_listings_category_id_priced_price_id', ['category_id', 'priced', 'price', 'id'], unique=False)
+        batch_op.create_index('ix_item_listings_priced_price_id', ['priced', 'price', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('item_listings', schema=None) as batch_op:
+        batch_op.drop_index('ix_item_listings_priced_price_id')
+        batch_op.drop_index('ix_item_listings_category_id_priced_price_id')
+        batch_op.drop_index('ix_item_listings_unpriced_price_id')
+        batch_op.drop_index('ix_item_listings_category_id_unpriced_price_id')
+        batch_op.create_index('ix_item_listings_category_id_price_id', ['category_id', 'price', 'id'], unique=False)
+        batch_op.create_index('ix_item_listings_price_id', ['price', 'id'], unique=False)
+    op.drop_column('item_listings', 'priced')
+    op.drop_column('item_listings', 'unpriced')
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
-from werkzeug.security import generate_password_hash, check_password_hash
 from config import db
+from passwords import hash_password, verify_password, needs_rehash
 
 # --- Model Definitions ---
 
@@ -43,18 +43,22 @@ class User(db.Model):
             list: List of Category objects the user has listings in.
         """
         return (
-            Category.query.join(ItemListing)
-            .filter(ItemListing.user_id == self.id)
-            .distinct()
+            Category.query.join(UserCategoryStat)
+            .filter(UserCategoryStat.user_id == self.id)
+            .order_by(Category.id)
         )
 
     def set_password(self, password):
-       
-        self.password_hash = generate_password_hash(password)
+        """Hash the password on the hashing pool and store it."""
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-       
-        return check_password_hash(self.password_hash, password)
+        """Verify a password against the stored hash on the hashing pool."""
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """True if the stored hash uses outdated method or parameters."""
+        return needs_rehash(self.password_hash)
 
 class Category(db.Model):
     """
@@ -70,6 +74,8 @@ class Category(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     # Unique category name, required
     name = db.Column(db.String(64), unique=True, nullable=False)
+    # Number of listings in this category, maintained by counters.py
+    listing_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     # Relationship to ItemListing objects in this category
     listings = db.relationship("ItemListing", backref="category", lazy="dynamic")
 
@@ -92,6 +98,26 @@ class ItemListing(db.Model):
     """
 
     __tablename__ = "item_listings"
+    # Composite indexes backing keyset pagination ordered by (created_at, id),
+    # by price as (unpriced, price, id) ascending or (priced, price, id)
+    # descending and, for popular listings, by (favorite_count, id)
+    __table_args__ = (
+        db.Index("ix_item_listings_category_id_created_at_id", "category_id", "created_at", "id"),
+        db.Index("ix_item_listings_user_id_created_at_id", "user_id", "created_at", "id"),
+        db.Index("ix_item_listings_created_at_id", "created_at", "id"),
+        db.Index("ix_item_listings_category_id_unpriced_price_id", "category_id", "unpriced", "price", "id"),
+        db.Index("ix_item_listings_unpriced_price_id", "unpriced", "price", "id"),
+        db.Index("ix_item_listings_category_id_priced_price_id", "category_id", "priced", "price", "id"),
+        db.Index("ix_item_listings_priced_price_id", "priced", "price", "id"),
+        db.Index("ix_item_listings_category_id_favorite_count_id", "category_id", "favorite_count", "id"),
+        db.Index("ix_item_listings_favorite_count_id", "favorite_count", "id"),
+        # Finds the few soft-deleted listings waiting to be purged
+        db.Index(
+            "ix_item_listings_deleted_at",
+            "deleted_at",
+            sqlite_where=db.text("deleted_at IS NOT NULL"),
+        ),
+    )
 
     # Primary key with auto-incrementing integer
     id = db.Column(db.Integer, primary_key=True)
@@ -101,10 +127,18 @@ class ItemListing(db.Model):
     description = db.Column(db.Text, nullable=False)
     # Price of the item, optional
     price = db.Column(db.Float)
+    # Generated from price to lead the price sort indexes, so listings
+    # without a price page last in both directions (see pagination.py)
+    unpriced = db.Column(db.Boolean, db.Computed("price IS NULL", persisted=False))
+    priced = db.Column(db.Boolean, db.Computed("price IS NOT NULL", persisted=False))
     # URL for item image, optional
     image_url = db.Column(db.String(200))
+    # Number of users who favorited this listing, maintained by counters.py
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     # Timestamp of listing creation
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    # Set when the listing is soft-deleted and awaiting purge (see purge.py)
+    deleted_at = db.Column(db.DateTime, nullable=True)
     # Foreign key to the owning user
     user_id = db.Column(
         db.Integer,
@@ -134,6 +168,12 @@ class Favorite(db.Model):
     """
 
     __tablename__ = "favorites"
+    # A user can favorite a listing once; the unique index also serves
+    # lookups by user_id, and item_listing_id is indexed for the cascade
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "item_listing_id", name="uq_favorites_user_id_item_listing_id"),
+        db.Index("ix_favorites_item_listing_id", "item_listing_id"),
+    )
 
     # Primary key with auto-incrementing integer
     id = db.Column(db.Integer, primary_key=True)
@@ -152,4 +192,69 @@ class Favorite(db.Model):
     # Optional note about the favorite, fully implemented for functionality
     note = db.Column(db.Text)
     # Timestamp of favorite creation
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+class UserCategoryStat(db.Model):
+    """
+    Materialized summary of a user's listings in one category.
+
+    One row per (user, category) the user has listings in, kept up to date
+    by counters.py so "My Categories" never has to group the listings table.
+    """
+
+    __tablename__ = "user_category_stats"
+    # The primary key serves lookups by user_id; category_id is indexed for the cascade
+    __table_args__ = (
+        db.Index("ix_user_category_stats_category_id", "category_id"),
+    )
+
+    # Owner of the listings
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # Category the listings are in
+    category_id = db.Column(
+        db.Integer,
+        db.ForeignKey("categories.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # Number of the user's listings in the category
+    listing_count = db.Column(db.Integer, nullable=False, default=0)
+    # Creation time of the user's newest listing in the category
+    last_listed_at = db.Column(db.DateTime)
+    # Relationship to the Category for names in summaries
+    category = db.relationship("Category")
+
+class ListingNeighbor(db.Model):
+    """
+    Precomputed "users who favorited this also favorited" entry.
+
+    Holds up to RELATED_TOP_K rows per listing: the listings most often
+    favorited by the same users, scored by how many users favorited both.
+    Built and kept up to date by related.py.
+    """
+
+    __tablename__ = "listing_neighbors"
+    # Lookups read a listing's neighbours best first from the score index;
+    # related_id is indexed for the cascade
+    __table_args__ = (
+        db.Index("ix_listing_neighbors_listing_id_score", "listing_id", "score", "related_id"),
+        db.Index("ix_listing_neighbors_related_id", "related_id"),
+    )
+
+    # Listing the recommendations are for
+    listing_id = db.Column(
+        db.Integer,
+        db.ForeignKey("item_listings.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # Recommended listing
+    related_id = db.Column(
+        db.Integer,
+        db.ForeignKey("item_listings.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # Number of users who favorited both listings
+    score = db.Column(db.Integer, nullable=False)
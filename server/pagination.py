@@ -0,0 +1,199 @@
+import json
+import base64
+from datetime import datetime
+from flask import abort
+from sqlalchemy import tuple_
+from models import ItemListing
+
+# --- Keyset (cursor) pagination helpers ---
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_key(values):
+    """Encode a list of JSON-serializable sort key values into an opaque cursor."""
+    payload = json.dumps(values)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_key(cursor):
+    """
+    Decode a cursor produced by encode_key back into its list of values.
+    Aborts with 400 if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        abort(400, description="Invalid cursor")
+    if not isinstance(values, list):
+        abort(400, description="Invalid cursor")
+    return values
+
+
+def encode_cursor(created_at, id):
+    """
+    Encode the (created_at, id) sort key of the last row on a page into an
+    opaque, URL-safe cursor string.
+    """
+    return encode_key([created_at.isoformat() if created_at else None, id])
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor back into (created_at, id).
+    Aborts with 400 if the cursor is malformed.
+    """
+    try:
+        created_at, id = decode_key(cursor)
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError):
+        abort(400, description="Invalid cursor")
+
+
+def parse_limit(args):
+    """Read ?limit= from the query string, clamped to MAX_PAGE_SIZE."""
+    try:
+        limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        abort(400, description="Invalid limit")
+    if limit < 1:
+        abort(400, description="Invalid limit")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+# Sort orders accepted by ?sort=: (column, descending). Ties break on id in
+# the same direction, so every order is backed by a (..., column, id) index.
+LISTING_SORTS = {
+    "created_at": (ItemListing.created_at, False),
+    "-created_at": (ItemListing.created_at, True),
+    "price": (ItemListing.price, False),
+    "-price": (ItemListing.price, True),
+}
+DEFAULT_SORT = "-created_at"
+
+# Price orders lead with a generated flag column so listings without a price
+# page last in both directions: unpriced (price IS NULL) ascending, priced
+# (price IS NOT NULL) descending. Priced rows hold the flag value equal to
+# the order's descending, so a price bound can pin it.
+PRICE_FLAGS = {False: ItemListing.unpriced, True: ItemListing.priced}
+
+
+def parse_sort(args):
+    """Read ?sort= from the query string, aborting with 400 if unknown."""
+    sort = args.get("sort", DEFAULT_SORT)
+    if sort not in LISTING_SORTS:
+        abort(400, description="sort must be one of: " + ", ".join(LISTING_SORTS))
+    return sort
+
+
+def _parse_price(args, name):
+    try:
+        return float(args[name])
+    except ValueError:
+        abort(400, description=f"Invalid {name}")
+
+
+def filter_listings(qs, args):
+    """Apply ?category_id=, ?min_price= and ?max_price= to an ItemListing query or select()."""
+    if args.get("category_id"):
+        qs = qs.filter(ItemListing.category_id == args["category_id"])
+    column, descending = LISTING_SORTS[parse_sort(args)]
+    price = ItemListing.price
+    if column is not ItemListing.price:
+        # "price + 0" keeps SQLite from choosing the price index and then
+        # sorting every row in the range; walking the sort index and
+        # skipping rows outside the range stops after one page instead
+        price = ItemListing.price + 0
+    elif args.get("min_price") or args.get("max_price"):
+        # A bound rules out unpriced listings; pinning the flag lets SQLite
+        # seek the price range inside the sort index
+        qs = qs.filter(PRICE_FLAGS[descending] == descending)
+    if args.get("min_price"):
+        qs = qs.filter(price >= _parse_price(args, "min_price"))
+    if args.get("max_price"):
+        qs = qs.filter(price <= _parse_price(args, "max_price"))
+    return qs
+
+
+def _decode_sort_key(cursor, column):
+    if column is ItemListing.created_at:
+        return decode_cursor(cursor)
+    try:
+        value, id = decode_key(cursor)
+        # None marks a listing without a price
+        if isinstance(value, bool) or not isinstance(value, (int, float, type(None))):
+            raise TypeError(value)
+        return value, int(id)
+    except (ValueError, TypeError):
+        abort(400, description="Invalid cursor")
+
+
+def keyset_listings(qs, args):
+    """
+    Apply keyset pagination to an ItemListing query or select() in the
+    ?sort= order, newest first by default.
+
+    Rows are ordered by (sort column, id) and the page starts strictly
+    after the row encoded in ?cursor=, so the database seeks straight into
+    the composite index instead of skipping OFFSET rows. Price orders lead
+    with the PRICE_FLAGS column, so listings without a price come last.
+
+    Returns:
+        tuple: (query, page size, sort column). Fetch page size + 1 rows
+        and pass them to listings_page.
+    """
+    limit = parse_limit(args)
+    column, descending = LISTING_SORTS[parse_sort(args)]
+    key = [column, ItemListing.id]
+    if column is ItemListing.price:
+        key.insert(0, PRICE_FLAGS[descending])
+    if args.get("cursor"):
+        value, last_id = _decode_sort_key(args["cursor"], column)
+        if value is None:
+            # Past every priced listing: the rest tie on the flag and a
+            # NULL price, so only the id moves on
+            qs = qs.filter(key[0] == (not descending), column.is_(None))
+            qs = qs.filter(ItemListing.id < last_id if descending else ItemListing.id > last_id)
+        else:
+            after = [value, last_id]
+            if column is ItemListing.price:
+                after.insert(0, descending)  # The flag on priced rows
+            key_values, after_values = tuple_(*key), tuple_(*after)
+            qs = qs.filter(key_values < after_values if descending else key_values > after_values)
+    if descending:
+        qs = qs.order_by(*(part.desc() for part in key))
+    else:
+        qs = qs.order_by(*key)
+    return qs, limit, column
+
+
+def listings_page(rows, limit, column):
+    """
+    Trim the extra row fetched by keyset_listings' caller.
+
+    Returns:
+        tuple: (list of ItemListing rows, next_cursor or None)
+    """
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if column is ItemListing.created_at:
+            next_cursor = encode_cursor(last.created_at, last.id)
+        else:
+            next_cursor = encode_key([last.price, last.id])
+    return rows, next_cursor
+
+
+def paginate_listings(qs, args):
+    """
+    Fetch one keyset page of an ItemListing query (see keyset_listings).
+
+    Returns:
+        tuple: (list of ItemListing rows, next_cursor or None)
+    """
+    qs, limit, column = keyset_listings(qs, args)
+    # Fetch one extra row to know whether another page exists
+    return listings_page(qs.limit(limit + 1).all(), limit, column)
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+from flask import current_app
+
+# --- Password hashing on a bounded worker pool ---
+#
+# scrypt/PBKDF2 are deliberately slow. Running them inline lets a burst of
+# logins occupy every request worker, so hashing is done on a small
+# dedicated pool instead (hashlib releases the GIL while it works, so
+# threads run in parallel). A semaphore caps running + queued jobs and
+# callers past that limit get PasswordHashBusy straight away, which the
+# resources turn into a 503 rather than letting requests pile up.
+#
+# The *_async variants share the same pool and limits and await the result
+# instead of blocking, for the event loop in asgi.py. Each app instance has
+# its own pool, sized from its config when first needed.
+
+
+class PasswordHashBusy(Exception):
+    """Raised when the hashing pool is at capacity."""
+
+
+_current_method = None
+_lock = threading.Lock()
+
+
+def _get_pool():
+    """The current app's (pool, slots), created on first use from its config."""
+    app = current_app._get_current_object()
+    with _lock:
+        pool = app.extensions.get("password_hash_pool")
+        if pool is None:
+            workers = app.config["PASSWORD_HASH_WORKERS"]
+            pool = app.extensions["password_hash_pool"] = (
+                ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash"),
+                threading.BoundedSemaphore(workers + app.config["PASSWORD_HASH_QUEUE_DEPTH"]),
+            )
+        return pool
+
+
+def shutdown_pool():
+    """Stop the current app's hashing pool; the next call creates a fresh one from app.config."""
+    with _lock:
+        pool = current_app.extensions.pop("password_hash_pool", None)
+    if pool is not None:
+        pool[0].shutdown(wait=True)
+
+
+def _submit(func, *args):
+    """Queue func on the hashing pool, or raise PasswordHashBusy if it is full."""
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise PasswordHashBusy()
+    try:
+        future = pool.submit(func, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def _run(func, *args):
+    """Run func on the hashing pool, or inline when PASSWORD_HASH_WORKERS is 0."""
+    if not current_app.config["PASSWORD_HASH_WORKERS"]:
+        return func(*args)
+    future = _submit(func, *args)
+    try:
+        return future.result(timeout=current_app.config["PASSWORD_HASH_TIMEOUT"])
+    except TimeoutError:
+        raise PasswordHashBusy()
+
+
+async def _run_async(func, *args):
+    """
+    Await func on the hashing pool. With PASSWORD_HASH_WORKERS 0 it runs on
+    the loop's default executor, since running inline would stall the loop.
+    """
+    if not current_app.config["PASSWORD_HASH_WORKERS"]:
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+    future = _submit(func, *args)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), current_app.config["PASSWORD_HASH_TIMEOUT"])
+    except asyncio.TimeoutError:
+        raise PasswordHashBusy()
+
+
+def hash_password(password):
+    """Hash a password with the configured method and parameters."""
+    return _run(
+        generate_password_hash,
+        password,
+        current_app.config["PASSWORD_HASH_METHOD"],
+        current_app.config["PASSWORD_SALT_LENGTH"],
+    )
+
+
+def verify_password(password_hash, password):
+    """Check a password against a stored hash."""
+    return _run(check_password_hash, password_hash, password)
+
+
+async def hash_password_async(password):
+    """hash_password for async callers."""
+    return await _run_async(
+        generate_password_hash,
+        password,
+        current_app.config["PASSWORD_HASH_METHOD"],
+        current_app.config["PASSWORD_SALT_LENGTH"],
+    )
+
+
+async def verify_password_async(password_hash, password):
+    """verify_password for async callers."""
+    return await _run_async(check_password_hash, password_hash, password)
+
+
+def current_method():
+    """
+    Return the configured method with werkzeug's defaults filled in, in the
+    form stored at the start of a hash (e.g. 'scrypt:32768:8:1').
+    """
+    global _current_method
+    configured = current_app.config["PASSWORD_HASH_METHOD"]
+    if _current_method is None or _current_method[0] != configured:
+        normalized = generate_password_hash("", configured, 1).split("$", 1)[0]
+        _current_method = (configured, normalized)
+    return _current_method[1]
+
+
+def needs_rehash(password_hash):
+    """True if a stored hash was made with different method or parameters."""
+    return password_hash.split("$", 1)[0] != current_method()
@@ -0,0 +1,185 @@
+import click
+import threading
+from datetime import datetime, timezone
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, with_loader_criteria
+from config import db
+from models import Favorite, ItemListing
+from counters import adjust_listing_count, refresh_user_category_stats
+
+# --- Listing deletes ---
+#
+# Deleting a listing removes its favorites with one set-based DELETE on the
+# item_listing_id index, then the listing row, in the request's transaction.
+#
+# A listing with more than LISTING_DEFERRED_DELETE_FAVORITES favorites is
+# soft-deleted instead: the request only sets deleted_at and updates the
+# counters, so it takes the same time however popular the listing was. A
+# background thread then deletes its favorites LISTING_PURGE_BATCH_SIZE at
+# a time, committing after each batch so the SQLite write lock is released
+# in between, and finally the listing row. `flask listings purge` does the
+# same from the command line.
+#
+# Until purged, soft-deleted listings and their favorites are hidden from
+# every ORM query by the do_orm_execute hook below. Statements that need to
+# see them pass execution_options(include_deleted=True).
+
+_items = ItemListing.__table__
+
+# Plain table columns, so the hook's ItemListing criteria does not apply here
+DELETED_LISTING_IDS = select(_items.c.id).where(_items.c.deleted_at.is_not(None))
+
+# One listing waiting to be purged, from the partial deleted_at index
+NEXT_DELETED_LISTING = DELETED_LISTING_IDS.limit(1)
+
+
+# Built once: constructing loader criteria per query costs more than the query
+HIDE_DELETED = (
+    with_loader_criteria(ItemListing, ItemListing.deleted_at.is_(None), include_aliases=True),
+    with_loader_criteria(Favorite, Favorite.item_listing_id.not_in(DELETED_LISTING_IDS), include_aliases=True),
+)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_deleted_listings(orm_execute_state):
+    if (
+        orm_execute_state.is_select
+        and not orm_execute_state.is_column_load
+        and not orm_execute_state.is_relationship_load
+        and not orm_execute_state.execution_options.get("include_deleted", False)
+    ):
+        orm_execute_state.statement = orm_execute_state.statement.options(*HIDE_DELETED)
+
+
+def delete_listing(listing, session=db.session):
+    """
+    Delete a listing with its favorites, or soft-delete it if it has more
+    than LISTING_DEFERRED_DELETE_FAVORITES, and update the category counter
+    and the owner's category stats. The caller commits, then calls
+    schedule_purge() if the delete was deferred.
+
+    Returns:
+        bool: True if the listing was soft-deleted.
+    """
+    deferred = listing.favorite_count > current_app.config["LISTING_DEFERRED_DELETE_FAVORITES"]
+    if deferred:
+        listing.deleted_at = datetime.now(timezone.utc)
+    else:
+        session.execute(
+            delete(Favorite).where(Favorite.item_listing_id == listing.id),
+            execution_options={"synchronize_session": False},
+        )
+        session.delete(listing)
+    adjust_listing_count(listing.category_id, -1, session)
+    refresh_user_category_stats(listing.user_id, [listing.category_id], session)
+    return deferred
+
+
+def purge_deleted_listings(batch_size=None, session=db.session):
+    """
+    Delete the favorites of soft-deleted listings batch_size at a time,
+    committing after each batch, then the listing rows.
+
+    Returns:
+        tuple: (listings purged, favorites deleted)
+    """
+    batch_size = batch_size or current_app.config["LISTING_PURGE_BATCH_SIZE"]
+    listings = favorites = 0
+    while True:
+        listing_id = session.scalar(NEXT_DELETED_LISTING)
+        if listing_id is None:
+            return listings, favorites
+        while True:
+            batch = select(Favorite.id).where(Favorite.item_listing_id == listing_id).limit(batch_size)
+            deleted = session.execute(
+                delete(Favorite).where(Favorite.id.in_(batch.scalar_subquery())),
+                execution_options={"synchronize_session": False},
+            ).rowcount
+            session.commit()
+            favorites += deleted
+            if deleted < batch_size:
+                break
+        # Anything favorited since the last batch goes with the row (ON DELETE CASCADE)
+        session.execute(
+            delete(ItemListing).where(ItemListing.id == listing_id),
+            execution_options={"synchronize_session": False},
+        )
+        session.commit()
+        listings += 1
+
+
+class ListingPurger:
+    """
+    Runs purge_deleted_listings on a daemon thread whenever woken and every
+    LISTING_PURGE_INTERVAL seconds after. The thread starts on the first
+    wake(), which init_purge makes at startup if listings are pending.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="listing-purge", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        app = self.app
+        while True:
+            self._wake.wait(app.config["LISTING_PURGE_INTERVAL"])
+            self._wake.clear()
+            with app.app_context():
+                try:
+                    purge_deleted_listings()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("Purging deleted listings failed")
+                finally:
+                    db.session.remove()
+
+
+def init_purge(app):
+    """
+    Give the app its ListingPurger, as app.extensions["listing_purger"], and
+    start it if listings soft-deleted before a crash or restart are still
+    waiting to be purged.
+    """
+    purger = app.extensions["listing_purger"] = ListingPurger(app)
+    if not app.config["LISTING_PURGE_IN_BACKGROUND"]:
+        return
+    with app.app_context():
+        try:
+            pending = db.session.scalar(NEXT_DELETED_LISTING) is not None
+        except DBAPIError:  # No tables yet, before `flask db upgrade`
+            pending = False
+        finally:
+            db.session.remove()
+    if pending:
+        purger.wake()
+
+
+def schedule_purge():
+    """Wake the current app's purge thread, unless LISTING_PURGE_IN_BACKGROUND is off."""
+    if current_app.config["LISTING_PURGE_IN_BACKGROUND"]:
+        current_app.extensions["listing_purger"].wake()
+
+
+# --- CLI: flask listings ... ---
+
+listings_cli = AppGroup("listings", help="Manage item listings.")
+
+
+@listings_cli.command("purge")
+@click.option("--batch-size", type=int, default=None, help="Favorites deleted per transaction.")
+def purge_command(batch_size):
+    """Delete soft-deleted listings and their favorites."""
+    listings, favorites = purge_deleted_listings(batch_size)
+    click.echo(f"Purged {listings} listings and {favorites} favorites.")
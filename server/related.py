@@ -0,0 +1,276 @@
+import click
+import itertools
+from flask import abort, current_app
+from flask.cli import AppGroup
+from sqlalchemy import bindparam, delete, func, insert, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased, joinedload
+from config import db
+from models import Favorite, ItemListing, ListingNeighbor
+from pagination import parse_limit
+from purge import DELETED_LISTING_IDS
+
+# --- Related listings ---
+#
+# "Users who favorited this also favorited": listing_neighbors holds each
+# listing's RELATED_TOP_K most co-favorited listings, scored by how many
+# users favorited both, so GET /api/listings/<id>/related is one read of
+# the (listing_id, score, related_id) index instead of a self-join over
+# favorites per request. Ties rank the newer (higher id) listing first, so
+# that index serves the order as is.
+#
+# `flask related rebuild` recomputes the whole table in one transaction.
+# It loads favorites as a sparse users x listings matrix X of ones, where
+# X.T @ X counts the users shared by every pair of listings, multiplies it
+# out with SciPy RELATED_BUILD_BLOCK listings at a time to bound memory, and
+# keeps each listing's top K with one vectorized sort per block. NumPy and
+# SciPy are imported by the rebuild only, so serving processes never load
+# them; without them, or with RELATED_BUILD_METHOD = "sql", the same rows
+# come from a grouped self-join ranked with a window function.
+#
+# Favorite writes update the table in their own transaction without
+# reading other users' favorites: favoriting a listing adds 1 to its score
+# with each of the user's other favorites, in both directions, and
+# unfavoriting subtracts 1, so the work grows with that user's favorites
+# only. Rows whose score drops to 0 are deleted and lists that gained a row
+# are trimmed back to K. Scores already in a list stay exact, but the table
+# only knows the top K: a pair entering a list starts from the changes made
+# since, and a neighbour that drops out is not replaced by the one just
+# below it. Run `flask related rebuild` periodically (e.g. nightly) to
+# recompute every list exactly. Deleting a listing needs nothing: only
+# pairs with the listing itself change, and their rows go with it by
+# ON DELETE CASCADE.
+
+
+def _ranked(listing_id, related_id, score):
+    """Position of each row within its listing's neighbours, best first."""
+    return func.row_number().over(partition_by=listing_id, order_by=(score.desc(), related_id.desc()))
+
+
+_mine, _other = aliased(Favorite, name="mine"), aliased(Favorite, name="other")
+
+# Each favorite of a live listing paired with the same user's others, with
+# the number of users per pair. The purge hook's criteria do not follow the
+# self-join, so it filters soft-deleted listings itself and runs with
+# include_deleted=True.
+CO_FAVORITES = (
+    select(
+        _mine.item_listing_id.label("listing_id"),
+        _other.item_listing_id.label("related_id"),
+        func.count().label("score"),
+    )
+    .join(_other, (_other.user_id == _mine.user_id) & (_other.item_listing_id != _mine.item_listing_id))
+    .where(_mine.item_listing_id.not_in(DELETED_LISTING_IDS), _other.item_listing_id.not_in(DELETED_LISTING_IDS))
+    .group_by(_mine.item_listing_id, _other.item_listing_id)
+)
+
+# Built once with bound parameters: constructing these per favorite write
+# costs more than running them
+_upsert = sqlite_insert(ListingNeighbor)
+ADD_TO_SCORES = _upsert.on_conflict_do_update(
+    index_elements=["listing_id", "related_id"], set_={"score": ListingNeighbor.score + _upsert.excluded.score}
+)
+DELETE_EMPTY_NEIGHBORS = delete(ListingNeighbor).where(
+    ListingNeighbor.listing_id.in_(bindparam("listing_ids", expanding=True)), ListingNeighbor.score <= 0
+)
+
+_ranked_neighbors = (
+    select(
+        ListingNeighbor.listing_id,
+        ListingNeighbor.related_id,
+        _ranked(ListingNeighbor.listing_id, ListingNeighbor.related_id, ListingNeighbor.score).label("rank"),
+    )
+    .where(ListingNeighbor.listing_id.in_(bindparam("listing_ids", expanding=True)))
+    .subquery()
+)
+TRIM_NEIGHBORS = delete(ListingNeighbor).where(
+    tuple_(ListingNeighbor.listing_id, ListingNeighbor.related_id).in_(
+        select(_ranked_neighbors.c.listing_id, _ranked_neighbors.c.related_id)
+        .where(_ranked_neighbors.c.rank > bindparam("top_k"))
+    )
+)
+
+
+def refresh_related(user_id, listing_ids, session=db.session):
+    """
+    Update listing_neighbors after user_id favorited or unfavorited the
+    listings in listing_ids, in the current transaction.
+    """
+    changed = set(listing_ids)
+    if not changed:
+        return
+    session.flush()  # Apply the favorites being added or removed
+    after = set(session.scalars(select(Favorite.item_listing_id).where(Favorite.user_id == user_id)))
+    added, removed = changed & after, changed - after
+    before = (after - added) | removed
+
+    # +1 for each pair the user's favorites gained, -1 for each they lost
+    deltas = {}
+    for favorites, listings, step in ((after, added, 1), (before, removed, -1)):
+        for listing_id in listings:
+            for other_id in favorites - {listing_id}:
+                deltas[listing_id, other_id] = deltas.get((listing_id, other_id), 0) + step
+                if other_id not in listings:  # Else counted from other_id's side
+                    deltas[other_id, listing_id] = deltas.get((other_id, listing_id), 0) + step
+    if not deltas:
+        return
+
+    # Missing pairs are inserted with the delta as their score; lost pairs
+    # then end at 0 or below, whether they were listed or not
+    session.execute(ADD_TO_SCORES, [
+        {"listing_id": listing_id, "related_id": related_id, "score": delta}
+        for (listing_id, related_id), delta in deltas.items()
+    ])
+    updated = list({listing_id for listing_id, _ in deltas})
+    if removed:
+        session.execute(
+            DELETE_EMPTY_NEIGHBORS, {"listing_ids": updated}, execution_options={"synchronize_session": False}
+        )
+    if added:
+        session.execute(
+            TRIM_NEIGHBORS,
+            {"listing_ids": updated, "top_k": current_app.config["RELATED_TOP_K"]},
+            execution_options={"synchronize_session": False},
+        )
+
+
+def related_listings(listing_id, args):
+    """
+    The listings most often favorited together with listing_id, best first,
+    limited by ?limit= up to RELATED_TOP_K. Aborts with 404 for a missing
+    listing.
+
+    Returns:
+        list: (ItemListing, score) rows.
+    """
+    limit = min(parse_limit(args), current_app.config["RELATED_TOP_K"])
+    rows = db.session.execute(
+        select(ItemListing, ListingNeighbor.score)
+        .join(ListingNeighbor, ListingNeighbor.related_id == ItemListing.id)
+        .where(ListingNeighbor.listing_id == listing_id, ListingNeighbor.listing_id.not_in(DELETED_LISTING_IDS))
+        .options(joinedload(ItemListing.category), joinedload(ItemListing.owner))
+        .order_by(ListingNeighbor.score.desc(), ListingNeighbor.related_id.desc())
+        .limit(limit)
+    ).all()
+    # A listing without neighbours, or no listing at all
+    if not rows and db.session.get(ItemListing, listing_id) is None:
+        abort(404)
+    return rows
+
+
+# --- Full rebuild ---
+
+# Favorite rows fetched from the cursor at a time by the numpy build
+BUILD_FETCH_SIZE = 10_000
+
+_favorites, _neighbors = Favorite.__table__, ListingNeighbor.__table__
+
+
+def _favorite_matrix(np, sparse):
+    """
+    Favorites as a CSR users x listings matrix of ones.
+
+    Returns:
+        tuple: (matrix, listing id of each column)
+    """
+    # Plain table columns stream from the cursor into the array without
+    # building ORM rows, so soft-deleted listings are filtered here
+    result = db.session.execute(
+        select(_favorites.c.user_id, _favorites.c.item_listing_id)
+        .where(_favorites.c.item_listing_id.not_in(DELETED_LISTING_IDS))
+        .execution_options(yield_per=BUILD_FETCH_SIZE)
+    )
+    pairs = np.fromiter(itertools.chain.from_iterable(result), dtype=np.int64).reshape(-1, 2)
+    user_ids, users = np.unique(pairs[:, 0], return_inverse=True)
+    listing_ids, listings = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.int32), (users, listings)), shape=(len(user_ids), len(listing_ids))
+    )
+    return matrix, listing_ids
+
+
+def _top_neighbors(np, sparse, top_k, block_size):
+    """Yield (listing ids, related ids, scores) arrays of the top K rows, one block of listings at a time."""
+    by_user, listing_ids = _favorite_matrix(np, sparse)
+    by_listing = by_user.T.tocsr()
+    for start in range(0, by_listing.shape[0], block_size):
+        # Users shared by each listing in the block and every listing
+        shared = (by_listing[start:start + block_size] @ by_user).tocoo()
+        rows, cols, scores = shared.row, shared.col, shared.data
+        keep = cols != rows + start
+        rows, cols, scores = rows[keep], cols[keep], scores[keep]
+        # One int64 key sorting by listing, then score and related id descending
+        # (columns follow listing id order); a single argsort beats np.lexsort
+        span = (int(scores.max(initial=0)) + 1) * by_user.shape[1]
+        key = rows.astype(np.int64) * span + (span - 1 - (scores.astype(np.int64) * by_user.shape[1] + cols))
+        order = np.argsort(key)
+        rows, cols, scores = rows[order], cols[order], scores[order]
+        # Position within each listing's run, from where the runs start
+        counts = np.bincount(rows, minlength=shared.shape[0])
+        starts = np.cumsum(counts) - counts
+        top = np.arange(len(rows)) - starts[rows] < top_k
+        yield listing_ids[rows[top] + start], listing_ids[cols[top]], scores[top]
+
+
+def _rebuild_with_numpy(np, sparse, top_k, block_size):
+    count = 0
+    for listing_ids, related_ids, scores in _top_neighbors(np, sparse, top_k, block_size):
+        if len(scores):
+            db.session.execute(insert(_neighbors), [
+                {"listing_id": listing_id, "related_id": related_id, "score": score}
+                for listing_id, related_id, score in zip(listing_ids.tolist(), related_ids.tolist(), scores.tolist())
+            ])
+        count += len(scores)
+    return count
+
+
+def _rebuild_with_sql(top_k):
+    pairs = CO_FAVORITES.add_columns(
+        _ranked(_mine.item_listing_id, _other.item_listing_id, func.count()).label("rank")
+    ).subquery()
+    listing_id, related_id, score, rank = pairs.c
+    return db.session.execute(
+        insert(ListingNeighbor).from_select(
+            ["listing_id", "related_id", "score"], select(listing_id, related_id, score).where(rank <= top_k)
+        )
+    ).rowcount
+
+
+def rebuild_related(method=None):
+    """
+    Recompute every listing's neighbours from favorites and commit.
+
+    Args:
+        method (str): "numpy" or "sql", overriding RELATED_BUILD_METHOD.
+
+    Returns:
+        tuple: (rows stored, method used)
+    """
+    method = method or current_app.config["RELATED_BUILD_METHOD"]
+    if method == "numpy":
+        try:
+            import numpy as np
+            from scipy import sparse
+        except ImportError:  # Falls back to the SQL build
+            method = "sql"
+    db.session.execute(delete(ListingNeighbor), execution_options={"synchronize_session": False})
+    top_k = current_app.config["RELATED_TOP_K"]
+    if method == "numpy":
+        count = _rebuild_with_numpy(np, sparse, top_k, current_app.config["RELATED_BUILD_BLOCK"])
+    else:
+        count = _rebuild_with_sql(top_k)
+    db.session.commit()
+    return count, method
+
+
+# --- CLI: flask related ... ---
+
+related_cli = AppGroup("related", help="Manage the related listings index.")
+
+
+@related_cli.command("rebuild")
+@click.option("--method", type=click.Choice(["numpy", "sql"]), help="Override RELATED_BUILD_METHOD.")
+def rebuild_command(method):
+    """Recompute every listing's related listings from favorites."""
+    count, method = rebuild_related(method)
+    click.echo(f"Stored {count} related listing rows ({method} build).")
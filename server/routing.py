@@ -0,0 +1,160 @@
+import time
+import threading
+from functools import wraps
+from flask import current_app, g, has_app_context
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from storage import apply_sqlite_pragmas, engine_options_from_env
+
+# --- Read/write session routing ---
+#
+# Resource methods decorated with @read_only run their SELECTs on the "read"
+# bind, a separate engine with its own connection pool, so heavy reads
+# never wait for pool connections or transactions held by writers:
+#
+#   - READ_DATABASE_URL, when set: a replica of the primary database.
+#   - Otherwise, for a file SQLite database in WAL mode: more connections
+#     to the same file with PRAGMA query_only=ON. WAL readers see every
+#     committed write and never block the writer.
+#
+# With neither, there is no read bind and everything uses the primary.
+# READ_DB_POOL_SIZE etc. size the read pool apart from DB_POOL_SIZE.
+#
+# Everything else stays on the primary: undecorated handlers, background
+# jobs and the CLI, every flush and INSERT/UPDATE/DELETE, and any query run
+# after the session has flushed, so a handler reads its own uncommitted
+# writes. When a replica is configured, requests from a user who committed
+# a write in the last READ_YOUR_WRITES_SECONDS also stay on the primary,
+# so they see their change despite replication lag. That window is tracked
+# per app instance in each worker process, and cached public responses may
+# still be refilled from a lagging replica.
+
+READ_BIND = "read"
+
+
+def read_binds(config):
+    """The SQLALCHEMY_BINDS entry for the read engine, or {} to read from the primary."""
+    if not config["READ_ROUTING_ENABLED"]:
+        return {}
+    url = config["READ_DATABASE_URL"]
+    if not url:
+        primary = make_url(config["SQLALCHEMY_DATABASE_URI"])
+        wal = str(config["SQLITE_PRAGMAS"].get("journal_mode", "")).upper() == "WAL"
+        if primary.get_backend_name() != "sqlite" or primary.database in (None, "", ":memory:") or not wal:
+            return {}
+        url = config["SQLALCHEMY_DATABASE_URI"]
+    return {READ_BIND: {"url": url, **engine_options_from_env("READ_DB_")}}
+
+
+def read_sqlite_pragmas(pragmas):
+    """The primary's PRAGMAs for a read connection: query-only, journal mode left to the writer."""
+    return {**{name: value for name, value in pragmas.items() if name != "journal_mode"}, "query_only": "ON"}
+
+
+class RecentWriters:
+    """Users who committed a write in the last `window` seconds."""
+
+    def __init__(self, window):
+        self.window = window
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def add(self, identity):
+        with self._lock:
+            self._until[identity] = time.monotonic() + self.window
+
+    def __contains__(self, identity):
+        if not self._until:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            until = self._until.get(identity)
+            if until is not None and until < now:
+                # Drop every expired entry while here, so the dict stays small
+                self._until = {key: value for key, value in self._until.items() if value >= now}
+                return False
+            return until is not None
+
+
+def _current_identity():
+    """The request's JWT identity if it has been verified, else None."""
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+def read_only(func):
+    """Run a Resource method's queries on the read bind, if there is one."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _use_read_bind():
+    """Decide once per request whether a @read_only handler may use the read bind."""
+    use = g.get("db_use_read_bind")
+    if use is None:
+        recent_writers = current_app.extensions.get("recent_writers")
+        use = g.db_use_read_bind = not (recent_writers and _current_identity() in recent_writers)
+    return use
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy's session, sending @read_only handlers' reads to the read bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not self.info.get("flushed")
+            and not getattr(clause, "is_dml", False)
+            and has_app_context()
+            and g.get("db_read_only")
+        ):
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None and _use_read_bind():
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_flushed(session, flush_context):
+    session.info["flushed"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _record_writer(session):
+    if session.info.pop("flushed", False) and has_app_context():
+        recent_writers = current_app.extensions.get("recent_writers")
+        identity = _current_identity() if recent_writers is not None else None
+        if identity is not None:
+            recent_writers.add(identity)
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _clear_flushed(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("flushed", None)
+
+
+def init_read_routing(app, db):
+    """Apply the read PRAGMAs to a SQLite read engine and start tracking recent writers."""
+    engine = db.engines.get(READ_BIND)
+    if engine is None:
+        return
+    if engine.dialect.name == "sqlite":
+        pragmas = read_sqlite_pragmas(app.config["SQLITE_PRAGMAS"])
+
+        @event.listens_for(engine, "connect")
+        def set_read_sqlite_pragma(dbapi_connection, connection_record):
+            apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+    if app.config["READ_DATABASE_URL"]:
+        app.extensions["recent_writers"] = RecentWriters(app.config["READ_YOUR_WRITES_SECONDS"])
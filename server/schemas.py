@@ -0,0 +1,156 @@
+import threading
+from marshmallow import fields
+from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
+from config import db
+from models import User, Favorite, Category, ItemListing
+from fieldsets import Fieldset
+
+# --- Schemas, built on first use ---
+#
+# Defining a SQLAlchemyAutoSchema inspects its model's mapper, which
+# configures every mapper, and Fieldset builds a schema per field
+# selection. Rather than paying for that on import in every process, the
+# classes, shared instances and fieldsets below are built together the
+# first time any of them is used:
+#
+#     import schemas
+#     schemas.listing_schema.dump(listing)
+#
+# `from schemas import listing_schema` works too, but builds them at once.
+
+_lock = threading.Lock()
+
+
+def _build():
+    """Define the schemas and fieldsets; returns them by name."""
+
+    class UserSchema(SQLAlchemyAutoSchema):
+        class Meta:
+            model = User
+            load_instance = True
+            include_relationships = True
+            sqla_session = db.session
+            dump_only = ("id", "created_at", "password_hash")
+
+        id = fields.Integer(dump_only=True)
+        # password = fields.String(load_only=True, required=True, validate=validate.Length(min=6))
+        listings = fields.Nested("ItemListingSchema", many=True, exclude=("owner",))
+        categories = fields.Nested("CategorySchema", many=True, exclude=("listings",))
+        favorites = fields.Nested("FavoriteSchema", many=True, exclude=("listing",))
+
+    class CategorySchema(SQLAlchemyAutoSchema):
+        """
+        Schema for serializing and deserializing Category model instances.
+        Includes nested listings for 'My Categories' functionality.
+        """
+
+        class Meta:
+            model = Category
+            load_instance = True
+            include_relationships = False
+            sqla_session = db.session
+
+        id = fields.Integer(dump_only=True)
+        name = fields.String(required=True)
+        listing_count = fields.Integer(dump_only=True)
+        listings = fields.Nested("ItemListingSchema", many=True, dump_only=True)
+
+    class ItemListingSchema(SQLAlchemyAutoSchema):
+        """
+        Schema for serializing and deserializing ItemListing model instances.
+        Includes nested category info for frontend display.
+        """
+
+        class Meta:
+            model = ItemListing
+            load_instance = True
+            include_fk = True
+            sqla_session = db.session
+            dump_only = ("id", "created_at")
+            # Internal to soft deletes (see purge.py) and price sorting
+            exclude = ("deleted_at", "unpriced", "priced")
+
+        id = fields.Integer(dump_only=True)
+        title = fields.String(required=True)
+        description = fields.String(required=True)
+        price = fields.Float(allow_none=True)
+        image_url = fields.String(allow_none=True)
+        favorite_count = fields.Integer(dump_only=True)
+        category_id = fields.Integer(required=True)
+        user_id = fields.Integer(required=True)
+        category = fields.Nested(
+            "CategorySchema", only=("id", "name"), dump_only=True
+        )  # Added for category info
+        owner = fields.Nested("UserSchema", only=("id", "username"))
+        # Added for category info
+
+
+
+    class FavoriteSchema(SQLAlchemyAutoSchema):
+        """
+        Schema for serializing and deserializing Favorite model instances.
+        Includes nested listing with category info.
+        """
+
+        class Meta:
+            model = Favorite
+            load_instance = True
+            include_fk = True
+            sqla_session = db.session
+            dump_only = ("id", "created_at")
+
+        id = fields.Integer(dump_only=True)
+        user_id = fields.Integer(required=True)
+        item_listing_id = fields.Integer(required=True)
+        note = fields.String(allow_none=True)
+        created_at = fields.DateTime(dump_only=True)
+        listing = fields.Nested(
+            ItemListingSchema, dump_only=True
+        )  # Includes category via ItemListing
+
+
+    # Schema instances
+
+    user_schema = UserSchema()
+    cat_schema = CategorySchema()
+    cats_schema = CategorySchema(many=True)
+    fav_schema = FavoriteSchema()
+    favs_schema = FavoriteSchema(many=True)
+    listing_schema = ItemListingSchema()
+    listings_schema = ItemListingSchema(many=True)
+    cat_summary_schema = CategorySchema(exclude=("listings",))
+    listing_import_schema = ItemListingSchema(load_instance=False)
+
+    # ?fields= / ?expand= support for list endpoints
+    listing_fields = Fieldset(
+        listings_schema,
+        ItemListing,
+        {"category": (ItemListing.category,), "owner": (ItemListing.owner,)},
+        required=("id", "created_at", "price"),  # Pagination sort keys
+    )
+    favorite_fields = Fieldset(
+        favs_schema,
+        Favorite,
+        {
+            "listing": (Favorite.listing,),
+            "listing.category": (Favorite.listing, ItemListing.category),
+            "listing.owner": (Favorite.listing, ItemListing.owner),
+        },
+    )
+
+    # A new user has no listings, categories or favorites to nest (asgi.py)
+    new_user_schema = UserSchema(exclude=("listings", "categories", "favorite_items"))
+
+    return {name: value for name, value in locals().items() if not name.startswith("_")}
+
+
+def __getattr__(name):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    with _lock:
+        if "user_schema" not in globals():
+            globals().update(_build())
+    try:
+        return globals()[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
@@ -0,0 +1,141 @@
+import re
+import click
+from flask import abort
+from flask.cli import AppGroup
+from sqlalchemy import text, and_, or_, Integer, Float
+from config import db
+from models import ItemListing
+from pagination import parse_limit, encode_key, decode_key
+
+# --- Full-text search over item listings (SQLite FTS5) ---
+#
+# item_listings_fts is an external-content FTS5 table: it indexes
+# ItemListing.title and ItemListing.description but stores no copy of the
+# text. Triggers on item_listings keep it in sync for every write path.
+
+FTS_TABLE = "item_listings_fts"
+
+# Title matches weigh more than description matches in bm25 ranking
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS item_listings_fts USING fts5(
+        title, description,
+        content='item_listings', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_listings_fts_ai AFTER INSERT ON item_listings BEGIN
+        INSERT INTO item_listings_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_listings_fts_ad AFTER DELETE ON item_listings BEGIN
+        INSERT INTO item_listings_fts(item_listings_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS item_listings_fts_au AFTER UPDATE OF title, description ON item_listings BEGIN
+        INSERT INTO item_listings_fts(item_listings_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO item_listings_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(q):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word is quoted (so FTS5 operators in user input are inert) and
+    turned into a prefix query, and words are implicitly ANDed:
+    'red bik' -> '"red"* "bik"*'.
+
+    Returns:
+        str or None: The MATCH expression, or None if q has no searchable words.
+    """
+    tokens = _TOKEN_RE.findall(q or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_listings(args):
+    """
+    Run a ranked full-text search for ?q=, optionally filtered by ?category_id=.
+
+    Results are ordered by bm25 rank (best first) then id, and paginated with
+    a (rank, id) keyset cursor.
+
+    Returns:
+        tuple: (list of ItemListing rows, next_cursor or None)
+    """
+    match = build_match_query(args.get("q"))
+    if match is None:
+        abort(400, description="Missing search query")
+    limit = parse_limit(args)
+
+    fts = (
+        text(
+            f"SELECT rowid AS id, bm25({FTS_TABLE}, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+        )
+        .bindparams(match=match)
+        .columns(id=Integer, rank=Float)
+        .subquery("fts")
+    )
+    qs = db.session.query(ItemListing, fts.c.rank).join(fts, fts.c.id == ItemListing.id)
+    if args.get("category_id"):
+        qs = qs.filter(ItemListing.category_id == args["category_id"])
+    if args.get("cursor"):
+        try:
+            rank, last_id = decode_key(args["cursor"])
+            rank, last_id = float(rank), int(last_id)
+        except (ValueError, TypeError):
+            abort(400, description="Invalid cursor")
+        qs = qs.filter(
+            or_(fts.c.rank > rank, and_(fts.c.rank == rank, ItemListing.id > last_id))
+        )
+    rows = qs.order_by(fts.c.rank, ItemListing.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        listing, rank = rows[-1]
+        next_cursor = encode_key([rank, listing.id])
+    return [listing for listing, _ in rows], next_cursor
+
+
+def create_search_index():
+    """Create the FTS table and sync triggers if they do not exist yet."""
+    for statement in FTS_DDL:
+        db.session.execute(text(statement))
+
+
+def rebuild_search_index():
+    """Repopulate the FTS index from the current contents of item_listings."""
+    create_search_index()
+    db.session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    db.session.commit()
+
+
+# --- CLI: flask search ... ---
+
+search_cli = AppGroup("search", help="Manage the listing full-text search index.")
+
+
+@search_cli.command("reindex")
+def reindex_command():
+    """Rebuild the listing search index from existing data."""
+    rebuild_search_index()
+    count = db.session.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+    click.echo(f"Indexed {count} listings.")
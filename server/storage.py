@@ -0,0 +1,68 @@
+import os
+
+# --- SQLite storage profiles ---
+#
+# PRAGMAs applied to every new SQLite connection, on top of foreign_keys.
+# "production" switches to WAL so readers never block the writer (and vice
+# versa), relaxes fsync to once per checkpoint, memory-maps the file,
+# enlarges the page cache and waits for locks instead of failing with
+# "database is locked". "legacy" keeps SQLite's defaults.
+
+STORAGE_PROFILES = {
+    "legacy": {},
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # Negative means KiB: 64 MiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # Milliseconds
+    },
+}
+
+
+def sqlite_pragmas_from_env():
+    """
+    Build the PRAGMA settings from SQLITE_PROFILE (default "production"),
+    letting SQLITE_<PRAGMA> variables override single values, e.g.
+    SQLITE_MMAP_SIZE=0 or SQLITE_BUSY_TIMEOUT=10000.
+    """
+    profile = os.environ.get("SQLITE_PROFILE", "production")
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE {profile!r}; use one of {sorted(STORAGE_PROFILES)}")
+    pragmas = dict(STORAGE_PROFILES[profile])
+    for name in STORAGE_PROFILES["production"]:
+        value = os.environ.get(f"SQLITE_{name.upper()}")
+        if value is not None:
+            pragmas[name] = value
+    return pragmas
+
+
+def engine_options_from_env(prefix="DB_"):
+    """
+    SQLAlchemy engine/pool options from DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT, DB_POOL_RECYCLE and DB_POOL_PRE_PING, or the same
+    names under another prefix. Unset variables keep SQLAlchemy's defaults.
+    """
+    options = {}
+    for name, cast in [
+        ("pool_size", int),
+        ("max_overflow", int),
+        ("pool_timeout", float),
+        ("pool_recycle", int),
+    ]:
+        value = os.environ.get(f"{prefix}{name.upper()}")
+        if value is not None:
+            options[name] = cast(value)
+    if os.environ.get(f"{prefix}POOL_PRE_PING") is not None:
+        options["pool_pre_ping"] = os.environ[f"{prefix}POOL_PRE_PING"].lower() in ("1", "true", "yes")
+    return options
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas):
+    """Enable foreign keys and apply the given PRAGMAs to a new connection."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
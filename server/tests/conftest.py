@@ -0,0 +1,29 @@
+import pytest
+from app import create_app
+from config import db
+from search import create_search_index
+
+
+@pytest.fixture
+def app(tmp_path):
+    """An app on a fresh SQLite database with the tables created, response cache off."""
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "MIGRATIONS_ENABLED": False,
+        "RESPONSE_CACHE_ENABLED": False,
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def search_index(app):
+    """The listing FTS5 table and sync triggers, which db.create_all() leaves out."""
+    with app.app_context():
+        create_search_index()
+        db.session.commit()
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import pytest
+from flask_jwt_extended import create_access_token
+from config import db
+from models import Category, ItemListing, User
+
+
+@pytest.fixture(scope="module")
+def asgi(tmp_path_factory):
+    """asgi.py on a fresh database; it builds its app from DATABASE_URL on import."""
+    patch = pytest.MonkeyPatch()
+    patch.setenv("DATABASE_URL", f"sqlite:///{tmp_path_factory.mktemp('asgi') / 'test.db'}")
+    import asgi
+
+    with asgi.app.app_context():
+        db.create_all()
+        owner = User(username="owner", email="owner@example.com", password_hash="x")
+        db.session.add(owner)
+        db.session.flush()
+        category = Category(name="books")
+        db.session.add(category)
+        db.session.flush()
+        db.session.add_all([
+            ItemListing(title=f"book {n}", description="-", price=n, user_id=owner.id, category_id=category.id)
+            for n in range(3)
+        ])
+        db.session.commit()
+        asgi.token = create_access_token(identity=str(owner.id))
+    yield asgi
+    patch.undo()
+
+
+def call(asgi, method, path, body=None, headers=()):
+    """Run one request through the ASGI callable; returns (status, headers, JSON body)."""
+
+    async def run():
+        path_only, _, query = path.partition("?")
+        raw = [(b"authorization", f"Bearer {asgi.token}".encode())]
+        raw += [(name.encode(), value.encode()) for name, value in headers]
+        payload = b""
+        if body is not None:
+            payload = json.dumps(body).encode()
+            raw.append((b"content-type", b"application/json"))
+        scope = {
+            "type": "http", "method": method, "path": path_only,
+            "query_string": query.encode(), "headers": raw,
+        }
+        messages = [{"type": "http.request", "body": payload, "more_body": False}]
+        response = {"body": b""}
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = {name.decode(): value.decode() for name, value in message["headers"]}
+            else:
+                response["body"] += message.get("body", b"")
+
+        try:
+            await asgi.application(scope, receive, send)
+        finally:
+            # Pooled aiosqlite connections belong to this event loop
+            await asgi.engine.dispose()
+            if asgi.read_engine is not None:
+                await asgi.read_engine.dispose()
+        return response["status"], response["headers"], json.loads(response["body"]) if response["body"] else None
+
+    return asyncio.run(run())
+
+
+def flask_get(asgi, path):
+    response = asgi.app.test_client().get(path, headers={"Authorization": f"Bearer {asgi.token}"})
+    return response.status_code, response.get_json()
+
+
+@pytest.mark.parametrize("path", ["/api/me/listings?limit=2", "/api/me/categories", "/api/me/categories?summary=1"])
+def test_me_routes_match_the_flask_app(asgi, path):
+    status, _, body = call(asgi, "GET", path)
+
+    assert (status, body) == flask_get(asgi, path)
+
+
+@pytest.mark.parametrize("path", ["/api/listings/popular", "/api/listings/1/related", "/api/favorites/lookup?ids=1"])
+def test_other_routes_are_served_by_the_flask_app(asgi, path):
+    status, _, body = call(asgi, "GET", path)
+
+    assert status == 200
+    assert (status, body) == flask_get(asgi, path)
+
+
+def test_every_flask_route_is_routed(asgi):
+    for rule in asgi.app.url_map.iter_rules():
+        if rule.endpoint == "static":
+            continue
+        path = rule.rule.replace("<int:id>", "1")
+        assert call(asgi, "OPTIONS", path, headers=[("origin", "http://localhost")])[0] in (200, 204), path
+
+
+def test_cached_listings_are_invalidated_by_writes(asgi):
+    status, headers, before = call(asgi, "GET", "/api/listings")
+    assert status == 200
+    assert call(asgi, "GET", "/api/listings", headers=[("if-none-match", headers["etag"])])[0] == 304
+
+    created = call(asgi, "POST", "/api/listings", {"title": "new", "description": "-", "price": 9, "category_id": 1})[2]
+
+    status, _, after = call(asgi, "GET", "/api/listings")
+    assert status == 200
+    assert after["items"][0]["id"] == created["id"]
+    assert len(after["items"]) == len(before["items"]) + 1
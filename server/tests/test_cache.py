@@ -0,0 +1,32 @@
+from cache import ResponseCache, TableGenerations
+
+
+def test_set_skips_a_body_built_across_an_invalidation():
+    cache = ResponseCache()
+    generation = cache.generation(("item_listings", "users"))
+    # A commit to a table the body depends on lands while it is being built
+    cache.invalidate({"item_listings"})
+    cache.set("key", {"stale": True}, '"etag"', ("item_listings", "users"), generation)
+
+    assert cache.get("key") is None
+
+
+def test_set_keeps_a_body_when_other_tables_were_written():
+    cache = ResponseCache()
+    generation = cache.generation(("item_listings",))
+    cache.invalidate({"favorites"})
+    cache.set("key", {"fresh": True}, '"etag"', ("item_listings",), generation)
+
+    assert cache.get("key") == ({"fresh": True}, '"etag"')
+
+
+def test_invalidation_reaches_caches_sharing_a_generations_file(tmp_path):
+    # Two workers, each with its own cache over the same file
+    path = str(tmp_path / "generations")
+    first, second = ResponseCache(generations=TableGenerations(path)), ResponseCache(generations=TableGenerations(path))
+    second.set("key", {"stale": True}, '"etag"', ("item_listings",), second.generation(("item_listings",)))
+    assert second.get("key") is not None
+
+    first.invalidate({"item_listings"})
+
+    assert second.get("key") is None
@@ -0,0 +1,77 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from config import db
+from models import Category, Favorite, ItemListing, User
+
+
+def seed_user(app, categories, listings_per_category, favorites):
+    """A user with listings in several categories who favorited another user's listings."""
+    with app.app_context():
+        user = User(username="owner", email="owner@example.com", password_hash="x")
+        other = User(username="other", email="other@example.com", password_hash="x")
+        db.session.add_all([user, other])
+        db.session.flush()
+        for c in range(categories):
+            category = Category(name=f"category {c}")
+            db.session.add(category)
+            db.session.flush()
+            for n in range(listings_per_category):
+                db.session.add(ItemListing(
+                    title=f"listing {c}-{n}", description="-", price=n, user_id=user.id, category_id=category.id,
+                ))
+        db.session.flush()
+        for n in range(favorites):
+            listing = ItemListing(title=f"favorite {n}", description="-", price=n, user_id=other.id, category_id=category.id)
+            db.session.add(listing)
+            db.session.flush()
+            db.session.add(Favorite(user_id=user.id, item_listing_id=listing.id))
+        db.session.commit()
+        return create_access_token(identity=str(user.id))
+
+
+def count_statements(app, client, path, token):
+    """Issue a GET and return (response, number of SQL statements it ran)."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get(path, headers={"Authorization": f"Bearer {token}"})
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
+    return response, len(statements)
+
+
+@pytest.mark.parametrize("categories, listings_per_category, favorites", [(2, 1, 1), (4, 5, 12)])
+@pytest.mark.parametrize("path, expected", [
+    ("/api/me", 3),  # user, listings with categories, favorites with listings
+    ("/api/me/categories", 1),
+    ("/api/favorites", 1),
+    # Listing feeds without ?fields=/?expand= still dump category and owner
+    ("/api/listings", 1),
+    ("/api/me/listings", 1),
+])
+def test_statement_count_does_not_grow_with_rows(app, path, expected, categories, listings_per_category, favorites):
+    token = seed_user(app, categories, listings_per_category, favorites)
+    client = app.test_client()
+    client.get(path, headers={"Authorization": f"Bearer {token}"})  # Connect and warm up first
+
+    response, statements = count_statements(app, client, path, token)
+
+    assert response.status_code == 200
+    assert statements == expected
+
+
+def test_me_nests_every_listing_and_favorite(app):
+    token = seed_user(app, categories=3, listings_per_category=4, favorites=5)
+    body = app.test_client().get("/api/me", headers={"Authorization": f"Bearer {token}"}).get_json()
+
+    assert [len(category["listings"]) for category in body["categories"]] == [4, 4, 4]
+    assert len(body["favorites"]) == 5
@@ -0,0 +1,39 @@
+import os
+from config import db
+from metrics import registry
+
+
+def checkout_count(client):
+    for line in client.get("/metrics").get_data(as_text=True).splitlines():
+        if line.startswith("db_pool_checkout_wait_seconds_count"):
+            return int(line.split()[-1])
+    return 0
+
+
+def test_checkouts_are_timed_after_the_pool_is_replaced(app):
+    client = app.test_client()
+    # As reset_after_fork does in a gunicorn worker
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    before = checkout_count(client)
+
+    client.get("/api/categories")
+
+    assert checkout_count(client) > before
+
+
+def test_forked_child_starts_with_empty_registry(app):
+    registry.inc("http_requests_total", (("resource", "Test"),))
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # Child: report whether it inherited any series
+        snapshot = registry.snapshot()
+        os.write(write, b"1" if snapshot["counters"] or snapshot["histograms"] else b"0")
+        os._exit(0)
+    os.close(write)
+    inherited = os.read(read, 1)
+    os.waitpid(pid, 0)
+
+    assert inherited == b"0"
+    assert registry.snapshot()["counters"]
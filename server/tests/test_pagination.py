@@ -0,0 +1,72 @@
+import pytest
+from config import db
+from models import Category, ItemListing, User
+
+# Ties on price, and unpriced listings on both sides of a page boundary
+PRICES = [5, None, 3, 5, None, 1, 5, None, 3, None, 8, 1, None]
+
+
+@pytest.fixture
+def listings(app):
+    """The ids of listings priced as PRICES, spread over two categories."""
+    with app.app_context():
+        user = User(username="seller", email="seller@example.com", password_hash="x")
+        db.session.add_all([user, Category(name="first"), Category(name="second")])
+        db.session.flush()
+        rows = [
+            ItemListing(title=f"listing {n}", description="-", price=price, user_id=user.id, category_id=n % 2 + 1)
+            for n, price in enumerate(PRICES)
+        ]
+        db.session.add_all(rows)
+        db.session.commit()
+        return {row.id: row.price for row in rows}
+
+
+def walk(client, query):
+    """Follow next_cursor from the first page to the last; return every item."""
+    items, cursor = [], None
+    while True:
+        path = f"/api/listings?{query}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(path)
+        assert response.status_code == 200, response.json
+        items += response.json["items"]
+        cursor = response.json["next_cursor"]
+        if cursor is None:
+            return items
+
+
+@pytest.mark.parametrize("sort", ["price", "-price"])
+@pytest.mark.parametrize("limit", [1, 2, 4, 50])
+def test_price_sorts_page_unpriced_listings_last(app, listings, sort, limit):
+    items = walk(app.test_client(), f"sort={sort}&limit={limit}")
+
+    assert sorted(item["id"] for item in items) == sorted(listings)
+    priced = [item for item in items if item["price"] is not None]
+    unpriced = [item for item in items if item["price"] is None]
+    assert items == priced + unpriced
+    descending = sort.startswith("-")
+    assert [(item["price"], item["id"]) for item in priced] == sorted(
+        ((item["price"], item["id"]) for item in priced), reverse=descending
+    )
+    assert [item["id"] for item in unpriced] == sorted((item["id"] for item in unpriced), reverse=descending)
+
+
+@pytest.mark.parametrize("sort", ["price", "-price"])
+def test_price_sorts_with_category_and_bounds(app, listings, sort):
+    client = app.test_client()
+
+    in_category = walk(client, f"sort={sort}&limit=2&category_id=1")
+    assert sorted(item["id"] for item in in_category) == sorted(
+        id for id, price in listings.items() if id % 2 == 1
+    )
+    assert in_category[-1]["price"] is None
+
+    bounded = walk(client, f"sort={sort}&limit=2&min_price=3")
+    assert sorted(item["id"] for item in bounded) == sorted(
+        id for id, price in listings.items() if price is not None and price >= 3
+    )
+
+
+def test_price_cursor_rejects_non_numbers(app, listings):
+    cursor = "WyJhIiwgMV0"  # ["a", 1]
+    assert app.test_client().get(f"/api/listings?sort=price&cursor={cursor}").status_code == 400
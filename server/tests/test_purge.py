@@ -0,0 +1,71 @@
+import time
+from datetime import datetime, timezone
+from flask_jwt_extended import create_access_token
+from app import create_app
+from config import db
+from models import Category, Favorite, ItemListing, User
+
+
+def seed_listing(app, deleted=False):
+    """A listing, soft-deleted if asked, and a token for another user."""
+    with app.app_context():
+        owner = User(username="owner", email="owner@example.com", password_hash="x")
+        fan = User(username="fan", email="fan@example.com", password_hash="x")
+        category = Category(name="books")
+        db.session.add_all([owner, fan, category])
+        db.session.flush()
+        listing = ItemListing(
+            title="book", description="-", price=1, user_id=owner.id, category_id=category.id,
+            deleted_at=datetime.now(timezone.utc) if deleted else None,
+        )
+        db.session.add(listing)
+        db.session.commit()
+        return listing.id, fan.id, create_access_token(identity=str(fan.id))
+
+
+def test_favoriting_a_soft_deleted_listing_is_not_found(app):
+    listing_id, fan_id, token = seed_listing(app, deleted=True)
+
+    response = app.test_client().post(
+        "/api/favorites", json={"item_listing_id": listing_id}, headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 404
+    with app.app_context():
+        stored = db.session.scalars(
+            db.select(Favorite).filter_by(user_id=fan_id).execution_options(include_deleted=True)
+        ).all()
+        listing = db.session.get(ItemListing, listing_id, execution_options={"include_deleted": True})
+        assert stored == []
+        assert listing.favorite_count == 0
+
+
+def test_favoriting_a_live_listing_is_created(app):
+    listing_id, _, token = seed_listing(app)
+
+    response = app.test_client().post(
+        "/api/favorites", json={"item_listing_id": listing_id}, headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 201
+
+
+def test_listings_left_soft_deleted_are_purged_at_startup(app):
+    listing_id, _, _ = seed_listing(app, deleted=True)
+
+    # As after a restart: a new app on the same database, never woken by a delete
+    restarted = create_app({"SQLALCHEMY_DATABASE_URI": app.config["SQLALCHEMY_DATABASE_URI"], "MIGRATIONS_ENABLED": False})
+    deadline = time.monotonic() + 10
+    with restarted.app_context():
+        try:
+            while time.monotonic() < deadline:
+                listing = db.session.get(ItemListing, listing_id, execution_options={"include_deleted": True})
+                if listing is None:
+                    break
+                db.session.expire_all()
+                time.sleep(0.05)
+            assert listing is None
+        finally:
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
@@ -0,0 +1,198 @@
+import re
+import json
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, text
+from benchmarks.seed import seed
+from config import db
+from purge import purge_deleted_listings
+from related import rebuild_related
+
+# Every registered /api route is driven through the test client and each
+# statement the resources and the background listing purge issue is run
+# through EXPLAIN QUERY PLAN, plus the child-table lookup SQLite performs
+# for each foreign key (cascades and FK checks). A hot query that scans a
+# large table instead of searching an index fails the suite.
+
+# Tables big enough that a full scan on a hot path is a regression
+LARGE_TABLES = {"users", "item_listings", "favorites", "user_category_stats", "listing_neighbors"}
+
+# Routes that read a whole table on purpose
+FULL_SCAN_ROUTES = {
+    "GET /api/listings/export",
+    "GET /api/categories",
+}
+
+SCAN_RE = re.compile(r"^SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?")
+LIMIT_RE = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+
+
+def route_requests(listing_id, favorite_id):
+    """(method, path, kwargs) for every /api route, in an order that keeps ids valid."""
+    ndjson = "\n".join(
+        json.dumps({"title": f"bulk {i}", "description": "d", "category_id": 1}) for i in range(3)
+    )
+    listing = {"title": "Plan check", "description": "d", "price": 5, "category_id": 1}
+    return [
+        ("POST", "/api/signup", {"json": {"username": "planner", "email": "p@x", "password": "secret"}}),
+        ("POST", "/api/login", {"json": {"username": "planner", "password": "secret"}}),
+        ("GET", "/api/me", {}),
+        ("GET", "/api/me/categories", {}),
+        ("GET", "/api/me/categories?summary=1", {}),
+        ("GET", "/api/me/listings", {}),
+        ("GET", "/api/me/listings?category_id=1", {}),
+        ("GET", "/api/me/favorites/export", {}),
+        ("GET", "/api/categories", {}),
+        ("POST", "/api/categories", {"json": {"name": "Plan check"}}),
+        ("GET", "/api/categories/1", {}),
+        ("GET", "/api/listings", {}),
+        ("GET", "/api/listings?category_id=1", {}),
+        ("GET", "/api/listings?fields=id,title,price&expand=category", {}),
+        ("GET", "/api/listings?category_id=1&min_price=10&max_price=500&sort=-price", {}),
+        ("GET", "/api/listings?min_price=10&sort=created_at", {}),
+        ("GET", "/api/listings?limit=5&cursor={cursor}", {}),
+        ("GET", "/api/listings?sort=price&limit=5&cursor={price_cursor}", {}),
+        ("GET", "/api/listings/search?q=vintage&category_id=1", {}),
+        ("GET", "/api/listings/popular", {}),
+        ("GET", "/api/listings/popular?category_id=1&limit=5&cursor={popular_cursor}", {}),
+        ("GET", "/api/listings/export?format=csv", {}),
+        ("POST", "/api/listings", {"json": listing}),
+        ("POST", "/api/listings/bulk", {"data": ndjson, "content_type": "application/x-ndjson"}),
+        ("GET", f"/api/listings/{listing_id}", {}),
+        ("GET", f"/api/listings/{listing_id}/related", {}),
+        ("PUT", f"/api/listings/{listing_id}", {"json": {**listing, "user_id": 1}}),
+        ("GET", "/api/favorites", {}),
+        ("GET", "/api/favorites?fields=id,note&expand=listing.owner", {}),
+        ("POST", "/api/favorites", {"json": {"item_listing_id": listing_id}}),
+        ("GET", f"/api/favorites/lookup?ids={listing_id},1,2,3", {}),
+        ("POST", "/api/favorites/batch", {"json": {"add": [1, 2, 3], "remove": [4]}}),
+        ("PUT", f"/api/favorites/{favorite_id}", {"json": {"note": "n"}}),
+        ("DELETE", f"/api/favorites/{favorite_id}", {}),
+        ("DELETE", f"/api/listings/{listing_id}", {}),
+        ("GET", "/metrics", {}),
+    ]
+
+
+def explain(conn, statement, parameters):
+    return [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+
+
+def scan_problems(statement, plan, allow_full_scan):
+    """Return the plan lines that scan a large table without a bound."""
+    problems = []
+    for detail in plan:
+        match = SCAN_RE.match(detail)
+        if not match or match.group(1) not in LARGE_TABLES or allow_full_scan:
+            continue
+        # An index-ordered scan stopped by LIMIT reads only one page
+        if match.group(2) and LIMIT_RE.search(statement):
+            continue
+        problems.append(detail)
+    return problems
+
+
+@pytest.fixture
+def exercised_routes(app, search_index):
+    """
+    Seed, drive every route and the purge, and return
+    (responses, statements, exercised (method, endpoint) pairs).
+    """
+    with app.app_context():
+        engine = db.engine
+        engines = list(db.engines.values())
+    seed(engine, users=20, categories=5, listings=500, favorites=1000)
+    with app.app_context():
+        rebuild_related()
+    with engine.begin() as conn:
+        # User 1 deletes one of their listings (which others have favorited),
+        # favorites it first, and edits/deletes one of their other favorites
+        listing_id = conn.execute(text(
+            "SELECT item_listing_id FROM favorites JOIN item_listings l ON l.id = item_listing_id "
+            "WHERE l.user_id = 1 LIMIT 1"
+        )).scalar()
+        conn.execute(text("DELETE FROM favorites WHERE user_id = 1 AND item_listing_id = :id"), {"id": listing_id})
+        favorite_id = conn.execute(text("SELECT id FROM favorites WHERE user_id = 1 LIMIT 1")).scalar()
+
+    client = app.test_client()
+    cursors = {
+        "cursor": client.get("/api/listings?limit=5").json["next_cursor"],
+        "price_cursor": client.get("/api/listings?sort=price&limit=5").json["next_cursor"],
+        "popular_cursor": client.get("/api/listings/popular?category_id=1&limit=5").json["next_cursor"],
+    }
+    with app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+
+    responses, statements, exercised = [], [], set()
+    current = {"route": None}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if current["route"] and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            statements.append((current["route"], statement, parameters))
+
+    # Read-only resources query the read engine (see routing.py)
+    for bound in engines:
+        event.listen(bound, "before_cursor_execute", capture)
+    try:
+        for method, path, kwargs in route_requests(listing_id, favorite_id):
+            path = path.format(**cursors)
+            current["route"] = f"{method} {path.split('?')[0]}"
+            response = client.open(path, method=method, headers=headers, **kwargs)
+            responses.append((current["route"], response.status_code))
+            exercised.add((method, app.url_map.bind("").match(path.split("?")[0], method=method)[0]))
+
+        # The background purge of a soft-deleted, favorited listing
+        current["route"] = None
+        with engine.begin() as conn:
+            conn.execute(text(
+                "UPDATE item_listings SET deleted_at = CURRENT_TIMESTAMP "
+                "WHERE id = (SELECT item_listing_id FROM favorites LIMIT 1)"
+            ))
+        current["route"] = "purge_deleted_listings"
+        with app.app_context():
+            purge_deleted_listings(batch_size=2)
+    finally:
+        current["route"] = None
+        for bound in engines:
+            event.remove(bound, "before_cursor_execute", capture)
+    return responses, statements, exercised
+
+
+def test_every_route_succeeds(exercised_routes):
+    responses, statements, exercised = exercised_routes
+    assert [(route, status) for route, status in responses if status >= 400] == []
+
+
+def test_hot_queries_search_an_index(app, exercised_routes):
+    responses, statements, exercised = exercised_routes
+    problems = []
+    with app.app_context(), db.engine.connect() as conn:
+        for route, statement, parameters in statements:
+            template = re.sub(r"/\d+", "/<int:id>", route)
+            for detail in scan_problems(statement, explain(conn, statement, parameters), template in FULL_SCAN_ROUTES):
+                problems.append(f"{route}: {detail}: {' '.join(statement.split())[:200]}")
+    assert statements
+    assert problems == []
+
+
+def test_every_resource_method_is_checked(app, exercised_routes):
+    responses, statements, exercised = exercised_routes
+    api = app.extensions["api"]
+    missing = []
+    for endpoint, view in app.view_functions.items():
+        resource = getattr(view, "view_class", None)
+        if resource is None or endpoint not in api.endpoints:
+            continue
+        missing += [f"{method} {endpoint}" for method in resource.methods if (method, endpoint) not in exercised]
+    assert missing == []
+
+
+def test_foreign_keys_are_indexed(app):
+    # SQLite looks up child rows by FK column on every parent delete/update
+    problems = []
+    with app.app_context(), db.engine.connect() as conn:
+        for table in db.metadata.sorted_tables:
+            for fk in table.foreign_keys:
+                statement = f"SELECT 1 FROM {table.name} WHERE {fk.parent.name} = ?"
+                for detail in scan_problems(statement, explain(conn, statement, (1,)), False):
+                    problems.append(f"{table.name}.{fk.parent.name}: {detail}")
+    assert problems == []
@@ -0,0 +1,73 @@
+import random
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import select
+from config import db
+from models import Category, Favorite, ItemListing, ListingNeighbor, User
+from related import CO_FAVORITES, rebuild_related
+
+USERS, LISTINGS = 12, 15
+
+
+def stored_scores():
+    return {(row.listing_id, row.related_id): row.score for row in db.session.scalars(select(ListingNeighbor))}
+
+
+def exact_scores():
+    return {(listing_id, related_id): score for listing_id, related_id, score in db.session.execute(
+        CO_FAVORITES, execution_options={"include_deleted": True}
+    )}
+
+
+def favorite_randomly(app, seed, steps=150):
+    """Seed users and listings, then favorite and unfavorite through the API."""
+    with app.app_context():
+        category = Category(name="books")
+        users = [User(username=f"user {n}", email=f"{n}@example.com", password_hash="x") for n in range(USERS)]
+        db.session.add_all([category, *users])
+        db.session.flush()
+        db.session.add_all([
+            ItemListing(title=f"book {n}", description="-", price=n, user_id=users[0].id, category_id=category.id)
+            for n in range(LISTINGS)
+        ])
+        db.session.commit()
+        headers = [{"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"} for user in users]
+
+    client = app.test_client()
+    rng = random.Random(seed)
+    for step in range(steps):
+        user = rng.choice(headers)
+        if step % 25 == 0:
+            ids = rng.sample(range(1, LISTINGS + 1), 4)
+            response = client.post("/api/favorites/batch", json={"add": ids[:2], "remove": ids[2:]}, headers=user)
+            assert response.status_code == 200
+        elif rng.random() < 0.65:
+            response = client.post("/api/favorites", json={"item_listing_id": rng.randint(1, LISTINGS)}, headers=user)
+            assert response.status_code in (201, 409)
+        else:
+            favorites = client.get("/api/favorites?fields=id", headers=user).get_json()
+            if favorites:
+                response = client.delete(f"/api/favorites/{rng.choice(favorites)['id']}", headers=user)
+                assert response.status_code == 204
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_favorite_writes_keep_exact_scores_when_lists_hold_every_pair(app, seed):
+    app.config["RELATED_TOP_K"] = LISTINGS
+    favorite_randomly(app, seed)
+
+    with app.app_context():
+        assert db.session.query(Favorite).count() > 0
+        assert stored_scores() == exact_scores()
+
+
+def test_favorite_writes_never_overcount_with_trimmed_lists(app):
+    app.config["RELATED_TOP_K"] = 3
+    favorite_randomly(app, seed=3)
+
+    with app.app_context():
+        exact = exact_scores()
+        stored = stored_scores()
+        assert all(0 < score <= exact[pair] for pair, score in stored.items())
+        rebuild_related("sql")
+        assert all(score == exact[pair] for pair, score in stored_scores().items())
@@ -0,0 +1,140 @@
+from config import db
+from models import Category, ItemListing, User
+
+
+def seed_listings(app, *listings):
+    """Listings from (title, description, category name) triples; returns their ids."""
+    with app.app_context():
+        user = User(username="seller", email="seller@example.com", password_hash="x")
+        db.session.add(user)
+        categories = {}
+        rows = []
+        for title, description, category in listings:
+            if category not in categories:
+                categories[category] = Category(name=category)
+                db.session.add(categories[category])
+            rows.append(ItemListing(title=title, description=description, price=1, owner=user,
+                                    category=categories[category]))
+        db.session.add_all(rows)
+        db.session.commit()
+        return [row.id for row in rows]
+
+
+def search(client, query):
+    response = client.get(f"/api/listings/search?{query}")
+    assert response.status_code == 200, response.json
+    return response.json
+
+
+def search_ids(client, query):
+    return [item["id"] for item in search(client, query)["items"]]
+
+
+def test_title_matches_rank_above_description_matches(app, search_index):
+    in_description, in_title, _ = seed_listings(
+        app,
+        ("Oak table", "Pairs well with a vintage lamp", "home"),
+        ("Vintage lamp", "Brass, works fine", "home"),
+        ("Road bike", "Ten speed", "sport"),
+    )
+
+    assert search_ids(app.test_client(), "q=lamp") == [in_title, in_description]
+
+
+def test_every_word_matches_as_a_prefix(app, search_index):
+    bike, bicycle, _ = seed_listings(
+        app,
+        ("Red bike", "Barely used", "sport"),
+        ("Red bicycle", "Needs a tune-up", "sport"),
+        ("Blue bike", "Like new", "sport"),
+    )
+    client = app.test_client()
+
+    assert sorted(search_ids(client, "q=red%20bi")) == [bike, bicycle]
+    assert search_ids(client, "q=red%20bic") == [bicycle]
+    # FTS5 operators in the query are matched as words, not syntax
+    assert search_ids(client, "q=red%20OR%20blue") == []
+
+
+def test_category_filter(app, search_index):
+    home, sport = seed_listings(
+        app,
+        ("Camping lamp", "Battery powered", "home"),
+        ("Head lamp", "For running", "sport"),
+    )
+    with app.app_context():
+        category_id = db.session.get(ItemListing, sport).category_id
+
+    assert search_ids(app.test_client(), f"q=lamp&category_id={category_id}") == [sport]
+
+
+def test_cursor_pagination_returns_every_match_once(app, search_index):
+    ids = seed_listings(app, *[(f"Chair {n}", "chair " * (n % 3 + 1), "home") for n in range(7)])
+    client = app.test_client()
+    ranked = search_ids(client, "q=chair&limit=50")
+
+    pages, cursor = [], None
+    while True:
+        page = search(client, "q=chair&limit=3" + (f"&cursor={cursor}" if cursor else ""))
+        pages.append([item["id"] for item in page["items"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == ranked
+    assert sorted(ranked) == sorted(ids)
+
+
+def test_invalid_queries_are_rejected(app, search_index):
+    client = app.test_client()
+    assert client.get("/api/listings/search?q=%20!").status_code == 400
+    assert client.get("/api/listings/search?q=lamp&cursor=nope").status_code == 400
+
+
+def test_triggers_follow_updates_and_deletes(app, search_index):
+    kept, removed = seed_listings(
+        app,
+        ("Wooden desk", "Solid oak", "home"),
+        ("Metal desk", "Standing", "home"),
+    )
+    client = app.test_client()
+    assert sorted(search_ids(client, "q=desk")) == [kept, removed]
+
+    with app.app_context():
+        db.session.get(ItemListing, kept).title = "Wooden bench"
+        db.session.delete(db.session.get(ItemListing, removed))
+        db.session.commit()
+
+    assert search_ids(client, "q=desk") == []
+    assert search_ids(client, "q=bench") == [kept]
+    assert search_ids(client, "q=oak") == [kept]
+
+
+def test_reindex_command_indexes_existing_listings(app):
+    ids = seed_listings(
+        app,
+        ("Film camera", "35mm", "photo"),
+        ("Camera bag", "Leather", "photo"),
+    )
+
+    result = app.test_cli_runner().invoke(args=["search", "reindex"])
+
+    assert result.exit_code == 0, result.output
+    assert result.output == "Indexed 2 listings.\n"
+    assert sorted(search_ids(app.test_client(), "q=camera")) == sorted(ids)
+
+
+def test_reindexing_again_keeps_one_entry_per_listing_and_the_triggers(app):
+    (lamp,) = seed_listings(app, ("Desk lamp", "LED", "home"))
+    runner = app.test_cli_runner()
+    runner.invoke(args=["search", "reindex"])
+    assert runner.invoke(args=["search", "reindex"]).exit_code == 0
+
+    with app.app_context():
+        listing = ItemListing(title="Floor lamp", description="Tall", price=1, user_id=1, category_id=1)
+        db.session.add(listing)
+        db.session.commit()
+        added = listing.id
+
+    assert sorted(search_ids(app.test_client(), "q=lamp")) == [lamp, added]